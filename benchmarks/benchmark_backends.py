@@ -0,0 +1,84 @@
+"""
+Thread vs process workers for batch scoring.
+
+Scores the bundled sentence corpora with iter_score_batches(),
+for each jobs count and backend, and reports docs/sec and the speed-up
+over one worker. Run it once with the standard interpreter and once
+with a free-threaded build (e.g. python3.13t): threads only scale
+where the GIL is disabled, processes scale on both.
+
+use:
+    python3 benchmarks/benchmark_backends.py
+    python3.13t benchmarks/benchmark_backends.py --jobs 1 2 4 8 --repeat 20
+"""
+
+import argparse
+import os
+import platform
+import sys
+import sysconfig
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gofai_language_detect_batch import gil_enabled, iter_score_batches  # noqa: E402
+from gofai_language_detect_corpora import bundled_corpus_lines  # noqa: E402
+
+BACKENDS = ("threads", "processes")
+
+
+def time_backend(batches: list[list[str]], jobs: int, backend: str) -> tuple:
+    """Returns (seconds, results) of one run, worker start-up included."""
+    start = time.perf_counter()
+    results = list(iter_score_batches(batches, jobs=jobs, backend=backend))
+    return (time.perf_counter() - start, results)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--jobs", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1]
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="corpus copies to score")
+    parser.add_argument("--batch-documents", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    documents = (
+        bundled_corpus_lines("clean_sentences_list")
+        + bundled_corpus_lines("sentences_list")
+    ) * args.repeat
+    batches = [
+        documents[start : start + args.batch_documents]
+        for start in range(0, len(documents), args.batch_documents)
+    ]
+
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(
+        f"python {platform.python_version()}, free-threaded build: {free_threaded}, "
+        f"GIL enabled: {gil_enabled()}, cpus: {os.cpu_count()}"
+    )
+    print(f"{len(documents):,} documents in {len(batches)} batches")
+    print(f"{'backend':<12}{'jobs':>6}{'seconds':>10}{'docs/sec':>12}{'speed-up':>10}")
+
+    reference = None
+    all_equal = True
+    for backend in BACKENDS:
+        one_job_seconds = None
+        for jobs in sorted(set(args.jobs)):
+            # jobs=1 scores in this thread: the serial baseline
+            seconds, results = time_backend(batches, jobs, backend)
+            reference = reference or results
+            all_equal &= results == reference
+            one_job_seconds = one_job_seconds or seconds
+            print(
+                f"{backend:<12}{jobs:>6}{seconds:>10.2f}"
+                f"{len(documents) / seconds:>12,.0f}"
+                f"{one_job_seconds / seconds:>10.2f}"
+            )
+    if not all_equal:
+        print("results differ between runs", file=sys.stderr)
+    return 0 if all_equal else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
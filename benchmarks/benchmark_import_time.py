@@ -0,0 +1,135 @@
+"""
+Import time of the detector, for CLI and serverless cold starts.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters
+and reports the median cumulative import time of the module:
+    cached: with compiled bytecode (.pyc) present, as in a deployed package
+    source: compiling everything from source (no .pyc), the first-run worst case
+
+Also lists the heaviest modules pulled in, and fails (exit 1)
+when the cached median is over the budget.
+
+use:
+    python3 benchmarks/benchmark_import_time.py
+    python3 benchmarks/benchmark_import_time.py --module gofai_language_detect_arrow
+    python3 benchmarks/benchmark_import_time.py --budget-ms 5 --runs 30
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULE = "gofai_language_detect_v52"
+# Cached import budget of the detector module, in milliseconds
+IMPORT_TIME_BUDGET_MS = 5.0
+DEFAULT_RUNS = 15
+
+
+def run_importtime(
+    module_name: str,
+    pycache_prefix: str,
+    write_bytecode: bool,
+) -> list[tuple[str, int, int]]:
+    """
+    Imports module_name in a fresh interpreter with -X importtime.
+
+    Args:
+        pycache_prefix: directory for .pyc files (of this repo's modules too,
+            so a __pycache__ next to the sources is not used).
+        write_bytecode: False to always import the repo's modules from source.
+
+    Returns:
+        list: (module, self microseconds, cumulative microseconds),
+            in the order -X importtime reports them.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [
+        sys.executable,
+        "-X",
+        "importtime",
+        "-X",
+        f"pycache_prefix={pycache_prefix}",
+    ]
+    if not write_bytecode:
+        command.append("-B")
+    command += ["-c", f"import {module_name}"]
+
+    completed = subprocess.run(
+        command, capture_output=True, check=True, cwd=REPO_ROOT, env=env, text=True
+    )
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def module_import_ms(imports: list[tuple[str, int, int]], module_name: str) -> float:
+    """Cumulative import time of module_name, in milliseconds."""
+    for name, _, cumulative_us in imports:
+        if name == module_name:
+            return cumulative_us / 1000
+    raise ValueError(f"{module_name} not found in -X importtime output")
+
+
+def measure(module_name: str, runs: int, cached: bool) -> tuple:
+    """
+    Returns (median ms, imports of the last run),
+    with .pyc files written by a first run when cached, else from source.
+    """
+    with tempfile.TemporaryDirectory() as pycache_prefix:
+        if cached:
+            run_importtime(module_name, pycache_prefix, write_bytecode=True)
+
+        timings = []
+        imports: list[tuple[str, int, int]] = []
+        for _ in range(runs):
+            imports = run_importtime(module_name, pycache_prefix, write_bytecode=False)
+            timings.append(module_import_ms(imports, module_name))
+    return (statistics.median(timings), imports)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list")
+    args = parser.parse_args(argv)
+
+    cached_ms, imports = measure(args.module, args.runs, cached=True)
+    source_ms, _ = measure(args.module, args.runs, cached=False)
+
+    # Imports triggered by the module: not loaded by a bare interpreter
+    with tempfile.TemporaryDirectory() as pycache_prefix:
+        baseline_names = {
+            name for name, _, _ in run_importtime("sys", pycache_prefix, False)
+        }
+    module_imports = [entry for entry in imports if entry[0] not in baseline_names]
+
+    print(f"module: {args.module}  (median of {args.runs} runs)")
+    print(f"  cached (.pyc):  {cached_ms:8.2f} ms   budget {args.budget_ms:.2f} ms")
+    print(f"  source:         {source_ms:8.2f} ms")
+    print("heaviest imports (self ms), cached:")
+    for name, self_us, _ in sorted(module_imports, key=lambda entry: -entry[1])[
+        : args.top
+    ]:
+        print(f"  {self_us / 1000:8.2f}  {name}")
+
+    if cached_ms > args.budget_ms:
+        print(f"OVER BUDGET: {cached_ms:.2f} ms > {args.budget_ms:.2f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
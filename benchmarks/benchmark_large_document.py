@@ -0,0 +1,64 @@
+"""
+One very large document: serial scoring vs score_large_document() on N cores.
+
+The document is the bundled wikipedia corpus, repeated to --megabytes.
+Reports seconds and MB/sec per jobs count, and checks that every
+parallel result is exactly the serial one.
+
+use:
+    python3 benchmarks/benchmark_large_document.py
+    python3 benchmarks/benchmark_large_document.py --megabytes 200 --jobs 1 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gofai_language_detect_batch import (  # noqa: E402
+    DEFAULT_PIECE_CHARS,
+    score_large_document,
+)
+from gofai_language_detect_corpora import read_bundled_corpus  # noqa: E402
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--megabytes", type=float, default=20.0)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[2, os.cpu_count() or 1])
+    parser.add_argument("--piece-chars", type=int, default=DEFAULT_PIECE_CHARS)
+    args = parser.parse_args(argv)
+
+    corpus = read_bundled_corpus("wikipedia_samples_text_doc")
+    repeats = max(1, int(args.megabytes * 1024 * 1024 / len(corpus)))
+    document = "\n".join([corpus] * repeats)
+    megabytes = len(document.encode("utf-8")) / (1024 * 1024)
+
+    start = time.perf_counter()
+    serial = lang_detect_word_sentence_counter(document)
+    serial_seconds = time.perf_counter() - start
+    print(f"document: {megabytes:,.1f} MB, serial result {serial}")
+    print(f"{'mode':<14}{'seconds':>10}{'MB/sec':>10}{'speed-up':>10}  exact")
+    print(
+        f"{'serial':<14}{serial_seconds:>10.2f}"
+        f"{megabytes / serial_seconds:>10.1f}{1:>10.2f}"
+    )
+
+    all_exact = True
+    for jobs in sorted(set(args.jobs)):
+        start = time.perf_counter()
+        result = score_large_document(document, jobs=jobs, piece_chars=args.piece_chars)
+        seconds = time.perf_counter() - start
+        all_exact &= result == serial
+        print(
+            f"{f'jobs={jobs}':<14}{seconds:>10.2f}{megabytes / seconds:>10.1f}"
+            f"{serial_seconds / seconds:>10.2f}  {result == serial}"
+        )
+    return 0 if all_exact else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Memory of the standard counter vs the memory-lean one (gofai_language_detect_lean).
+
+Two workloads from the bundled corpora, --repeats times:
+    batch      every line of the three bundled corpora, one document each,
+               scored in batches of --batch-documents
+    document   the wikipedia corpus as one document
+Each (counter, workload) runs in a fresh python process, which reports:
+    peak RSS growth   ru_maxrss while scoring, over ru_maxrss before
+    working peak      tracemalloc peak while scoring a batch, over the memory
+                      in use before it (a second, traced run); the largest
+    seconds           of the first (untraced) run
+and the results of both counters are checked to be exactly the same.
+
+use:
+    python3 benchmarks/benchmark_memory_lean.py
+    python3 benchmarks/benchmark_memory_lean.py --repeats 10
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gofai_language_detect_corpora import (  # noqa: E402
+    BUNDLED_CORPORA,
+    bundled_corpus_lines,
+    read_bundled_corpus,
+)
+from gofai_language_detect_lean import score_batch_lean  # noqa: E402
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter  # noqa: E402
+
+COUNTERS = {
+    "standard": lambda documents: [
+        lang_detect_word_sentence_counter(document) for document in documents
+    ],
+    "lean": score_batch_lean,
+}
+WORKLOADS = ("batch", "document")
+
+
+def load_workload(workload: str, repeats: int) -> list[str]:
+    if workload == "batch":
+        lines = [line for name in BUNDLED_CORPORA for line in bundled_corpus_lines(name)]
+        return lines * repeats
+    return ["\n".join([read_bundled_corpus("wikipedia_samples_text_doc")] * repeats)]
+
+
+def score_workload(counter, documents: list[str], batch_documents: int) -> list:
+    results = []
+    for start in range(0, len(documents), batch_documents):
+        results.extend(counter(documents[start : start + batch_documents]))
+    return results
+
+
+def working_peak(counter, documents: list[str], batch_documents: int) -> int:
+    """Largest tracemalloc peak of one batch, over the memory in use before it."""
+    largest_peak = 0
+    tracemalloc.start()
+    for start in range(0, len(documents), batch_documents):
+        tracemalloc.reset_peak()
+        in_use, _ = tracemalloc.get_traced_memory()
+        counter(documents[start : start + batch_documents])
+        _, peak = tracemalloc.get_traced_memory()
+        largest_peak = max(largest_peak, peak - in_use)
+    tracemalloc.stop()
+    return largest_peak
+
+
+def run_child(counter_name: str, workload: str, repeats: int, batch_documents: int):
+    """One measurement, in this (fresh) process: prints a json line."""
+    counter = COUNTERS[counter_name]
+    documents = load_workload(workload, repeats)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    results = score_workload(counter, documents, batch_documents)
+    seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(
+        json.dumps(
+            {
+                "documents": len(documents),
+                "chars": sum(map(len, documents)),
+                "seconds": seconds,
+                # ru_maxrss is in KiB on Linux
+                "rss_growth": (rss_after - rss_before) * 1024,
+                "working_peak": working_peak(counter, documents, batch_documents),
+                "results_hash": hash(tuple(results)),
+            }
+        )
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-documents", type=int, default=512)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child, args.repeats, args.batch_documents)
+        return 0
+
+    print(
+        f"{'workload':<10}{'counter':<10}{'seconds':>9}"
+        f"{'peak RSS growth':>17}{'working peak':>14}  exact"
+    )
+    all_exact = True
+    for workload in WORKLOADS:
+        measurements = {}
+        for counter_name in COUNTERS:
+            completed = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--repeats",
+                    str(args.repeats),
+                    "--batch-documents",
+                    str(args.batch_documents),
+                    "--child",
+                    counter_name,
+                    workload,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            measurements[counter_name] = json.loads(completed.stdout)
+
+        standard = measurements["standard"]
+        print(
+            f"{workload}: {standard['documents']:,} documents, "
+            f"{standard['chars']:,} chars"
+        )
+        for counter_name, measurement in measurements.items():
+            exact = measurement["results_hash"] == standard["results_hash"]
+            all_exact &= exact
+            print(
+                f"{'':<10}{counter_name:<10}{measurement['seconds']:>9.2f}"
+                f"{measurement['rss_growth'] / 2**20:>14.1f} MB"
+                f"{measurement['working_peak'] / 2**20:>11.2f} MB  {exact}"
+            )
+    return 0 if all_exact else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+"""
+Speed / accuracy frontier of the detector profiles.
+
+For each dataset and profile, reports:
+    docs/sec
+    decision agreement: same "has language" (sentences > 0) as standard
+    exact agreement: same (words, sentences) as standard
+    has-language: share of documents with sentences > 0
+
+use:
+    python3 benchmarks/benchmark_profiles.py
+    python3 benchmarks/benchmark_profiles.py --min-seconds 2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gofai_language_detect_corpora import (  # noqa: E402
+    bundled_corpus_lines,
+    bundled_test_cases,
+)
+from gofai_language_detect_v52 import (  # noqa: E402
+    DETECTOR_PROFILES,
+    lang_detect_word_sentence_counter,
+)
+
+
+def load_datasets() -> dict[str, list[str]]:
+    test_cases = bundled_test_cases()
+    return {
+        "valid test cases": test_cases["valid"],
+        "invalid test cases": test_cases["invalid"],
+        "clean_sentences_list": bundled_corpus_lines("clean_sentences_list"),
+        "sentences_list": bundled_corpus_lines("sentences_list"),
+        "wikipedia_samples lines": bundled_corpus_lines("wikipedia_samples_text_doc"),
+    }
+
+
+def time_profile(documents: list[str], profile: str, min_seconds: float) -> tuple:
+    """Returns (docs/sec, results), repeating the run for at least min_seconds."""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        results = [
+            lang_detect_word_sentence_counter(document, profile=profile)
+            for document in documents
+        ]
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return (runs * len(documents) / elapsed, results)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'dataset':<26}{'profile':<10}{'docs/sec':>12}"
+        f"{'decision agr.':>15}{'exact agr.':>12}{'has-language':>14}"
+    )
+    for dataset_name, documents in load_datasets().items():
+        measurements = {
+            profile: time_profile(documents, profile, args.min_seconds)
+            for profile in DETECTOR_PROFILES
+        }
+        standard_results = measurements["standard"][1]
+
+        for profile in DETECTOR_PROFILES:
+            docs_per_second, results = measurements[profile]
+            decision_agreement = sum(
+                (result[1] > 0) == (standard[1] > 0)
+                for result, standard in zip(results, standard_results)
+            ) / len(documents)
+            exact_agreement = sum(
+                result == standard for result, standard in zip(results, standard_results)
+            ) / len(documents)
+            has_language = sum(result[1] > 0 for result in results) / len(documents)
+            print(
+                f"{dataset_name:<26}{profile:<10}{docs_per_second:>12,.0f}"
+                f"{decision_agreement:>15.1%}{exact_agreement:>12.1%}{has_language:>14.1%}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
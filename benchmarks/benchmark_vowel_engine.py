@@ -0,0 +1,105 @@
+"""
+Per-word vowel counting vs the prefix-sum engine (gofai_language_detect_vowels).
+
+The document is the bundled wikipedia corpus (wikipedia_samples_text_doc.txt),
+repeated --repeats times. Times, over the standard pipeline's tokens:
+    vowel counts   per word (check_vowel_count_for_length()'s generator)
+                   vs token_vowel_counts()
+    word rules     is_valid_english_word() per word vs valid_word_mask()
+    pipeline       lang_detect_word_sentence_counter()
+                   vs lang_detect_word_sentence_counter_prefix_sums()
+with the stdlib engine, and the NumPy engine when NumPy is installed,
+and checks that every engine's results are exactly the per-word ones.
+
+use:
+    python3 benchmarks/benchmark_vowel_engine.py
+    python3 benchmarks/benchmark_vowel_engine.py --repeats 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gofai_language_detect_corpora import read_bundled_corpus  # noqa: E402
+from gofai_language_detect_v52 import (  # noqa: E402
+    ENGLISH_VOWELS,
+    is_valid_english_word,
+    lang_detect_word_sentence_counter,
+    sanitize_and_split_text,
+)
+from gofai_language_detect_vowels import (  # noqa: E402
+    lang_detect_word_sentence_counter_prefix_sums,
+    np,
+    token_vowel_counts,
+    valid_word_mask,
+)
+
+
+def best_seconds(function, rounds: int):
+    """(fastest of rounds runs, its result)."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return (best, result)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    corpus = read_bundled_corpus("wikipedia_samples_text_doc")
+    document = "\n".join([corpus] * args.repeats)
+    tokens = sanitize_and_split_text(" ".join(document.split()))
+    print(f"document: {len(document):,} chars, {len(tokens):,} tokens")
+
+    engines = [("stdlib", False)] + ([("numpy", True)] if np is not None else [])
+    comparisons = (
+        (
+            "vowel counts",
+            lambda: [
+                sum(1 for char in token.lower() if char in ENGLISH_VOWELS)
+                for token in tokens
+            ],
+            lambda use_numpy: token_vowel_counts(tokens, use_numpy),
+        ),
+        (
+            "word rules",
+            lambda: [is_valid_english_word(token) for token in tokens],
+            lambda use_numpy: valid_word_mask(tokens, use_numpy),
+        ),
+        (
+            "pipeline",
+            lambda: lang_detect_word_sentence_counter(document),
+            lambda use_numpy: lang_detect_word_sentence_counter_prefix_sums(
+                document, use_numpy
+            ),
+        ),
+    )
+
+    print(f"{'':<14}{'engine':<10}{'seconds':>10}{'speed-up':>10}  exact")
+    all_exact = True
+    for name, per_word, engine in comparisons:
+        per_word_seconds, expected = best_seconds(per_word, args.rounds)
+        print(f"{name:<14}{'per word':<10}{per_word_seconds:>10.3f}{1:>10.2f}")
+        for engine_name, use_numpy in engines:
+            seconds, result = best_seconds(lambda: engine(use_numpy), args.rounds)
+            all_exact &= result == expected
+            print(
+                f"{'':<14}{engine_name:<10}{seconds:>10.3f}"
+                f"{per_word_seconds / seconds:>10.2f}  {result == expected}"
+            )
+    if np is None:
+        print("numpy is not installed: stdlib engine only")
+    return 0 if all_exact else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+"""
+# Language-Detect: Arrow / Parquet batch scoring
+
+Optional integration: requires pyarrow in python env.
+
+Scores a pyarrow string column with lang_detect_word_sentence_counter()
+and returns two int32 columns, (words, sentences), ready to append
+to the table or record batch.
+
+Values are read straight from the Arrow string buffers
+(offsets + utf-8 data), one value at a time,
+without first converting the column to a python list,
+and scored as bytes (see lang_detect_word_sentence_counter_bytes),
+so ASCII values are never decoded.
+
+## Command line
+Rewrite a parquet file with the two new columns,
+streaming record batch by record batch (constant memory):
+
+    python3 gofai_language_detect_arrow.py input.parquet output.parquet --column BODY
+
+Null input values give null counts.
+"""
+
+import argparse
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pc = None
+    pq = None
+
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter_bytes
+
+WORDS_COLUMN_NAME = "lang_detect_words"
+SENTENCES_COLUMN_NAME = "lang_detect_sentences"
+DEFAULT_BATCH_SIZE = 8192
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError(
+            "pyarrow is required for Arrow/Parquet scoring: pip install pyarrow"
+        )
+
+
+def _score_string_chunk(chunk) -> tuple:
+    """
+    Scores one (non-chunked) pyarrow string or large_string array.
+
+    Reads the offsets and utf-8 data buffers directly,
+    so only one value is copied out at a time.
+    """
+    if not (pa.types.is_string(chunk.type) or pa.types.is_large_string(chunk.type)):
+        # e.g. string_view or dictionary-encoded strings
+        chunk = chunk.cast(pa.large_string())
+
+    n_values = len(chunk)
+    word_counts = array("i", bytes(4 * n_values))
+    sentence_counts = array("i", bytes(4 * n_values))
+
+    _, offsets_buffer, data_buffer = chunk.buffers()
+    offset_format = "i" if pa.types.is_string(chunk.type) else "q"
+    offsets = memoryview(offsets_buffer).cast("B").cast(offset_format)
+    data = memoryview(data_buffer) if data_buffer is not None else memoryview(b"")
+    base = chunk.offset
+
+    for index in range(n_values):
+        value_start = offsets[base + index]
+        value_end = offsets[base + index + 1]
+        if value_start == value_end:
+            continue  # empty (or null) value scores (0, 0)
+        words, sentences = lang_detect_word_sentence_counter_bytes(
+            data[value_start:value_end]
+        )
+        word_counts[index] = words
+        sentence_counts[index] = sentences
+
+    words_array = pa.Array.from_buffers(
+        pa.int32(), n_values, [None, pa.py_buffer(word_counts)]
+    )
+    sentences_array = pa.Array.from_buffers(
+        pa.int32(), n_values, [None, pa.py_buffer(sentence_counts)]
+    )
+
+    # Keep nulls as nulls, so they stay distinguishable from empty strings
+    if chunk.null_count:
+        is_valid = chunk.is_valid()
+        null_int32 = pa.scalar(None, pa.int32())
+        words_array = pc.if_else(is_valid, words_array, null_int32)
+        sentences_array = pc.if_else(is_valid, sentences_array, null_int32)
+
+    return (words_array, sentences_array)
+
+
+def score_arrow_string_column(column) -> tuple:
+    """
+    Scores every value of a pyarrow string column.
+
+    Args:
+        column: pyarrow Array or ChunkedArray of string/large_string
+            (other string-like types are cast to large_string).
+
+    Returns:
+        tuple: (words, sentences) int32 columns, same length as column.
+            ChunkedArray input gives ChunkedArray output (same chunking).
+    """
+    _require_pyarrow()
+
+    if isinstance(column, pa.ChunkedArray):
+        words_chunks = []
+        sentences_chunks = []
+        for chunk in column.chunks:
+            words_array, sentences_array = _score_string_chunk(chunk)
+            words_chunks.append(words_array)
+            sentences_chunks.append(sentences_array)
+        return (
+            pa.chunked_array(words_chunks, type=pa.int32()),
+            pa.chunked_array(sentences_chunks, type=pa.int32()),
+        )
+
+    return _score_string_chunk(column)
+
+
+def append_lang_detect_columns(batch, column_name: str):
+    """
+    Returns the record batch (or table) with the two count columns appended.
+
+    Args:
+        batch: pyarrow RecordBatch or Table.
+        column_name (str): Name of the string column to score.
+    """
+    _require_pyarrow()
+    words_array, sentences_array = score_arrow_string_column(batch.column(column_name))
+    batch = batch.append_column(WORDS_COLUMN_NAME, words_array)
+    return batch.append_column(SENTENCES_COLUMN_NAME, sentences_array)
+
+
+def rewrite_parquet_with_lang_detect_columns(
+    input_path: str,
+    output_path: str,
+    column_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Streams a parquet file batch by batch,
+    writing each batch with the two count columns appended.
+
+    Memory use is bounded by batch_size rows, not by file size.
+
+    Returns:
+        int: number of rows written
+    """
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(input_path)
+    schema = parquet_file.schema_arrow
+    output_schema = schema.append(pa.field(WORDS_COLUMN_NAME, pa.int32())).append(
+        pa.field(SENTENCES_COLUMN_NAME, pa.int32())
+    )
+
+    rows_written = 0
+    with pq.ParquetWriter(output_path, output_schema) as writer:
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            writer.write_batch(append_lang_detect_columns(batch, column_name))
+            rows_written += batch.num_rows
+    return rows_written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Add lang-detect word and sentence count columns to a parquet file."
+    )
+    parser.add_argument("input_path", help="parquet file to read")
+    parser.add_argument("output_path", help="parquet file to write")
+    parser.add_argument("--column", required=True, help="string column to score")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    rows_written = rewrite_parquet_with_lang_detect_columns(
+        args.input_path, args.output_path, args.column, args.batch_size
+    )
+    print(f"rows written -> {rows_written}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,685 @@
+"""
+# Language-Detect: batch scoring
+
+Shared by the parallel scoring entry points (server, command line):
+score many documents in one call (one task per batch, not per document),
+warm up a worker before its first real request,
+and score a stream of batches in parallel, in order, with bounded memory.
+
+## Size-aware scheduling
+SizeAwareScheduler balances a mix of tiny and huge documents:
+cost is estimated from document length, small documents are packed
+into tasks of about target_task_chars, and huge documents are split
+into about target_task_chars pieces at exact sentence cuts
+(see find_sentence_cut()), whose counts add up to the whole document's.
+
+## Intra-document parallel scoring
+score_large_document() scores one very large document on several cores:
+it is cut at whitespace into pieces of about piece_chars, whatever the
+sentences, and each piece is scored to a partial result
+(score_document_piece()). Sentences that straddle a cut are stitched
+from the tokens on both sides and rescored (merge_document_pieces()),
+so the totals are exactly the serial ones. Pieces are cut lazily, as
+workers take them; a long run without a sentence end is rescored serially.
+
+## Backends
+Workers are processes, or threads (backend="threads") that share the
+detector tables of this process with no copies and no pickling; the
+detector is thread safe (see "Thread safety" in gofai_language_detect_v52.py).
+Threads only scale on free-threaded (no GIL) CPython builds, so the
+default "auto" picks threads there and processes elsewhere.
+See benchmarks/benchmark_backends.py.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_v52 import (
+    lang_detect_word_sentence_counter,
+    lang_detect_word_sentence_counter_bytes,
+)
+
+# Scored once by each new worker, so its first request is not slower
+WARM_UP_TEXT = "Please reply to my request about the weather. It is on the way!"
+
+
+def score_document(
+    document: str | bytes,
+    profile: str = "standard",
+    prescreen: bool = False,
+) -> tuple[int, int]:
+    """
+    lang_detect_word_sentence_counter() for str,
+    or UTF-8 bytes (invalid bytes are replaced, not an error).
+    """
+    if isinstance(document, str):
+        return lang_detect_word_sentence_counter(document, profile, prescreen)
+    if profile == "standard" and not prescreen:
+        return lang_detect_word_sentence_counter_bytes(document, errors="replace")
+    return lang_detect_word_sentence_counter(
+        str(document, "utf-8", "replace"), profile, prescreen
+    )
+
+
+def score_batch(
+    documents: list[str | bytes],
+    profile: str = "standard",
+    prescreen: bool = False,
+) -> list[tuple[int, int]]:
+    """
+    Scores each document with score_document().
+
+    Args:
+        documents (list[str | bytes]): texts, or UTF-8 encoded texts, to score
+        profile (str): see DETECTOR_PROFILES
+        prescreen (bool): see lang_detect_word_sentence_counter()
+
+    Returns:
+        list[tuple[int, int]]: (words, sentences) per document, in order
+    """
+    return [score_document(document, profile, prescreen) for document in documents]
+
+
+def warm_worker(profile: str = "standard") -> int:
+    """
+    Worker initializer (or first task): the detector is imported
+    by this module, and scoring WARM_UP_TEXT once fills the caches.
+
+    Returns:
+        int: the worker's process id
+    """
+    lang_detect_word_sentence_counter(WARM_UP_TEXT, profile)
+    return os.getpid()
+
+
+# "auto": threads when the GIL is disabled, else processes
+EXECUTOR_BACKENDS = ("auto", "processes", "threads")
+
+
+def gil_enabled() -> bool:
+    """False only on a free-threaded CPython build running without the GIL."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """Returns "processes" or "threads" for one of EXECUTOR_BACKENDS."""
+    if backend == "auto":
+        return "processes" if gil_enabled() else "threads"
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, use one of {EXECUTOR_BACKENDS}")
+    return backend
+
+
+def make_executor(
+    jobs: int,
+    backend: str = "auto",
+    profile: str = "standard",
+) -> Executor:
+    """
+    A pool of jobs warm workers (see warm_worker()):
+    processes, or threads of this process (see resolve_backend()).
+    """
+    if resolve_backend(backend) == "threads":
+        return ThreadPoolExecutor(
+            max_workers=jobs, initializer=warm_worker, initargs=(profile,)
+        )
+    return ProcessPoolExecutor(
+        max_workers=jobs, initializer=warm_worker, initargs=(profile,)
+    )
+
+
+def worker_id() -> str:
+    """The calling worker, as "process id/thread id"."""
+    return f"{os.getpid()}/{threading.get_native_id()}"
+
+
+def iter_score_batches(
+    batches,
+    jobs: int = 1,
+    profile: str = "standard",
+    prescreen: bool = False,
+    max_in_flight: int | None = None,
+    backend: str = "auto",
+):
+    """
+    Scores an iterable of document batches, in parallel when jobs > 1.
+
+    Batches are read from the iterable only as workers free up,
+    so memory is bounded by max_in_flight batches however long the input.
+
+    Args:
+        batches (iterable of list[str | bytes]): e.g. from a file reader
+        jobs (int): workers; 1 scores in this thread
+        max_in_flight (int | None): most batches submitted and not yet
+            yielded, default 2 * jobs
+        backend (str): see EXECUTOR_BACKENDS
+
+    Yields:
+        list[tuple[int, int]]: the results of each batch, in input order
+    """
+    if jobs <= 1:
+        for batch in batches:
+            yield score_batch(batch, profile, prescreen)
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * jobs
+
+    executor = make_executor(jobs, backend, profile)
+    try:
+        pending: deque = deque()
+        for batch in batches:
+            pending.append(executor.submit(score_batch, batch, profile, prescreen))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # also when the consumer stops early (e.g. a closed output pipe)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Work per task, in characters; and fixed work per document, in characters
+DEFAULT_TARGET_TASK_CHARS = 256 * 1024
+DOCUMENT_COST_CHARS = 256
+# Documents over SPLIT_DOCUMENT_FACTOR tasks long are split
+SPLIT_DOCUMENT_FACTOR = 2
+
+# A whitespace-delimited run ending in sentence punctuation, and followed by
+# whitespace (a cut there never splits a run, nor a UTF-8 character)
+SENTENCE_CUT_CANDIDATE_RE = re.compile(r"\s(\S*[.!?])(?=\s)")
+SENTENCE_CUT_CANDIDATE_BYTES_RE = re.compile(rb"\s(\S*[.!?])(?=\s)")
+
+
+def _run_ends_sentence(run: str, profile: str) -> bool:
+    """
+    True if the last token of run closes a sentence in the detector:
+    a valid word (for the profile) ending in SENTENCE_ENDINGS,
+    that is not an abbreviation.
+    """
+    tokens = lang_detect.sanitize_and_split_text(" ".join(run.split()))
+    if not tokens:
+        return False
+    last_token = tokens[-1]
+    if last_token[-1] not in lang_detect.SENTENCE_ENDINGS:
+        return False
+    if profile == "strict":
+        is_word = lang_detect.is_strict_english_word(last_token)
+    else:
+        is_word = lang_detect.is_valid_english_word(last_token)
+    return is_word and not (
+        lang_detect.TOKEN_CATEGORY_FLAGS.get(last_token.lower(), 0)
+        & lang_detect.CATEGORY_ABBREVIATION
+    )
+
+
+def find_sentence_cut(
+    document: str | bytes,
+    start: int,
+    profile: str = "standard",
+) -> int | None:
+    """
+    Finds the first exact cut position after start:
+    the whitespace right after a token that closes a sentence.
+
+    Cut there, the (words, sentences) of the two parts add up to those
+    of the whole document, under every detector profile:
+    no word is split, and the sentence in progress is empty at the cut.
+
+    Args:
+        document (str | bytes): text, or UTF-8 encoded text
+        start (int): position to search from
+
+    Returns:
+        int | None: cut position, or None if there is none after start
+    """
+    if isinstance(document, str):
+        candidate_re = SENTENCE_CUT_CANDIDATE_RE
+    else:
+        candidate_re = SENTENCE_CUT_CANDIDATE_BYTES_RE
+
+    position = start
+    while True:
+        match = candidate_re.search(document, position)
+        if match is None:
+            return None
+        run = match.group(1)
+        if not isinstance(run, str):
+            run = str(run, "utf-8", "replace")
+        if _run_ends_sentence(run, profile):
+            return match.end(1)
+        position = match.end(1)
+
+
+def split_document_at_sentences(
+    document: str | bytes,
+    piece_chars: int,
+    profile: str = "standard",
+) -> list:
+    """
+    Splits document into pieces of at least piece_chars (except the last),
+    at exact sentence cuts (see find_sentence_cut()).
+
+    A document with no sentence cut stays one piece.
+    """
+    pieces = []
+    piece_start = 0
+    while len(document) - piece_start > piece_chars:
+        cut = find_sentence_cut(document, piece_start + piece_chars, profile)
+        if cut is None:
+            break
+        pieces.append(document[piece_start:cut])
+        piece_start = cut
+    pieces.append(document[piece_start:])
+    return pieces
+
+
+def score_task(
+    documents: list[str | bytes],
+    profile: str = "standard",
+    prescreen: bool = False,
+) -> tuple[int, float, list[tuple[int, int]]]:
+    """
+    score_batch(), timed.
+
+    Returns:
+        tuple: (worker_id(), busy seconds, results)
+    """
+    started = time.perf_counter()
+    results = score_batch(documents, profile, prescreen)
+    return (worker_id(), time.perf_counter() - started, results)
+
+
+def _document_text(document: str | bytes) -> str:
+    return document if isinstance(document, str) else str(document, "utf-8", "replace")
+
+
+class SizeAwareScheduler:
+    """
+    Parallel scoring that keeps every worker busy with
+    similar-sized tasks, whatever the mix of document sizes.
+
+    Args:
+        jobs (int): workers; 1 scores in this thread
+        target_task_chars (int): estimated work per task, in characters
+        split_document_chars (int | None): documents longer than this are
+            split at sentence cuts, default SPLIT_DOCUMENT_FACTOR tasks
+        profile (str), prescreen (bool): see lang_detect_word_sentence_counter().
+            A split document is prescreened whole, before splitting.
+        max_task_documents (int | None): most documents packed in one task
+        max_in_flight (int | None): most tasks submitted at once,
+            default 4 * jobs
+        backend (str): see EXECUTOR_BACKENDS
+
+    Example:
+        >>> scheduler = SizeAwareScheduler(jobs=4)
+        >>> results = scheduler.score(documents)  # in input order
+        >>> scheduler.stats()["workers"]          # per-worker utilisation
+    """
+
+    def __init__(
+        self,
+        jobs: int = 1,
+        target_task_chars: int = DEFAULT_TARGET_TASK_CHARS,
+        split_document_chars: int | None = None,
+        profile: str = "standard",
+        prescreen: bool = False,
+        max_task_documents: int | None = None,
+        max_in_flight: int | None = None,
+        backend: str = "auto",
+    ):
+        self.jobs = jobs
+        self.target_task_chars = target_task_chars
+        self.split_document_chars = split_document_chars or (
+            SPLIT_DOCUMENT_FACTOR * target_task_chars
+        )
+        self.profile = profile
+        self.prescreen = prescreen
+        self.max_task_documents = max_task_documents
+        self.max_in_flight = max_in_flight or 4 * max(1, jobs)
+        self.backend = resolve_backend(backend)
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._counters = {
+            "documents": 0,
+            "split_documents": 0,
+            "pieces": 0,
+            "tasks": 0,
+        }
+        # {worker_id(): {"tasks", "pieces", "chars", "busy_seconds"}}
+        self._workers: dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._finished: float | None = None
+
+    def _iter_tasks(self, documents, document_states: dict):
+        """
+        Yields tasks (document indexes, pieces, prescreen), registering
+        each document in document_states as [words, sentences, pieces left].
+        """
+        task_indexes: list[int] = []
+        task_pieces: list = []
+        task_cost = 0
+
+        for index, document in enumerate(documents):
+            self._counters["documents"] += 1
+            if len(document) <= self.split_document_chars:
+                document_states[index] = [0, 0, 1]
+                task_indexes.append(index)
+                task_pieces.append(document)
+                task_cost += len(document) + DOCUMENT_COST_CHARS
+                if task_cost >= self.target_task_chars or (
+                    len(task_pieces) == self.max_task_documents
+                ):
+                    yield (task_indexes, task_pieces, self.prescreen)
+                    task_indexes, task_pieces, task_cost = [], [], 0
+                continue
+
+            # Huge document: prescreen whole, then split into its own tasks
+            if self.prescreen and not lang_detect.prescreen_text_for_language(
+                _document_text(document)
+            ):
+                document_states[index] = [0, 0, 0]
+                continue
+            pieces = split_document_at_sentences(
+                document, self.target_task_chars, self.profile
+            )
+            document_states[index] = [0, 0, len(pieces)]
+            self._counters["split_documents"] += len(pieces) > 1
+            for piece in pieces:
+                yield ([index], [piece], False)
+
+        if task_pieces:
+            yield (task_indexes, task_pieces, self.prescreen)
+
+    def _record_task(self, task: tuple, outcome: tuple, document_states: dict) -> None:
+        task_indexes, task_pieces, _ = task
+        task_worker_id, busy_seconds, results = outcome
+
+        worker = self._workers.setdefault(
+            task_worker_id, {"tasks": 0, "pieces": 0, "chars": 0, "busy_seconds": 0.0}
+        )
+        worker["tasks"] += 1
+        worker["pieces"] += len(task_pieces)
+        worker["chars"] += sum(len(piece) for piece in task_pieces)
+        worker["busy_seconds"] += busy_seconds
+        self._counters["tasks"] += 1
+        self._counters["pieces"] += len(task_pieces)
+
+        for index, (words, sentences) in zip(task_indexes, results):
+            state = document_states[index]
+            state[0] += words
+            state[1] += sentences
+            state[2] -= 1
+
+    def iter_score(self, documents):
+        """
+        Scores an iterable of documents (str or UTF-8 bytes).
+
+        Yields:
+            tuple[int, int]: (words, sentences) per document, in input order
+        """
+        self._reset_stats()
+        # {document index: [words, sentences, pieces left]}, until yielded
+        document_states: dict[int, list[int]] = {}
+        next_index = 0
+        tasks = self._iter_tasks(documents, document_states)
+
+        def iter_ready():
+            nonlocal next_index
+            while next_index in document_states and document_states[next_index][2] == 0:
+                words, sentences, _ = document_states.pop(next_index)
+                next_index += 1
+                yield (words, sentences)
+
+        if self.jobs <= 1:
+            for task in tasks:
+                outcome = score_task(task[1], self.profile, task[2])
+                self._record_task(task, outcome, document_states)
+                yield from iter_ready()
+            yield from iter_ready()
+            self._finished = time.perf_counter()
+            return
+
+        executor = make_executor(self.jobs, self.backend, self.profile)
+        try:
+            in_flight: dict = {}
+            tasks_left = True
+            while True:
+                while tasks_left and len(in_flight) < self.max_in_flight:
+                    task = next(tasks, None)
+                    if task is None:
+                        tasks_left = False
+                        break
+                    future = executor.submit(score_task, task[1], self.profile, task[2])
+                    in_flight[future] = task
+                yield from iter_ready()
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    self._record_task(task, future.result(), document_states)
+                yield from iter_ready()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._finished = time.perf_counter()
+
+    def score(self, documents) -> list[tuple[int, int]]:
+        """iter_score() as a list."""
+        return list(self.iter_score(documents))
+
+    def stats(self) -> dict:
+        """
+        Counters of the last (or current) run, and per-worker utilisation:
+        busy seconds / wall seconds of the run.
+        """
+        wall_seconds = (self._finished or time.perf_counter()) - self._started
+        workers = {}
+        for task_worker_id, worker in sorted(self._workers.items()):
+            workers[task_worker_id] = dict(worker)
+            workers[task_worker_id]["utilisation"] = (
+                worker["busy_seconds"] / wall_seconds if wall_seconds > 0 else 0.0
+            )
+        stats = dict(self._counters)
+        stats["wall_seconds"] = wall_seconds
+        stats["workers"] = workers
+        return stats
+
+
+# Intra-document pieces, in characters
+DEFAULT_PIECE_CHARS = 4 * 1024 * 1024
+
+WHITESPACE_RE = re.compile(r"\s")
+WHITESPACE_BYTES_RE = re.compile(rb"\s")
+
+
+def iter_split_document_at_whitespace(document: str | bytes, piece_chars: int):
+    """
+    Yields the pieces of split_document_at_whitespace() one at a time,
+    so that only the pieces being scored are copies of the document.
+    """
+    whitespace_re = WHITESPACE_RE if isinstance(document, str) else WHITESPACE_BYTES_RE
+    piece_start = 0
+    while len(document) - piece_start > piece_chars:
+        match = whitespace_re.search(document, piece_start + piece_chars)
+        if match is None:
+            break
+        yield document[piece_start : match.start()]
+        piece_start = match.start()
+    yield document[piece_start:]
+
+
+def split_document_at_whitespace(document: str | bytes, piece_chars: int) -> list:
+    """
+    Splits document into pieces of at least piece_chars (except the last),
+    each cut at the first whitespace after piece_chars:
+    no token is split, nor (for bytes) a UTF-8 character.
+    """
+    return list(iter_split_document_at_whitespace(document, piece_chars))
+
+
+def _sentence_tokens(text: str, profile: str) -> list[str]:
+    """The tokens the profile splits into sentences (valid words, or raw tokens)."""
+    if profile == "fast":
+        return text.split()
+    if profile == "strict":
+        is_word = lang_detect.is_strict_english_word
+    elif profile == "standard":
+        is_word = lang_detect.is_valid_english_word
+    else:
+        raise ValueError(
+            f"unknown profile {profile!r}, use one of {lang_detect.DETECTOR_PROFILES}"
+        )
+    tokens = lang_detect.sanitize_and_split_text(" ".join(text.split()))
+    return [token for token in tokens if is_word(token)]
+
+
+def _closes_sentence(token: str, profile: str) -> bool:
+    if token[-1:] not in lang_detect.SENTENCE_ENDINGS:
+        return False
+    return profile == "fast" or not (
+        lang_detect.TOKEN_CATEGORY_FLAGS.get(token.lower(), 0)
+        & lang_detect.CATEGORY_ABBREVIATION
+    )
+
+
+def count_token_sentences(tokens: list[str], profile: str = "standard") -> int:
+    """
+    Sentences the profile accepts in a list of its sentence tokens
+    (see score_document_piece()).
+    """
+    if profile == "fast":
+        return lang_detect.lang_detect_word_sentence_counter_fast(" ".join(tokens))[1]
+    return len(lang_detect.split_wordlist_into_sentences_and_filter(tokens))
+
+
+def score_document_piece(piece: str | bytes, profile: str = "standard") -> tuple:
+    """
+    Partial result of one piece of a document cut at whitespace.
+
+    Returns:
+        tuple: (words, sentences, closed, head, tail)
+            - words: valid words of the piece
+            - sentences: accepted sentences that start and end in the piece
+            - closed: True if a sentence ends in the piece
+            - head: tokens up to the first sentence end (all tokens if not closed),
+              which complete the sentence left open by the pieces before
+            - tail: tokens after the last sentence end, left open
+    """
+    text = piece if isinstance(piece, str) else str(piece, "utf-8", "replace")
+    tokens = _sentence_tokens(text, profile)
+    if profile == "fast":
+        words = lang_detect.lang_detect_word_sentence_counter_fast(text)[0]
+    else:
+        words = len(tokens)
+
+    ends = [
+        index for index, token in enumerate(tokens) if _closes_sentence(token, profile)
+    ]
+    if not ends:
+        return (words, 0, False, tokens, [])
+    first_end, last_end = ends[0], ends[-1]
+    sentences = count_token_sentences(tokens[first_end + 1 : last_end + 1], profile)
+    return (words, sentences, True, tokens[: first_end + 1], tokens[last_end + 1 :])
+
+
+def merge_document_pieces(piece_results, profile: str = "standard") -> tuple[int, int]:
+    """
+    Merges the score_document_piece() results of a document's pieces, in order,
+    rescoring each sentence that straddles a cut from its stitched tokens.
+
+    Returns:
+        tuple[int, int]: (words, sentences), as for the whole document
+    """
+    words = 0
+    sentences = 0
+    open_tokens: list[str] = []
+    for piece_words, piece_sentences, closed, head, tail in piece_results:
+        words += piece_words
+        open_tokens.extend(head)
+        if closed:
+            sentences += count_token_sentences(open_tokens, profile) + piece_sentences
+            open_tokens = list(tail)
+    if open_tokens:
+        sentences += count_token_sentences(open_tokens, profile)
+    return (words, sentences)
+
+
+def score_large_document(
+    document: str | bytes,
+    jobs: int = 1,
+    piece_chars: int = DEFAULT_PIECE_CHARS,
+    profile: str = "standard",
+    prescreen: bool = False,
+    max_in_flight: int | None = None,
+    backend: str = "auto",
+) -> tuple[int, int]:
+    """
+    score_document() for one very large document, on jobs workers.
+
+    Args:
+        document (str | bytes): text, or UTF-8 encoded text
+        jobs (int): workers; 1 scores the pieces in this thread
+        piece_chars (int): characters per piece (see split_document_at_whitespace())
+        profile (str), prescreen (bool): see lang_detect_word_sentence_counter().
+            The prescreen looks at the whole document.
+        max_in_flight (int | None): most pieces submitted at once, default 2 * jobs
+        backend (str): see EXECUTOR_BACKENDS
+
+    Returns:
+        tuple[int, int]: (words, sentences), exactly the serial result
+
+    Memory: pieces are cut as they are submitted, so at most max_in_flight
+    of them are copies of the document at once. The sentence left open at
+    a cut travels back to this thread as tokens (see score_document_piece()),
+    and is rescored here once it closes: the cost of that step grows with
+    the longest run of the document without a sentence end. A document
+    with no sentence end at all is therefore tokenized in parallel but
+    counted serially, with all its tokens held here; bound such input
+    with score_document_guarded() (gofai_language_detect_guards.py).
+
+    Example:
+        >>> with open("export.txt", "rb") as export_file:
+        ...     score_large_document(export_file.read(), jobs=8)
+    """
+    if prescreen and not lang_detect.prescreen_text_for_language(
+        _document_text(document)
+    ):
+        return (0, 0)
+
+    pieces = iter_split_document_at_whitespace(document, piece_chars)
+    if jobs <= 1 or len(document) <= piece_chars:
+        return merge_document_pieces(
+            (score_document_piece(piece, profile) for piece in pieces), profile
+        )
+
+    max_in_flight = max_in_flight or 2 * jobs
+    executor = make_executor(jobs, backend, profile)
+
+    def iter_piece_results():
+        in_flight: deque = deque()
+        for piece in pieces:
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+            in_flight.append(executor.submit(score_document_piece, piece, profile))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    try:
+        return merge_document_pieces(iter_piece_results(), profile)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,307 @@
+"""
+# Language-Detect: corpus calibration
+
+One streaming pass over a corpus (one sentence per line,
+as in clean_sentences_list.txt) collects everything
+the detector's empirical settings are based on:
+
+1. word-length x vowel-count cells (distinct words per cell),
+   as in quantized_vowel_analyzer_v7.py
+2. stopwords per sentence, as in stopstat_v1.py / combostat_v1.py
+3. verbs/prepositions per sentence
+4. words per sentence (sentence length quantiles), as in sentence_stats.py
+
+Each line is read once; per-word work is done once per distinct word,
+at the end, not once per (length, N) pair.
+
+Files are cut into byte ranges (on line boundaries)
+that are scanned in parallel and merged, so multi-GB corpora
+only cost memory for the counters. A compressed file (.gz, .bz2, .xz,
+.zst) is one range, decompressed in a background thread as it is
+scanned (see gofai_language_detect_compression).
+
+The result is a detector config (json),
+loadable with gofai_language_detect_v52.load_detector_config()
+
+## Command line
+    python3 gofai_language_detect_calibrate.py clean_sentences_list.txt --jobs 8 --output detector_config.json
+"""
+
+import argparse
+import json
+import os
+import re
+import string
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from gofai_language_detect_compression import is_compressed, open_input
+from gofai_language_detect_v52 import (
+    ENGLISH_VOWELS,
+    LEN_TO_N_VOWELS,
+    NLTK_STOPWORDS_SET,
+    VERB_AND_PREPOS_TERMS_SET,
+)
+
+# Letters-only words, as the vowel analyzer's r'\b[a-zA-Z]+\b' (any alphabet)
+CALIBRATION_WORD_RE = re.compile(r"\b[^\W\d_]+\b")
+PUNCTUATION_DELETE_TABLE = str.maketrans("", "", string.punctuation)
+
+# How many distinct words a (length, vowels) cell needs to be kept;
+# e.g. 2 obscure words do not represent a meaningful class of words
+MIN_WORD_COUNT_THRESHOLD = 5
+# Zero-vowel "words" are mostly not-words (see vowel analyzer notes)
+MIN_VOWELS_PER_WORD = 1
+# Longer words use the rules for this length (see check_vowel_count_for_length)
+MAX_CALIBRATED_WORD_LENGTH = max(LEN_TO_N_VOWELS.keys())
+
+# Quantiles used for the sentence thresholds
+LOW_QUANTILE = 0.05  # minimum stopwords / verbs-prepositions per sentence
+SPLIT_QUANTILE = 0.75  # SPLIT_SENTENCES_ON_N_WORDS
+MAX_QUANTILE = 0.99  # MAX_WORDS_PER_SENTENCE
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def new_corpus_stats() -> dict:
+    """
+    Returns empty calibration counters:
+        word_counts: Counter {word: occurrences}
+        words_per_sentence: Counter {word count: sentences}
+        stopwords_per_sentence: Counter {stopword count: sentences}
+        verb_prepos_per_sentence: Counter {verb/preposition count: sentences}
+    """
+    return {
+        "word_counts": Counter(),
+        "words_per_sentence": Counter(),
+        "stopwords_per_sentence": Counter(),
+        "verb_prepos_per_sentence": Counter(),
+    }
+
+
+def update_corpus_stats(
+    stats: dict,
+    sentence: str,
+    stopwords: set[str] | frozenset[str] = NLTK_STOPWORDS_SET,
+    verb_prepos_terms: set[str] | frozenset[str] = VERB_AND_PREPOS_TERMS_SET,
+) -> None:
+    """
+    Adds one sentence (one corpus line) to stats, in place.
+    Blank lines are skipped.
+    """
+    sentence = sentence.strip().lower()
+    if not sentence:
+        return
+
+    stats["word_counts"].update(CALIBRATION_WORD_RE.findall(sentence))
+
+    sentence_words = sentence.translate(PUNCTUATION_DELETE_TABLE).split()
+    if not sentence_words:
+        return
+    stats["words_per_sentence"][len(sentence_words)] += 1
+    stats["stopwords_per_sentence"][
+        sum(1 for word in sentence_words if word in stopwords)
+    ] += 1
+    stats["verb_prepos_per_sentence"][
+        sum(1 for word in sentence_words if word in verb_prepos_terms)
+    ] += 1
+
+
+def merge_corpus_stats(stats: dict, other_stats: dict) -> dict:
+    """Adds the counters of other_stats into stats (in place) and returns stats."""
+    for key, counter in other_stats.items():
+        stats[key].update(counter)
+    return stats
+
+
+def scan_corpus_range(path: str, start: int, end: int | None) -> dict:
+    """
+    Scans the lines of path whose first byte is in [start, end).
+
+    A line that starts before start belongs to the previous range,
+    so ranges can be cut anywhere and still cover every line once.
+    end None scans the whole (decompressed) file.
+    """
+    stats = new_corpus_stats()
+    if end is None:
+        with open_input(path) as corpus_file:
+            for line in corpus_file:
+                update_corpus_stats(stats, line.decode("utf-8", errors="replace"))
+        return stats
+
+    with open(path, "rb") as corpus_file:
+        if start > 0:
+            corpus_file.seek(start - 1)
+            corpus_file.readline()  # finish the line owned by the previous range
+        position = corpus_file.tell()
+        while position < end:
+            line = corpus_file.readline()
+            if not line:
+                break
+            position += len(line)
+            update_corpus_stats(stats, line.decode("utf-8", errors="replace"))
+    return stats
+
+
+def iter_corpus_ranges(paths: list[str], chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Yields (path, start, end) byte ranges covering every file in paths;
+    (path, 0, None) for a compressed file.
+    """
+    for path in paths:
+        if is_compressed(path):
+            yield (path, 0, None)
+            continue
+        file_size = os.path.getsize(path)
+        for start in range(0, max(file_size, 1), chunk_bytes):
+            yield (path, start, min(start + chunk_bytes, file_size))
+
+
+def _scan_corpus_range_args(args: tuple) -> dict:
+    return scan_corpus_range(*args)
+
+
+def scan_corpus(
+    paths: list[str],
+    jobs: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> dict:
+    """
+    Scans all files once, in parallel byte ranges when jobs > 1,
+    and returns the merged stats (see new_corpus_stats()).
+    """
+    ranges = list(iter_corpus_ranges(paths, chunk_bytes))
+    stats = new_corpus_stats()
+
+    if jobs <= 1 or len(ranges) <= 1:
+        for corpus_range in ranges:
+            merge_corpus_stats(stats, scan_corpus_range(*corpus_range))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for range_stats in executor.map(_scan_corpus_range_args, ranges):
+            merge_corpus_stats(stats, range_stats)
+    return stats
+
+
+def length_vowel_histogram(
+    word_counts: Counter,
+    vowels: set[str] | frozenset[str] = ENGLISH_VOWELS,
+) -> Counter:
+    """
+    Returns Counter {(word length, vowel count): distinct words},
+    computed once per distinct word.
+    """
+    histogram: Counter = Counter()
+    for word in word_counts:
+        vowel_count = sum(1 for char in word if char in vowels)
+        histogram[(len(word), vowel_count)] += 1
+    return histogram
+
+
+def histogram_quantile(histogram: Counter, quantile: float) -> int:
+    """
+    Returns the smallest value v with at least quantile of the
+    observations <= v, from a Counter {integer value: observations}.
+    """
+    total = sum(histogram.values())
+    if not total:
+        raise ValueError("empty histogram")
+    running_total = 0
+    for value in sorted(histogram):
+        running_total += histogram[value]
+        if running_total >= quantile * total:
+            return value
+    return max(histogram)
+
+
+def calibrate_detector_config(
+    stats: dict,
+    vowels: set[str] | frozenset[str] = ENGLISH_VOWELS,
+    min_word_count: int = MIN_WORD_COUNT_THRESHOLD,
+    min_vowels: int = MIN_VOWELS_PER_WORD,
+    max_word_length: int = MAX_CALIBRATED_WORD_LENGTH,
+) -> dict:
+    """
+    Turns corpus stats into a detector config.
+
+    Returns:
+        dict: settings named as the detector's constants
+            (LEN_TO_N_VOWELS, MIN_NLTK_STOPWORDS_PER_SENTENCE, ...),
+            plus a "_calibration" report (ignored by the loader).
+    """
+    histogram = length_vowel_histogram(stats["word_counts"], vowels)
+
+    len_to_n_vowels: dict[int, list[int]] = {}
+    for (word_length, vowel_count), distinct_words in sorted(histogram.items()):
+        if (
+            2 <= word_length <= max_word_length
+            and vowel_count >= min_vowels
+            and distinct_words >= min_word_count
+        ):
+            len_to_n_vowels.setdefault(word_length, []).append(vowel_count)
+
+    if not stats["words_per_sentence"]:
+        raise ValueError("no sentences found in corpus")
+
+    words_per_sentence = stats["words_per_sentence"]
+    config = {
+        "LEN_TO_N_VOWELS": {
+            str(word_length): vowel_counts
+            for word_length, vowel_counts in len_to_n_vowels.items()
+        },
+        "MIN_NLTK_STOPWORDS_PER_SENTENCE": max(
+            1, histogram_quantile(stats["stopwords_per_sentence"], LOW_QUANTILE)
+        ),
+        "MIN_VERBS_PREPOSITIONS_PER_SENTENCE": max(
+            1, histogram_quantile(stats["verb_prepos_per_sentence"], LOW_QUANTILE)
+        ),
+        "SPLIT_SENTENCES_ON_N_WORDS": histogram_quantile(
+            words_per_sentence, SPLIT_QUANTILE
+        ),
+        "MAX_WORDS_PER_SENTENCE": histogram_quantile(words_per_sentence, MAX_QUANTILE),
+        "_calibration": {
+            "sentences": sum(words_per_sentence.values()),
+            "words": sum(stats["word_counts"].values()),
+            "distinct_words": len(stats["word_counts"]),
+            "words_per_sentence_quantiles": {
+                str(quantile): histogram_quantile(words_per_sentence, quantile)
+                for quantile in (0.05, 0.25, 0.5, 0.75, 0.99)
+            },
+            "length_vowel_cells": {
+                f"{word_length},{vowel_count}": distinct_words
+                for (word_length, vowel_count), distinct_words in sorted(
+                    histogram.items()
+                )
+                if word_length <= max_word_length
+            },
+        },
+    }
+    return config
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Calibrate lang-detect settings from a one-sentence-per-line corpus."
+    )
+    parser.add_argument("paths", nargs="+", help="corpus text files")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-bytes", type=int, default=DEFAULT_CHUNK_BYTES)
+    parser.add_argument("--min-word-count", type=int, default=MIN_WORD_COUNT_THRESHOLD)
+    parser.add_argument("--output", default="-", help="config json path (- for stdout)")
+    args = parser.parse_args(argv)
+
+    stats = scan_corpus(args.paths, jobs=args.jobs, chunk_bytes=args.chunk_bytes)
+    config = calibrate_detector_config(stats, min_word_count=args.min_word_count)
+    config_json = json.dumps(config, indent=2)
+
+    if args.output == "-":
+        print(config_json)
+    else:
+        with open(args.output, "w", encoding="utf-8") as config_file:
+            config_file.write(config_json + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
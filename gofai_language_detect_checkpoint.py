@@ -0,0 +1,336 @@
+"""
+# Language-Detect: checkpointed batch runner
+
+Scores one large input file into a compact binary results file,
+and resumes exactly where it stopped after a crash or a time limit:
+no row is scored twice or lost.
+
+## Results file
+Fixed-width little-endian records, struct RESULT_RECORD_FORMAT "<qii":
+    doc_id (int64: document index in the input, from 0),
+    words (int32), sentences (int32)
+16 bytes per document, in input order. Read it with read_results(),
+or as a numpy memmap with load_results_array().
+
+## Checkpoints
+<results>.checkpoint.json holds the rows committed so far and the input
+byte offset just after the last of their documents. Every checkpoint_rows
+rows (or checkpoint_seconds), the buffered results are written and
+fsync-ed, then the checkpoint is written to a temporary file, fsync-ed and
+renamed over the old one: durability costs one fsync pair per checkpoint,
+not one per row. On resume, the results file is truncated to the
+committed rows (dropping any rows written after the last checkpoint)
+and the input is read from the committed offset.
+
+## Command line
+    python3 gofai_language_detect_checkpoint.py corpus.txt scores.bin --jobs 8
+    # after a crash, the same command resumes
+    python3 gofai_language_detect_checkpoint.py mail.jsonl scores.bin --split jsonl \
+        --field body
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from collections import deque
+
+from gofai_language_detect_batch import (
+    DEFAULT_TARGET_TASK_CHARS,
+    EXECUTOR_BACKENDS,
+    SizeAwareScheduler,
+)
+from gofai_language_detect_cli import iter_split_chunks, parse_jsonl_document
+from gofai_language_detect_v52 import DETECTOR_PROFILES
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+RESULT_RECORD_FORMAT = "<qii"
+RESULT_RECORD = struct.Struct(RESULT_RECORD_FORMAT)
+RESULT_RECORD_SIZE = RESULT_RECORD.size
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+DEFAULT_CHECKPOINT_ROWS = 100_000
+DEFAULT_CHECKPOINT_SECONDS = 30.0
+
+CHECKPOINT_SPLIT_MODES = ("line", "nul", "jsonl")
+
+# Settings that must be the same to resume a run
+RUN_SETTINGS_KEYS = ("input", "split", "field", "profile", "prescreen")
+
+
+def checkpoint_path_for(results_path: str) -> str:
+    return results_path + CHECKPOINT_SUFFIX
+
+
+def iter_documents_with_offsets(binary_file, split: str, field: str = "text"):
+    """
+    Yields (document, input offset just after it) from the current
+    position of a binary file; the same documents as the command line
+    scorer's --split modes (see iter_source_documents()).
+    """
+    offset = binary_file.tell()
+    if split == "line":
+        for line in binary_file:
+            offset += len(line)
+            yield (line.rstrip(b"\r\n"), offset)
+    elif split == "nul":
+        for document in iter_split_chunks(binary_file, b"\0"):
+            offset += len(document)
+            # the NUL after it: read, unless this is an unterminated last document
+            if binary_file.tell() > offset:
+                offset += 1
+            yield (document, offset)
+    elif split == "jsonl":
+        for line in binary_file:
+            offset += len(line)
+            if not line.strip():
+                continue
+            yield (parse_jsonl_document(line, field, None)[0], offset)
+    else:
+        raise ValueError(f"unknown split {split!r}, use one of {CHECKPOINT_SPLIT_MODES}")
+
+
+def read_checkpoint(results_path: str) -> dict | None:
+    """The last committed checkpoint of results_path, or None."""
+    try:
+        with open(checkpoint_path_for(results_path), encoding="utf-8") as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(results_path: str, checkpoint: dict) -> None:
+    """Replaces the checkpoint atomically: temporary file, fsync, rename."""
+    checkpoint_path = checkpoint_path_for(results_path)
+    temporary_path = checkpoint_path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, checkpoint_path)
+    # the rename itself is durable once the directory is synced
+    if hasattr(os, "O_DIRECTORY"):
+        directory_fd = os.open(os.path.dirname(checkpoint_path) or ".", os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+
+def run_checkpointed(
+    input_path: str,
+    results_path: str,
+    split: str = "line",
+    field: str = "text",
+    jobs: int = 1,
+    profile: str = "standard",
+    prescreen: bool = False,
+    checkpoint_rows: int = DEFAULT_CHECKPOINT_ROWS,
+    checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+    max_rows: int | None = None,
+    target_task_chars: int = DEFAULT_TARGET_TASK_CHARS,
+    backend: str = "auto",
+) -> dict:
+    """
+    Scores input_path into results_path, resuming from its checkpoint if any.
+
+    Args:
+        split (str), field (str): see CHECKPOINT_SPLIT_MODES
+        jobs, profile, prescreen, target_task_chars, backend: see SizeAwareScheduler
+        checkpoint_rows (int), checkpoint_seconds (float): commit results
+            after this many rows, or this long, whichever comes first
+        max_rows (int | None): stop (committed) after this many rows
+            in this run, e.g. to time-box a run; the next run resumes
+
+    Returns:
+        dict: {"rows": committed rows, "resumed_from": rows at start,
+               "checkpoints": checkpoints written, "done": True at end of input}
+
+    Raises:
+        ValueError: when the checkpoint is from a run with other settings
+        FileExistsError: when results_path exists with no checkpoint
+    """
+    settings = {
+        "input": os.path.abspath(input_path),
+        "split": split,
+        "field": field,
+        "profile": profile,
+        "prescreen": prescreen,
+    }
+    checkpoint = read_checkpoint(results_path)
+    if checkpoint is None:
+        if os.path.exists(results_path):
+            raise FileExistsError(f"{results_path!r} exists and has no checkpoint")
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "record_format": RESULT_RECORD_FORMAT,
+            **settings,
+            "rows": 0,
+            "input_offset": 0,
+            "done": False,
+        }
+        # before the results file exists, so a crash at any point can resume
+        write_checkpoint(results_path, checkpoint)
+    else:
+        changed = [
+            key for key in RUN_SETTINGS_KEYS if checkpoint.get(key) != settings[key]
+        ]
+        if changed:
+            raise ValueError(f"checkpoint was written with other settings: {changed}")
+
+    summary = {
+        "rows": checkpoint["rows"],
+        "resumed_from": checkpoint["rows"],
+        "checkpoints": 0,
+        "done": checkpoint["done"],
+    }
+    if checkpoint["done"]:
+        return summary
+
+    scheduler = SizeAwareScheduler(
+        jobs=jobs,
+        target_task_chars=target_task_chars,
+        profile=profile,
+        prescreen=prescreen,
+        backend=backend,
+    )
+
+    with open(input_path, "rb") as input_file, open(
+        results_path, "r+b" if os.path.exists(results_path) else "w+b"
+    ) as results_file:
+        # Rows after the last checkpoint were not committed: drop them
+        results_file.truncate(checkpoint["rows"] * RESULT_RECORD_SIZE)
+        results_file.seek(0, os.SEEK_END)
+        input_file.seek(checkpoint["input_offset"])
+
+        # input offset after each document in flight, in order
+        offsets: deque = deque()
+        input_exhausted = False
+
+        def iter_documents():
+            nonlocal input_exhausted
+            for row, (document, offset) in enumerate(
+                iter_documents_with_offsets(input_file, split, field)
+            ):
+                if max_rows is not None and row >= max_rows:
+                    return  # documents are left
+                offsets.append(offset)
+                yield document
+            input_exhausted = True
+
+        pending = bytearray()
+        rows = checkpoint["rows"]
+        input_offset = checkpoint["input_offset"]
+        last_commit = time.monotonic()
+
+        def commit(done: bool = False) -> None:
+            nonlocal last_commit
+            results_file.write(pending)
+            results_file.flush()
+            os.fsync(results_file.fileno())
+            pending.clear()
+            checkpoint.update(rows=rows, input_offset=input_offset, done=done)
+            write_checkpoint(results_path, checkpoint)
+            summary["checkpoints"] += 1
+            last_commit = time.monotonic()
+
+        finished = False
+        try:
+            for words, sentences in scheduler.iter_score(iter_documents()):
+                pending += RESULT_RECORD.pack(rows, words, sentences)
+                rows += 1
+                input_offset = offsets.popleft()
+                if (
+                    len(pending) >= checkpoint_rows * RESULT_RECORD_SIZE
+                    or time.monotonic() - last_commit >= checkpoint_seconds
+                ):
+                    commit()
+            finished = input_exhausted
+        finally:
+            # also on errors and interrupts: every buffered row is complete
+            commit(done=finished)
+
+    summary["rows"] = rows
+    summary["done"] = finished
+    return summary
+
+
+def read_results(results_path: str) -> list[tuple[int, int, int]]:
+    """The committed (doc_id, words, sentences) rows of a results file."""
+    checkpoint = read_checkpoint(results_path)
+    with open(results_path, "rb") as results_file:
+        data = results_file.read()
+    if checkpoint is not None:
+        data = data[: checkpoint["rows"] * RESULT_RECORD_SIZE]
+    return list(RESULT_RECORD.iter_unpack(data))
+
+
+def load_results_array(results_path: str):
+    """
+    The committed rows of a results file as a read-only numpy memmap
+    with fields doc_id, words, sentences (no copy into memory).
+
+    Raises:
+        ImportError: numpy is not installed
+    """
+    if np is None:
+        raise ImportError("numpy is required for load_results_array: pip install numpy")
+    dtype = np.dtype([("doc_id", "<i8"), ("words", "<i4"), ("sentences", "<i4")])
+    checkpoint = read_checkpoint(results_path)
+    if checkpoint is not None:
+        rows = checkpoint["rows"]
+    else:
+        rows = os.path.getsize(results_path) // RESULT_RECORD_SIZE
+    if rows == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(results_path, dtype=dtype, mode="r", shape=(rows,))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Score a large input into a binary results file, resumably."
+    )
+    parser.add_argument("input", help="input file")
+    parser.add_argument("results", help=f"results file ({RESULT_RECORD_FORMAT} records)")
+    parser.add_argument("--split", choices=CHECKPOINT_SPLIT_MODES, default="line")
+    parser.add_argument("--field", default="text", help="document field for jsonl input")
+    parser.add_argument("--jobs", type=int, default=1, help="workers")
+    parser.add_argument("--backend", choices=EXECUTOR_BACKENDS, default="auto")
+    parser.add_argument("--profile", choices=DETECTOR_PROFILES, default="standard")
+    parser.add_argument("--prescreen", action="store_true")
+    parser.add_argument("--checkpoint-rows", type=int, default=DEFAULT_CHECKPOINT_ROWS)
+    parser.add_argument(
+        "--checkpoint-seconds", type=float, default=DEFAULT_CHECKPOINT_SECONDS
+    )
+    parser.add_argument("--max-rows", type=int, help="stop after this many rows")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_checkpointed(
+            args.input,
+            args.results,
+            split=args.split,
+            field=args.field,
+            jobs=args.jobs,
+            profile=args.profile,
+            prescreen=args.prescreen,
+            checkpoint_rows=args.checkpoint_rows,
+            checkpoint_seconds=args.checkpoint_seconds,
+            max_rows=args.max_rows,
+            backend=args.backend,
+        )
+    except (ValueError, FileExistsError) as error:
+        parser.error(str(error))
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
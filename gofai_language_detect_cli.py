@@ -0,0 +1,403 @@
+"""
+# Language-Detect: command line scorer
+
+Scores documents from files, globs or stdin and streams
+one result per document to stdout, for Unix pipelines.
+
+## Input
+    paths / globs ("logs/**/*.txt"), or none / "-" for stdin
+    --split line     one document per line (default)
+    --split nul      documents separated by NUL bytes (find -print0 style)
+    --split jsonl    one json object per line, document text in --field
+    --split file     each file is one document
+    --split mbox     one document per message of an mbox
+    --split eml      each file is one message (directories: their .eml files)
+                     (mail: text/plain parts, --html for html-only messages,
+                     quoted replies dropped unless --keep-quotes;
+                     see gofai_language_detect_mail)
+    .gz, .bz2, .xz and .zst (with zstandard installed) inputs, files or stdin,
+    are decompressed on the fly, multi-member gzip in parallel with --jobs
+    (see gofai_language_detect_compression)
+
+## Output (stdout)
+    --format jsonl   {"source": ..., "index": ..., "words": ..., "sentences": ...}
+                     (plus "id" with --id-field, for jsonl input,
+                     and the Message-ID for mail)
+    --format tsv     source <tab> index <tab> words <tab> sentences
+
+index counts documents from 0 within each source, so every input
+document has exactly one output record, in input order.
+
+Input is read as workers free up, and results are written as documents
+complete: memory use does not grow with input size. Small documents are
+packed together and huge ones split at sentence boundaries, so workers
+stay evenly loaded (see SizeAwareScheduler); --stats prints per-worker
+utilisation to stderr.
+
+--dedup SIMILARITY scores one document per cluster of near-duplicates
+(e.g. templated mail) and copies its result to the others; --stats then
+also reports the documents and characters saved (see
+gofai_language_detect_dedup). Its index is bounded (digests and
+fingerprints of at most DEFAULT_MAX_REPRESENTATIVES documents).
+
+## Command line
+    python3 gofai_language_detect_cli.py corpus.txt --jobs 8 > scores.jsonl
+    python3 gofai_language_detect_cli.py mail.jsonl.gz --split jsonl --field body
+    python3 gofai_language_detect_cli.py inbox.mbox --split mbox --jobs 8
+    python3 gofai_language_detect_cli.py maildir/ --split eml --html
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import deque
+
+from gofai_language_detect_batch import (
+    DEFAULT_TARGET_TASK_CHARS,
+    EXECUTOR_BACKENDS,
+    SizeAwareScheduler,
+)
+from gofai_language_detect_compression import open_decompressed, open_input
+from gofai_language_detect_dedup import (
+    NearDuplicateIndex,
+    iter_score_deduplicated,
+)
+from gofai_language_detect_mail import (
+    EML_SUFFIX,
+    MAIL_SPLIT_MODES,
+    iter_mail_documents,
+)
+from gofai_language_detect_v52 import DETECTOR_PROFILES
+
+SPLIT_MODES = ("line", "nul", "jsonl", "file") + MAIL_SPLIT_MODES
+OUTPUT_FORMATS = ("jsonl", "tsv")
+
+DEFAULT_BATCH_DOCUMENTS = 512
+READ_CHUNK_BYTES = 1024 * 1024
+
+STDIN_SOURCE = "-"
+
+
+def expand_input_paths(
+    patterns: list[str],
+    directory_suffix: str | None = None,
+) -> list[str]:
+    """
+    Expands globs (including "**") in order; plain paths are kept as given.
+    With directory_suffix, a directory is expanded to the files below it
+    with that suffix, sorted.
+
+    Raises:
+        FileNotFoundError: for a path that does not exist,
+            or a pattern that matches no file
+    """
+    if not patterns:
+        return [STDIN_SOURCE]
+    paths = []
+    for pattern in patterns:
+        if directory_suffix is not None and os.path.isdir(pattern):
+            paths.extend(
+                sorted(
+                    os.path.join(directory, file_name)
+                    for directory, _, file_names in os.walk(pattern)
+                    for file_name in file_names
+                    if file_name.endswith(directory_suffix)
+                )
+            )
+            continue
+        if pattern == STDIN_SOURCE or not glob.has_magic(pattern):
+            if pattern != STDIN_SOURCE and not os.path.isfile(pattern):
+                raise FileNotFoundError(f"no such file {pattern!r}")
+            paths.append(pattern)
+            continue
+        matches = sorted(glob.glob(pattern, recursive=True))
+        matches = [match for match in matches if os.path.isfile(match)]
+        if not matches:
+            raise FileNotFoundError(f"no files match {pattern!r}")
+        paths.extend(matches)
+    return paths
+
+
+def iter_split_chunks(
+    binary_file,
+    separator: bytes,
+    chunk_bytes: int = READ_CHUNK_BYTES,
+):
+    """
+    Yields the separator-delimited parts of a binary file, reading in chunks.
+
+    Each chunk is searched once, and a part that spans chunks is joined
+    once, when it ends: a huge part costs linear time.
+    """
+    overlap = len(separator) - 1
+    # the part in progress, in pieces
+    part_pieces: list[bytes] = []
+    while True:
+        chunk = binary_file.read(chunk_bytes)
+        if not chunk:
+            break
+        if overlap and part_pieces:
+            # a separator may start in the previous chunk
+            last_piece = part_pieces.pop()
+            part_pieces.append(last_piece[:-overlap])
+            chunk = last_piece[-overlap:] + chunk
+        start = 0
+        while (end := chunk.find(separator, start)) != -1:
+            part_pieces.append(chunk[start:end])
+            yield b"".join(part_pieces)
+            part_pieces = []
+            start = end + len(separator)
+        part_pieces.append(chunk[start:])
+    last_part = b"".join(part_pieces)
+    if last_part:
+        yield last_part
+
+
+def parse_jsonl_document(line: bytes, field: str, id_field: str | None) -> tuple:
+    """
+    (document text, record id) of one jsonl line:
+    "" for a record that is not a json object or has no str field.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return ("", None)
+    if not isinstance(record, dict):
+        return ("", None)
+    text = record.get(field)
+    record_id = record.get(id_field) if id_field else None
+    return (text if isinstance(text, str) else "", record_id)
+
+
+def iter_source_documents(
+    binary_file,
+    split: str,
+    field: str,
+    id_field: str | None,
+    mail_html: bool = False,
+    mail_keep_quotes: bool = False,
+):
+    """
+    Yields (document, record id) from one binary input.
+
+    documents are bytes (scored without decoding when ASCII),
+    except for jsonl input, where they are the str of the field,
+    and mail, where they are the message text (record id: Message-ID).
+    Records that have no usable text give an empty document.
+    """
+    if split in MAIL_SPLIT_MODES:
+        yield from iter_mail_documents(binary_file, split, mail_html, mail_keep_quotes)
+    elif split == "file":
+        yield (binary_file.read(), None)
+    elif split == "nul":
+        for document in iter_split_chunks(binary_file, b"\0"):
+            yield (document, None)
+    elif split == "line":
+        for line in binary_file:
+            yield (line.rstrip(b"\r\n"), None)
+    else:  # jsonl
+        for line in binary_file:
+            if not line.strip():
+                continue
+            yield parse_jsonl_document(line, field, id_field)
+
+
+def iter_records(
+    paths: list[str],
+    split: str,
+    field: str,
+    id_field: str | None,
+    mail_html: bool = False,
+    mail_keep_quotes: bool = False,
+    decompress_jobs: int = 1,
+):
+    """
+    Yields (source, index, document, record id) for every input document.
+    Compressed inputs are decompressed, by decompress_jobs threads
+    for multi-member gzip files (see open_decompressed()).
+    """
+    mail_options = (mail_html, mail_keep_quotes)
+    for path in paths:
+        if path == STDIN_SOURCE:
+            documents = iter_source_documents(
+                open_decompressed(sys.stdin.buffer), split, field, id_field, *mail_options
+            )
+            for index, (document, record_id) in enumerate(documents):
+                yield (path, index, document, record_id)
+            continue
+        with open_input(path, decompress_jobs) as binary_file:
+            documents = iter_source_documents(
+                binary_file, split, field, id_field, *mail_options
+            )
+            for index, (document, record_id) in enumerate(documents):
+                yield (path, index, document, record_id)
+
+
+def format_result(record: tuple, result: tuple[int, int], output_format: str) -> str:
+    source, index, _, record_id = record
+    words, sentences = result
+    if output_format == "tsv":
+        return f"{source}\t{index}\t{words}\t{sentences}\n"
+    output = {"source": source, "index": index}
+    if record_id is not None:
+        output["id"] = record_id
+    output["words"] = words
+    output["sentences"] = sentences
+    return json.dumps(output) + "\n"
+
+
+def score_to_stream(
+    paths: list[str],
+    output,
+    split: str = "line",
+    field: str = "text",
+    id_field: str | None = None,
+    output_format: str = "jsonl",
+    jobs: int = 1,
+    profile: str = "standard",
+    prescreen: bool = False,
+    batch_documents: int = DEFAULT_BATCH_DOCUMENTS,
+    target_task_chars: int = DEFAULT_TARGET_TASK_CHARS,
+    stats_output=None,
+    backend: str = "auto",
+    dedup_similarity: float | None = None,
+    mail_html: bool = False,
+    mail_keep_quotes: bool = False,
+) -> int:
+    """
+    Scores every document of paths and writes one line per document to output.
+
+    batch_documents caps the documents packed into one worker task;
+    target_task_chars is the work per task (see SizeAwareScheduler).
+    With dedup_similarity, near-duplicates are scored once
+    (see NearDuplicateIndex). mail_html and mail_keep_quotes are the
+    mail split options (see message_text()).
+    With stats_output, the scheduler stats are written there as json.
+
+    Returns:
+        int: number of documents scored
+    """
+    scheduler = SizeAwareScheduler(
+        jobs=jobs,
+        target_task_chars=target_task_chars,
+        profile=profile,
+        prescreen=prescreen,
+        max_task_documents=batch_documents,
+        backend=backend,
+    )
+
+    # Record metadata stays here (for the documents in flight);
+    # only the documents go to the workers
+    in_order_records: deque = deque()
+
+    def iter_documents():
+        for record in iter_records(
+            paths, split, field, id_field, mail_html, mail_keep_quotes, jobs
+        ):
+            in_order_records.append(record)
+            yield record[2]
+
+    dedup_index = None
+    if dedup_similarity is None:
+        results = scheduler.iter_score(iter_documents())
+    else:
+        dedup_index = NearDuplicateIndex(dedup_similarity)
+        results = iter_score_deduplicated(
+            iter_documents(), scheduler.iter_score, dedup_index
+        )
+
+    documents_scored = 0
+    for result in results:
+        output.write(format_result(in_order_records.popleft(), result, output_format))
+        documents_scored += 1
+    output.flush()
+    if stats_output is not None:
+        stats = scheduler.stats()
+        if dedup_index is not None:
+            stats["dedup"] = dedup_index.stats()
+        stats_output.write(json.dumps(stats) + "\n")
+    return documents_scored
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Score documents for language (word and sentence counts)."
+    )
+    parser.add_argument("paths", nargs="*", help='files or globs; none or "-" for stdin')
+    parser.add_argument("--split", choices=SPLIT_MODES, default="line")
+    parser.add_argument("--field", default="text", help="document field for jsonl input")
+    parser.add_argument("--id-field", help="jsonl field copied to the output as id")
+    parser.add_argument(
+        "--html", action="store_true", help="mail: score html-only messages too"
+    )
+    parser.add_argument(
+        "--keep-quotes", action="store_true", help="mail: keep quoted replies"
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl")
+    parser.add_argument("--jobs", type=int, default=1, help="workers")
+    parser.add_argument(
+        "--backend",
+        choices=EXECUTOR_BACKENDS,
+        default="auto",
+        help="workers are processes or threads (auto: threads without the GIL)",
+    )
+    parser.add_argument("--batch-documents", type=int, default=DEFAULT_BATCH_DOCUMENTS)
+    parser.add_argument(
+        "--task-chars",
+        type=int,
+        default=DEFAULT_TARGET_TASK_CHARS,
+        help="work per worker task, in characters",
+    )
+    parser.add_argument("--profile", choices=DETECTOR_PROFILES, default="standard")
+    parser.add_argument("--prescreen", action="store_true")
+    parser.add_argument(
+        "--dedup",
+        type=float,
+        metavar="SIMILARITY",
+        help="score near-duplicates once, at this similarity (0..1], e.g. 0.95",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print scheduler stats to stderr"
+    )
+    args = parser.parse_args(argv)
+    if args.dedup is not None and not 0.0 < args.dedup <= 1.0:
+        parser.error("--dedup must be in (0, 1]")
+
+    try:
+        paths = expand_input_paths(
+            args.paths, EML_SUFFIX if args.split == "eml" else None
+        )
+    except FileNotFoundError as error:
+        parser.error(str(error))
+
+    try:
+        score_to_stream(
+            paths,
+            sys.stdout,
+            split=args.split,
+            field=args.field,
+            id_field=args.id_field,
+            output_format=args.format,
+            jobs=args.jobs,
+            profile=args.profile,
+            prescreen=args.prescreen,
+            batch_documents=args.batch_documents,
+            target_task_chars=args.task_chars,
+            stats_output=sys.stderr if args.stats else None,
+            backend=args.backend,
+            dedup_similarity=args.dedup,
+            mail_html=args.html,
+            mail_keep_quotes=args.keep_quotes,
+        )
+    except BrokenPipeError:
+        # e.g. piped into head: stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,440 @@
+"""
+# Language-Detect: compressed input
+
+Reads .gz, .bz2, .xz and .zst inputs directly, for the command line
+scorer and the calibration corpus scanner. The format is detected
+from the first bytes (COMPRESSION_MAGIC), not the file name, so
+compressed stdin works too.
+
+## Overlap with scoring
+Decompression runs in a background thread that stays up to
+prefetch_chunks chunks ahead of the reader: zlib, bz2 and lzma
+release the GIL while they decompress, so it overlaps with parsing
+and scoring instead of alternating with it.
+
+## Multi-member gzip
+A gzip file can be several gzip members back to back (cat a.gz b.gz,
+bgzip, split + gzip); each member decompresses on its own. With jobs > 1,
+a seekable multi-member file is cut at member starts about
+member_range_bytes apart, and the ranges are decompressed by a pool of
+jobs threads, in order. Member starts are found by scanning for the
+gzip header and test-decompressing it; a false match is caught when
+the previous range runs past it (it then carries on to the next real
+start) or when its own range fails to decompress (its data is then
+already covered). A single-member file is decompressed by one thread.
+
+## Zstandard
+Only when the zstandard package is installed (pip install zstandard);
+other formats need nothing beyond the standard library.
+
+Example:
+    >>> with open_input("corpus.txt.gz", jobs=4) as corpus_file:
+    ...     for line in corpus_file:
+    ...         ...
+"""
+
+import bz2
+import io
+import lzma
+import mmap
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# (magic bytes, format), checked in order
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+COMPRESSION_FORMATS = tuple(compression for _, compression in COMPRESSION_MAGIC)
+# "BZh" alone is also plain text: a bz2 stream is "BZh", a block size
+# digit, then the magic of its first block (or of the end, when empty)
+BZ2_BLOCK_SIZE_DIGITS = b"123456789"
+BZ2_FIRST_BLOCK_MAGICS = (b"\x31\x41\x59\x26\x53\x59", b"\x17\x72\x45\x38\x50\x90")
+BZ2_HEADER_BYTES = 10
+MAGIC_BYTES = max(BZ2_HEADER_BYTES, *(len(magic) for magic, _ in COMPRESSION_MAGIC))
+
+# A gzip member header: magic, deflate method
+GZIP_MEMBER_HEADER = b"\x1f\x8b\x08"
+# Reserved gzip header flag bits, always 0
+GZIP_RESERVED_FLAGS = 0xE0
+# Compressed bytes test-decompressed to confirm a gzip member start
+GZIP_MEMBER_CHECK_BYTES = 64 * 1024
+# The fixed part of a gzip member header
+GZIP_HEADER_BYTES = 10
+
+DEFAULT_READ_CHUNK_BYTES = 1024 * 1024
+DEFAULT_PREFETCH_CHUNKS = 8
+DEFAULT_MEMBER_RANGE_BYTES = 4 * 1024 * 1024
+
+
+def detect_compression(header: bytes) -> str | None:
+    """The compression format of data starting with header, or None."""
+    for magic, compression in COMPRESSION_MAGIC:
+        if header.startswith(magic):
+            if compression == "bz2" and not _is_bz2_header(header):
+                continue
+            return compression
+    return None
+
+
+def _is_bz2_header(header: bytes) -> bool:
+    return (
+        len(header) >= BZ2_HEADER_BYTES
+        and header[3] in BZ2_BLOCK_SIZE_DIGITS
+        and header[4:BZ2_HEADER_BYTES] in BZ2_FIRST_BLOCK_MAGICS
+    )
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError("zstandard is required for .zst input: pip install zstandard")
+
+
+def _new_decompressor(compression: str):
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        return bz2.BZ2Decompressor()
+    if compression == "xz":
+        return lzma.LZMADecompressor()
+    raise ValueError(
+        f"unknown compression {compression!r}, use one of {COMPRESSION_FORMATS}"
+    )
+
+
+def iter_decompressed_chunks(
+    raw_file,
+    compression: str,
+    chunk_bytes: int = DEFAULT_READ_CHUNK_BYTES,
+):
+    """
+    Yields the decompressed data of a binary file, chunk by chunk,
+    across all its gzip members / bz2 and xz streams / zstd frames.
+
+    Raises:
+        EOFError: the input ends inside a member
+        ImportError: zstd input without the zstandard package
+    """
+    if compression == "zstd":
+        _require_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw_file, read_across_frames=True
+        )
+        while True:
+            chunk = reader.read(chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+
+    magic = COMPRESSION_MAGIC[COMPRESSION_FORMATS.index(compression)][0]
+    decompressor = _new_decompressor(compression)
+    in_member = False
+    while True:
+        data = raw_file.read(chunk_bytes)
+        if not data:
+            break
+        while data:
+            in_member = True
+            chunk = decompressor.decompress(data)
+            if chunk:
+                yield chunk
+            if not decompressor.eof:
+                break
+            data = decompressor.unused_data
+            in_member = False
+            decompressor = _new_decompressor(compression)
+            if data and not magic.startswith(data[: len(magic)]):
+                # trailing padding or garbage after the last member (as gzip -d)
+                return
+    if in_member:
+        raise EOFError("compressed input ended before the end of a member")
+
+
+def _looks_like_gzip_member(view, position: int) -> bool:
+    if position + GZIP_HEADER_BYTES > len(view):
+        return False
+    if view[position + 3] & GZIP_RESERVED_FLAGS:
+        return False
+    try:
+        zlib.decompressobj(wbits=zlib.MAX_WBITS | 16).decompress(
+            view[position : position + GZIP_MEMBER_CHECK_BYTES], 4096
+        )
+    except zlib.error:
+        return False
+    return True
+
+
+def find_gzip_member_starts(view, member_range_bytes: int) -> list[int]:
+    """
+    Member starts (likely; see "Multi-member gzip") about member_range_bytes
+    apart in the gzip data view, from 0.
+    """
+    starts = [0]
+    target = member_range_bytes
+    while target < len(view):
+        candidate = view.find(GZIP_MEMBER_HEADER, target)
+        while candidate != -1 and not _looks_like_gzip_member(view, candidate):
+            candidate = view.find(GZIP_MEMBER_HEADER, candidate + 1)
+        if candidate == -1:
+            break
+        starts.append(candidate)
+        target = candidate + member_range_bytes
+    return starts
+
+
+def decompress_gzip_range(
+    view,
+    start: int,
+    end: int,
+    member_starts: frozenset,
+    chunk_bytes: int = DEFAULT_READ_CHUNK_BYTES,
+) -> tuple[bytes, int]:
+    """
+    Decompresses whole gzip members from start, up to the first member
+    end at or past end that is in member_starts (or the end of the data).
+
+    Returns:
+        tuple: (decompressed data, offset after the last member)
+
+    Raises:
+        zlib.error, EOFError: start is not a member start, or bad data
+    """
+    chunks = []
+    position = start
+    while position < len(view):
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        fed = position
+        while not decompressor.eof:
+            if fed >= len(view):
+                raise EOFError("compressed input ended before the end of a member")
+            data = view[fed : fed + chunk_bytes]
+            fed += len(data)
+            chunks.append(decompressor.decompress(data))
+        position = fed - len(decompressor.unused_data)
+        if position >= end and position in member_starts:
+            break
+        if view[position : position + 2] != GZIP_MEMBER_HEADER[:2]:
+            # trailing padding or garbage after the last member
+            position = len(view)
+    return (b"".join(chunks), position)
+
+
+def iter_parallel_gzip_chunks(
+    path: str,
+    jobs: int,
+    member_range_bytes: int = DEFAULT_MEMBER_RANGE_BYTES,
+):
+    """
+    Yields the decompressed data of a gzip file, in order,
+    decompressing member ranges on jobs threads (see "Multi-member gzip").
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with open(path, "rb") as raw_file:
+        if os.fstat(raw_file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(raw_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            starts = find_gzip_member_starts(view, member_range_bytes)
+            ends = starts[1:] + [len(view)]
+            member_starts = frozenset(ends)
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                in_flight = []
+                next_range = 0
+                position = 0
+                try:
+                    while in_flight or next_range < len(starts):
+                        while next_range < len(starts) and len(in_flight) < 2 * jobs:
+                            in_flight.append(
+                                (
+                                    starts[next_range],
+                                    executor.submit(
+                                        decompress_gzip_range,
+                                        view,
+                                        starts[next_range],
+                                        ends[next_range],
+                                        member_starts,
+                                    ),
+                                )
+                            )
+                            next_range += 1
+                        start, future = in_flight.pop(0)
+                        if start < position:
+                            # covered by the previous range: start was no member
+                            # start (an exception then is expected), or a member
+                            # the previous range ran through
+                            future.exception()
+                            continue
+                        data, position = future.result()
+                        if data:
+                            yield data
+                finally:
+                    for _, future in in_flight:
+                        future.cancel()
+                    # the futures hold views of the map: finish them before it closes
+                    for _, future in in_flight:
+                        if not future.cancelled():
+                            future.exception()
+
+
+class PrefetchReader(io.RawIOBase):
+    """
+    A raw binary reader over chunks produced by a background thread,
+    which stays up to prefetch_chunks chunks ahead.
+
+    Args:
+        iter_chunks (callable): returns the iterator of bytes chunks;
+            called in the background thread
+        prefetch_chunks (int): bound of the chunk queue
+        on_close (callable | None): called once, after the thread stops
+    """
+
+    _END = object()
+
+    def __init__(
+        self,
+        iter_chunks,
+        prefetch_chunks: int = DEFAULT_PREFETCH_CHUNKS,
+        on_close=None,
+    ):
+        super().__init__()
+        # imported here: plain input never pays for the threading import
+        import queue
+        import threading
+
+        self._queue = queue.Queue(maxsize=prefetch_chunks)
+        self._queue_full = queue.Full
+        self._stop = threading.Event()
+        self._on_close = on_close
+        self._buffer = memoryview(b"")
+        self._done = False
+        self._thread = threading.Thread(
+            target=self._produce, args=(iter_chunks,), daemon=True
+        )
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except self._queue_full:
+                continue
+        return False
+
+    def _produce(self, iter_chunks) -> None:
+        chunks = None
+        try:
+            chunks = iter_chunks()
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+            self._put(self._END)
+        except BaseException as error:  # re-raised in the reading thread
+            self._put(error)
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            if self._done:
+                return 0
+            item = self._queue.get()
+            if item is self._END:
+                self._done = True
+                return 0
+            if isinstance(item, BaseException):
+                self._done = True
+                raise item
+            self._buffer = memoryview(item)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            if self._on_close is not None:
+                self._on_close()
+        super().close()
+
+
+def open_decompressed(
+    binary_file,
+    jobs: int = 1,
+    prefetch_chunks: int = DEFAULT_PREFETCH_CHUNKS,
+    member_range_bytes: int = DEFAULT_MEMBER_RANGE_BYTES,
+    close_file: bool = False,
+):
+    """
+    A binary reader of the decompressed data of binary_file (read from
+    its current position), or binary_file itself when it is not compressed.
+
+    binary_file must support peek() (open(path, "rb"), sys.stdin.buffer).
+    With jobs > 1, a multi-member gzip regular file is decompressed in
+    parallel (see "Multi-member gzip"). With close_file, closing the
+    reader closes binary_file.
+
+    Raises:
+        ImportError: zstd input without the zstandard package
+    """
+    compression = detect_compression(binary_file.peek(MAGIC_BYTES)[:MAGIC_BYTES])
+    if compression is None:
+        return binary_file
+    if compression == "zstd":
+        _require_zstandard()
+
+    on_close = binary_file.close if close_file else None
+    if (
+        compression == "gzip"
+        and jobs > 1
+        and binary_file.seekable()
+        and binary_file.tell() == 0
+        and hasattr(binary_file, "name")
+        and os.path.isfile(binary_file.name)
+    ):
+        path = binary_file.name
+
+        def iter_chunks():
+            return iter_parallel_gzip_chunks(path, jobs, member_range_bytes)
+
+    else:
+
+        def iter_chunks():
+            return iter_decompressed_chunks(binary_file, compression)
+
+    return io.BufferedReader(
+        PrefetchReader(iter_chunks, prefetch_chunks, on_close),
+        buffer_size=DEFAULT_READ_CHUNK_BYTES,
+    )
+
+
+def open_input(path: str, jobs: int = 1, **options):
+    """
+    Opens path for binary reading, decompressed if it is compressed
+    (see open_decompressed(), which takes the same options).
+    """
+    binary_file = open(path, "rb")
+    try:
+        return open_decompressed(binary_file, jobs, close_file=True, **options)
+    except BaseException:
+        binary_file.close()
+        raise
+
+
+def is_compressed(path: str) -> bool:
+    """Whether path starts with the magic bytes of a compression format."""
+    with open(path, "rb") as binary_file:
+        return detect_compression(binary_file.read(MAGIC_BYTES)) is not None
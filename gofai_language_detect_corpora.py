@@ -0,0 +1,101 @@
+"""
+# Language-Detect: bundled corpora and test cases
+
+Read access to the sample corpora shipped in gofai_lang_detect_52__pack.zip
+(no need to unpack it), and the grouped test cases,
+for benchmarks and calibration checks.
+"""
+
+import os
+import zipfile
+
+BUNDLED_PACK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "gofai_lang_detect_52__pack.zip"
+)
+
+# empty/incomplete emails
+invalid_incomplete_test_cases_2 = [
+    """
+"buy $$$"
+""",
+    """
+    "BUY SPAM BUY SPAM!",  # not valid
+""",
+]
+
+# short/borderline examples
+valid_short_test_cases_4 = [
+    """
+He had a great time there.
+""",
+    """
+This is sentence one.
+""",
+    """
+This is really a sentence.
+""",
+]
+
+valid_sample_cases = [
+    "Mr. Smith went to Washington. He had a great time!",
+    "This is sentence one. This is sentence two! What about three?",
+    "Short. Too short. This is a proper sentence.",
+    "Dr. Jones, Prof. Smith and Mrs. Brown attended the meeting on Downing St. Inc.",
+    "This sentence is not incomplete.",
+]
+
+
+# Valid Emails
+valid_borderline_test_cases_3 = [
+    """
+This is a proper sentence.
+""",
+    """
+Short. Too short. This is a proper sentence.
+""",
+]
+
+# probably_invalid edge cases
+edge_case_probably_invalid = [
+    """
+buy $$$
+""",
+    """
+SPAM SPAM!
+""",
+    "fraud@crypto is the B!!!est slimball.",
+]
+
+# {corpus name: path inside the pack}
+BUNDLED_CORPORA = {
+    # one long document: wikipedia pages, copied as text
+    "wikipedia_samples_text_doc": "vowels_analyzer_lang_detect/wikipedia_samples_text_doc.txt",
+    # one sentence per line
+    "clean_sentences_list": "tests_for_lang_detect/clean_sentences_list.txt",
+    # one (rougher) sentence per line
+    "sentences_list": "tests_for_lang_detect/sentences_list.txt",
+}
+
+
+def read_bundled_corpus(name: str) -> str:
+    """Returns the text of one bundled corpus (see BUNDLED_CORPORA)."""
+    with zipfile.ZipFile(BUNDLED_PACK_PATH) as pack:
+        return pack.read(BUNDLED_CORPORA[name]).decode("utf-8")
+
+
+def bundled_corpus_lines(name: str) -> list[str]:
+    """Returns the non-blank lines of one bundled corpus, as documents."""
+    return [line for line in read_bundled_corpus(name).splitlines() if line.strip()]
+
+
+def bundled_test_cases() -> dict[str, list[str]]:
+    """
+    Returns the detector's grouped test cases:
+        {"valid": [...], "invalid": [...]}
+    """
+    return {
+        "valid": (
+            valid_short_test_cases_4 + valid_sample_cases + valid_borderline_test_cases_3
+        ),
+        "invalid": invalid_incomplete_test_cases_2 + edge_case_probably_invalid,
+    }
@@ -0,0 +1,225 @@
+"""
+# Language-Detect: pandas and Polars columns
+
+Optional integration: requires pandas and/or polars in python env.
+
+Scores a text column in chunks of chunk_rows values through the batch
+engine (iter_score_batches(), in parallel with jobs > 1), and returns
+two Int32 columns, (words, sentences), named as in
+gofai_language_detect_arrow. Missing (or non-text) values give null counts.
+str and UTF-8 bytes values are scored as by score_document().
+
+Per row, the only work besides scoring is reading the value out of the
+column and writing two ints into an array.
+
+## pandas
+Importing this module registers a "langdetect" Series accessor:
+
+    import gofai_language_detect_dataframe  # noqa: F401
+    df = df.join(df["BODY"].langdetect.counts(jobs=8))
+
+## Polars
+    df = with_lang_detect_columns(df, "BODY", jobs=8)  # DataFrame or LazyFrame
+    df.select(lang_detect_counts_expr("BODY").struct.unnest())
+"""
+
+from array import array
+from functools import partial
+
+try:
+    import pandas as pd
+except ImportError:  # optional dependency
+    pd = None
+
+try:
+    import polars as pl
+except ImportError:  # optional dependency
+    pl = None
+
+from gofai_language_detect_arrow import SENTENCES_COLUMN_NAME, WORDS_COLUMN_NAME
+from gofai_language_detect_batch import iter_score_batches
+
+DEFAULT_CHUNK_ROWS = 512
+
+
+def _iter_chunks(values: list, chunk_rows: int, null_positions: list[int]):
+    """Chunks of values, with each null (non-text) value as "" (scores (0, 0))."""
+    for chunk_start in range(0, len(values), chunk_rows):
+        chunk = values[chunk_start : chunk_start + chunk_rows]
+        for index, value in enumerate(chunk):
+            if not isinstance(value, (str, bytes)):
+                null_positions.append(chunk_start + index)
+                chunk[index] = ""
+        yield chunk
+
+
+def score_values(
+    values: list,
+    jobs: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    profile: str = "standard",
+    prescreen: bool = False,
+    backend: str = "auto",
+) -> tuple[array, array, list[int]]:
+    """
+    Scores a list of column values, in chunks of chunk_rows.
+
+    Args:
+        values (list): str, UTF-8 bytes, or anything else for a null
+        jobs (int): workers; 1 scores in this thread
+        chunk_rows (int): values per batch (see iter_score_batches())
+        profile (str), prescreen (bool): see lang_detect_word_sentence_counter()
+        backend (str): see EXECUTOR_BACKENDS
+
+    Returns:
+        tuple: (words, sentences, null positions): two int32 arrays,
+            0 at the null positions
+    """
+    words = array("i")
+    sentences = array("i")
+    null_positions: list[int] = []
+    for results in iter_score_batches(
+        _iter_chunks(values, chunk_rows, null_positions),
+        jobs,
+        profile,
+        prescreen,
+        backend=backend,
+    ):
+        words.extend([result[0] for result in results])
+        sentences.extend([result[1] for result in results])
+    return (words, sentences, null_positions)
+
+
+# pandas
+
+
+def _require_pandas() -> None:
+    if pd is None:
+        raise ImportError("pandas is required for pandas columns: pip install pandas")
+
+
+def score_pandas_series(series, **options):
+    """
+    Scores a pandas Series of text.
+
+    Args:
+        series (pandas.Series): text column
+        **options: jobs, chunk_rows, profile, prescreen, backend (see score_values())
+
+    Returns:
+        pandas.DataFrame: WORDS_COLUMN_NAME and SENTENCES_COLUMN_NAME,
+            nullable Int32, with the index of series
+    """
+    _require_pandas()
+    import numpy as np  # a pandas dependency
+
+    words, sentences, null_positions = score_values(series.tolist(), **options)
+    mask = np.zeros(len(words), dtype=bool)
+    mask[null_positions] = True
+    return pd.DataFrame(
+        {
+            WORDS_COLUMN_NAME: pd.arrays.IntegerArray(
+                np.frombuffer(words, dtype=np.int32), mask.copy()
+            ),
+            SENTENCES_COLUMN_NAME: pd.arrays.IntegerArray(
+                np.frombuffer(sentences, dtype=np.int32), mask
+            ),
+        },
+        index=series.index,
+    )
+
+
+if pd is not None:
+
+    @pd.api.extensions.register_series_accessor("langdetect")
+    class LangDetectAccessor:
+        """
+        series.langdetect: lang-detect scoring of a text Series.
+
+        Example:
+            >>> pd.Series(["He had a great time there.", None]).langdetect.counts()
+               lang_detect_words  lang_detect_sentences
+            0                  5                      1
+            1               <NA>                   <NA>
+        """
+
+        def __init__(self, series):
+            self._series = series
+
+        def counts(
+            self,
+            jobs: int = 1,
+            chunk_rows: int = DEFAULT_CHUNK_ROWS,
+            profile: str = "standard",
+            prescreen: bool = False,
+            backend: str = "auto",
+        ):
+            """(words, sentences) of each value: see score_pandas_series()."""
+            return score_pandas_series(
+                self._series,
+                jobs=jobs,
+                chunk_rows=chunk_rows,
+                profile=profile,
+                prescreen=prescreen,
+                backend=backend,
+            )
+
+
+# Polars
+
+
+def _require_polars() -> None:
+    if pl is None:
+        raise ImportError("polars is required for Polars columns: pip install polars")
+
+
+def score_polars_series(series, **options):
+    """
+    Scores a Polars Series of text (String or Binary).
+
+    Args:
+        series (polars.Series): text column
+        **options: jobs, chunk_rows, profile, prescreen, backend (see score_values())
+
+    Returns:
+        polars.Series: a Struct of WORDS_COLUMN_NAME and SENTENCES_COLUMN_NAME
+            (Int32), named as series
+    """
+    _require_polars()
+    words, sentences, null_positions = score_values(series.to_list(), **options)
+    words_column = pl.Series(WORDS_COLUMN_NAME, words, dtype=pl.Int32)
+    sentences_column = pl.Series(SENTENCES_COLUMN_NAME, sentences, dtype=pl.Int32)
+    if null_positions:
+        words_column = words_column.scatter(null_positions, None)
+        sentences_column = sentences_column.scatter(null_positions, None)
+    return pl.DataFrame([words_column, sentences_column]).to_struct(series.name)
+
+
+def lang_detect_counts_expr(column, **options):
+    """
+    A Polars expression: the Struct of (words, sentences) of a text column.
+
+    Args:
+        column (str | polars.Expr): column name, or expression
+        **options: see score_polars_series()
+    """
+    _require_polars()
+    if isinstance(column, str):
+        column = pl.col(column)
+    return column.map_batches(
+        partial(score_polars_series, **options),
+        return_dtype=pl.Struct(
+            {WORDS_COLUMN_NAME: pl.Int32, SENTENCES_COLUMN_NAME: pl.Int32}
+        ),
+    )
+
+
+def with_lang_detect_columns(frame, column: str, **options):
+    """
+    frame (a Polars DataFrame or LazyFrame) with the WORDS_COLUMN_NAME and
+    SENTENCES_COLUMN_NAME columns of column appended.
+    """
+    _require_polars()
+    return frame.with_columns(
+        lang_detect_counts_expr(column, **options).struct.unnest()
+    )
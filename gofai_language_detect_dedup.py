@@ -0,0 +1,349 @@
+"""
+# Language-Detect: near-duplicate collapsing
+
+Mail and ticket exports repeat the same bodies, exactly or with small
+changes (names, ids, dates in a template). This stage, in front of
+batch scoring, scores one representative per cluster of near-duplicates
+and gives its (words, sentences) to every member of the cluster.
+
+## Fingerprints
+SimHash (SIMHASH_BITS bits) over the lowercased tokens of
+sanitize_and_split_text(), as overlapping SHINGLE_TOKENS-token shingles
+(so shared stopwords alone do not make texts similar). Token hashes are
+blake2b, the same in every process and run.
+
+## Clusters
+Two documents are near-duplicates when their fingerprints differ in at
+most (1 - similarity_threshold) * SIMHASH_BITS bits. Candidates are
+found by splitting fingerprints into max distance + 1 bands: documents
+within the distance share at least one whole band. Each document joins
+the first representative it matches, or becomes a representative.
+Identical texts always collapse; documents with fewer than min_tokens
+tokens only collapse with identical texts. Identical texts are found
+by a blake2b digest (EXACT_DIGEST_BYTES) of each representative, not
+its text, so the index holds no documents.
+
+Collapsing is an approximation: a near-duplicate gets its
+representative's counts, not its own (see the "near_duplicates" stat).
+On the bundled corpora (38767 lines), the default 0.95 gives other
+counts for 28 documents; 0.9 for 161. Fingerprinting costs about
+three quarters of scoring a document, so dedup pays off when a
+large share of the input is repeated.
+
+## Memory
+The index holds at most max_representatives representatives (it
+restarts when full), and iter_score_deduplicated() keeps the results
+of those representatives only, and of older ones with duplicates still
+in flight. Duplicates go through iter_score as empty placeholder
+documents, so reading ahead of the output is bounded by iter_score
+(e.g. SizeAwareScheduler's tasks in flight), however long a run of
+duplicates is.
+
+## Stats
+    documents, representatives (scored), exact_duplicates, near_duplicates,
+    saved_documents, saved_chars, saved_fraction (of characters not scored)
+
+Example:
+    >>> results, stats = score_deduplicated(documents, similarity_threshold=0.9)
+    >>> stats["saved_fraction"]
+"""
+
+import hashlib
+from collections import deque
+
+from gofai_language_detect_batch import score_document
+from gofai_language_detect_v52 import sanitize_and_split_text
+
+SIMHASH_BITS = 64
+SHINGLE_TOKENS = 2
+# Bits of one per-bit counter in the packed simhash sums
+SIMHASH_LANE_BITS = 32
+SIMHASH_LANE_MASK = (1 << SIMHASH_LANE_BITS) - 1
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+DEFAULT_MIN_TOKENS = 8
+# Representatives kept for matching; the index restarts when full
+DEFAULT_MAX_REPRESENTATIVES = 1_000_000
+MAX_CACHED_FEATURES = 1_000_000
+EXACT_DIGEST_BYTES = 16
+# What a duplicate is sent to iter_score as, in its place
+DUPLICATE_PLACEHOLDER = ""
+
+
+def document_tokens(document: str | bytes) -> list[str]:
+    """The lowercased sanitize_and_split_text() tokens of a document."""
+    if not isinstance(document, str):
+        document = str(document, "utf-8", "replace")
+    return [
+        token.lower() for token in sanitize_and_split_text(" ".join(document.split()))
+    ]
+
+
+# {feature: its hash bits spread into SIMHASH_LANE_BITS-bit lanes}
+_spread_feature_cache: dict[str, int] = {}
+
+
+def _spread_feature_hash(feature: str) -> int:
+    spread = _spread_feature_cache.get(feature)
+    if spread is None:
+        feature_hash = int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        spread = 0
+        for bit in range(SIMHASH_BITS):
+            if feature_hash >> bit & 1:
+                spread |= 1 << (bit * SIMHASH_LANE_BITS)
+        if len(_spread_feature_cache) >= MAX_CACHED_FEATURES:
+            _spread_feature_cache.clear()
+        _spread_feature_cache[feature] = spread
+    return spread
+
+
+def simhash_tokens(tokens: list[str]) -> int:
+    """
+    SIMHASH_BITS-bit SimHash of the SHINGLE_TOKENS-token shingles of tokens
+    (of the tokens themselves when there are fewer).
+    """
+    if len(tokens) >= SHINGLE_TOKENS:
+        features = [
+            " ".join(tokens[index : index + SHINGLE_TOKENS])
+            for index in range(len(tokens) - SHINGLE_TOKENS + 1)
+        ]
+    else:
+        features = tokens
+    if not features:
+        return 0
+
+    # Per-bit counts of set bits, all 64 summed at once in packed lanes
+    bit_counts = sum(_spread_feature_hash(feature) for feature in features)
+    half = len(features) / 2
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if (bit_counts >> (bit * SIMHASH_LANE_BITS) & SIMHASH_LANE_MASK) > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def exact_digest(document: str | bytes) -> bytes:
+    """blake2b digest of a document; a str and bytes never share one."""
+    if isinstance(document, str):
+        return hashlib.blake2b(
+            document.encode("utf-8", "surrogatepass"),
+            digest_size=EXACT_DIGEST_BYTES,
+            person=b"str",
+        ).digest()
+    return hashlib.blake2b(
+        document, digest_size=EXACT_DIGEST_BYTES, person=b"bytes"
+    ).digest()
+
+
+class NearDuplicateIndex:
+    """
+    Assigns documents, one at a time, to clusters of near-duplicates.
+
+    Args:
+        similarity_threshold (float): 0..1, least fingerprint similarity
+            (share of equal bits) of near-duplicates
+        min_tokens (int): shorter documents only match identical texts
+        max_representatives (int): the index is emptied when it holds this many
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        min_tokens: int = DEFAULT_MIN_TOKENS,
+        max_representatives: int = DEFAULT_MAX_REPRESENTATIVES,
+    ):
+        if not 0.0 < similarity_threshold <= 1.0:
+            raise ValueError("similarity_threshold must be in (0, 1]")
+        self.similarity_threshold = similarity_threshold
+        self.min_tokens = min_tokens
+        self.max_representatives = max_representatives
+        self.max_distance = int((1.0 - similarity_threshold) * SIMHASH_BITS + 1e-9)
+
+        # max_distance + 1 bands of about equal width
+        band_count = self.max_distance + 1
+        self.band_shifts_masks = []
+        start = 0
+        for band in range(band_count):
+            width = SIMHASH_BITS // band_count + (band < SIMHASH_BITS % band_count)
+            self.band_shifts_masks.append((start, (1 << width) - 1))
+            start += width
+
+        # times the index was emptied (full)
+        self.restarts = 0
+        self.counters = {
+            "documents": 0,
+            "representatives": 0,
+            "exact_duplicates": 0,
+            "near_duplicates": 0,
+            "saved_chars": 0,
+            "total_chars": 0,
+        }
+        self._clear()
+
+    def _clear(self) -> None:
+        # {exact_digest() of the text: representative id}
+        self._exact: dict[bytes, int] = {}
+        # one {band value: [(fingerprint, representative id)]} per band
+        self._bands: list[dict] = [{} for _ in self.band_shifts_masks]
+        self._representatives = 0
+
+    def assign(self, document: str | bytes, representative_id: int) -> tuple[int, str]:
+        """
+        Finds the cluster of document.
+
+        Args:
+            representative_id (int): the id document gets if it is a new
+                representative (e.g. its position in the input)
+
+        Returns:
+            tuple: (representative id, kind), kind being "new" (score it),
+                "exact" or "near" (use the representative's result)
+        """
+        self.counters["documents"] += 1
+        self.counters["total_chars"] += len(document)
+
+        digest = exact_digest(document)
+        known_id = self._exact.get(digest)
+        if known_id is not None:
+            self.counters["exact_duplicates"] += 1
+            self.counters["saved_chars"] += len(document)
+            return (known_id, "exact")
+
+        if self._representatives >= self.max_representatives:
+            self.restarts += 1
+            self._clear()
+
+        tokens = document_tokens(document)
+        fingerprint = None
+        if len(tokens) >= self.min_tokens:
+            fingerprint = simhash_tokens(tokens)
+            for band, (shift, mask) in enumerate(self.band_shifts_masks):
+                for candidate, candidate_id in self._bands[band].get(
+                    fingerprint >> shift & mask, ()
+                ):
+                    if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                        self.counters["near_duplicates"] += 1
+                        self.counters["saved_chars"] += len(document)
+                        return (candidate_id, "near")
+
+        self._exact[digest] = representative_id
+        if fingerprint is not None:
+            for band, (shift, mask) in enumerate(self.band_shifts_masks):
+                self._bands[band].setdefault(fingerprint >> shift & mask, []).append(
+                    (fingerprint, representative_id)
+                )
+        self._representatives += 1
+        self.counters["representatives"] += 1
+        return (representative_id, "new")
+
+    def stats(self) -> dict:
+        """Work saved so far (see "Stats")."""
+        stats = {key: value for key, value in self.counters.items() if key != "total_chars"}
+        stats["saved_documents"] = (
+            self.counters["exact_duplicates"] + self.counters["near_duplicates"]
+        )
+        stats["saved_fraction"] = (
+            self.counters["saved_chars"] / self.counters["total_chars"]
+            if self.counters["total_chars"]
+            else 0.0
+        )
+        return stats
+
+
+def iter_score_deduplicated(documents, iter_score=None, index=None):
+    """
+    Scores a stream of documents, scoring only cluster representatives.
+
+    Args:
+        documents (iterable of str | bytes)
+        iter_score (callable | None): scores an iterable of documents,
+            yielding results in order, e.g. SizeAwareScheduler(jobs=8).iter_score;
+            default score_document() one document at a time. It is given
+            the representatives, and DUPLICATE_PLACEHOLDER in place of
+            each duplicate (see "Memory")
+        index (NearDuplicateIndex | None): default NearDuplicateIndex();
+            pass one to set the threshold or read its stats()
+
+    Yields:
+        tuple[int, int]: (words, sentences) per document, in input order
+    """
+    if iter_score is None:
+
+        def iter_score(representatives):
+            for document in representatives:
+                yield score_document(document)
+
+    if index is None:
+        index = NearDuplicateIndex()
+
+    # (representative id, kind) of each document read but not yielded, in order
+    pending: deque = deque()
+    # Results of the representatives in the index, and of older ones
+    # (ids below first_indexed_id) with duplicates in flight
+    representative_results: dict[int, tuple[int, int]] = {}
+    # {representative id: its duplicates read but not yielded}
+    duplicates_in_flight: dict[int, int] = {}
+    first_indexed_id = 0
+
+    def iter_placeholders():
+        nonlocal first_indexed_id
+        restarts = index.restarts
+        for position, document in enumerate(documents):
+            representative_id, kind = index.assign(document, position)
+            if index.restarts != restarts:
+                # ids before position left the index
+                restarts = index.restarts
+                first_indexed_id = position
+                for old_id in list(representative_results):
+                    if old_id not in duplicates_in_flight:
+                        del representative_results[old_id]
+            pending.append((representative_id, kind))
+            if kind == "new":
+                yield document
+            else:
+                duplicates_in_flight[representative_id] = (
+                    duplicates_in_flight.get(representative_id, 0) + 1
+                )
+                yield DUPLICATE_PLACEHOLDER
+
+    for result in iter_score(iter_placeholders()):
+        representative_id, kind = pending.popleft()
+        if kind == "new":
+            if (
+                representative_id >= first_indexed_id
+                or representative_id in duplicates_in_flight
+            ):
+                representative_results[representative_id] = result
+            yield result
+            continue
+
+        # the representative is always before its duplicates
+        yield representative_results[representative_id]
+        duplicates_in_flight[representative_id] -= 1
+        if not duplicates_in_flight[representative_id]:
+            del duplicates_in_flight[representative_id]
+            if representative_id < first_indexed_id:
+                del representative_results[representative_id]
+
+
+def score_deduplicated(
+    documents: list,
+    similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    min_tokens: int = DEFAULT_MIN_TOKENS,
+    iter_score=None,
+) -> tuple[list[tuple[int, int]], dict]:
+    """
+    Scores documents, one representative per cluster of near-duplicates.
+
+    Args:
+        similarity_threshold (float), min_tokens (int): see NearDuplicateIndex
+        iter_score (callable | None): see iter_score_deduplicated()
+
+    Returns:
+        tuple: ([(words, sentences) per document], stats (see "Stats"))
+    """
+    index = NearDuplicateIndex(similarity_threshold, min_tokens)
+    results = list(iter_score_deduplicated(documents, iter_score, index))
+    return (results, index.stats())
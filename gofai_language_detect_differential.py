@@ -0,0 +1,455 @@
+"""
+# Language-Detect: differential testing of the engines
+
+Every fast path (bytes, prefix sums, NumPy, streaming pipeline,
+memory-lean counter, document pieces, batch columns) must give exactly
+the results of lang_detect_word_sentence_counter(), per document.
+compare_engines() scores the same documents with each engine in
+DIFFERENTIAL_ENGINES and with the frozen reference
+(gofai_language_detect_reference), and reports, per engine:
+    mismatches         documents whose (words, sentences) differ,
+                       with both results (the first MAX_REPORTED_MISMATCHES)
+    seconds            fastest of rounds runs over all the documents
+    throughput ratio   reference seconds / engine seconds
+
+Documents (differential_documents()):
+1. the bundled test cases and corpora (one document per line, and the
+   wikipedia corpus as one document)
+2. generate_fuzz_documents(): seeded, reproducible text built to hit
+   the rules' edge cases: abbreviations, sentences over
+   MAX_WORDS_PER_SENTENCE, symbol-laden tokens, Unicode dashes and
+   letters, runs of periods, and every kind of whitespace
+
+Engines that differ on purpose are not compared: the "fast" and
+"strict" profiles, the prescreen (words), near-duplicate reuse and the
+guards (when they trigger).
+
+## Command line
+    python3 gofai_language_detect_differential.py
+    python3 gofai_language_detect_differential.py --count 20000 --seed 7 --rounds 3
+Exits 1 if any engine has a mismatch.
+"""
+
+import argparse
+import random
+import time
+
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_batch import (
+    score_large_document,
+    split_document_at_sentences,
+)
+from gofai_language_detect_corpora import (
+    BUNDLED_CORPORA,
+    bundled_corpus_lines,
+    bundled_test_cases,
+    read_bundled_corpus,
+)
+from gofai_language_detect_dataframe import score_values
+from gofai_language_detect_guards import score_document_guarded
+from gofai_language_detect_lean import lang_detect_word_sentence_counter_lean
+from gofai_language_detect_pipeline import lang_detect_word_sentence_counter_pipeline
+from gofai_language_detect_reference import reference_word_sentence_counter
+from gofai_language_detect_v52 import (
+    iter_lang_detect_spans,
+    lang_detect_word_sentence_counter,
+    lang_detect_word_sentence_counter_bytes,
+)
+from gofai_language_detect_vowels import (
+    lang_detect_word_sentence_counter_prefix_sums,
+    np,
+)
+
+DEFAULT_FUZZ_SEED = 50
+DEFAULT_FUZZ_DOCUMENTS = 5000
+MAX_REPORTED_MISMATCHES = 10
+# Small pieces, so that nearly every sentence straddles a cut
+DIFFERENTIAL_PIECE_CHARS = 48
+
+# Generated text
+FUZZ_CONTENT_WORDS = tuple(
+    "weather request garden river report window people market yellow quickly"
+    " strength rhythm crwth queue na\u00efve caf\u00e9 Z\u00fcrich \u0130stanbul"
+    " stra\u00dfe r\u00e9sum\u00e9 O'Neil well-known snake_case x I a Mrs NASA"
+    " iPhone".split()
+)
+FUZZ_ABBREVIATIONS = tuple(
+    "Mr. Mrs. Ms. Dr. Prof. Jr. St. vs. VS. etc. Etc. e.g. i.e. E.g. Inc. U.S."
+    " a.m.".split()
+)
+# hyphen, en and em dashes, runs of them, and two look-alikes
+FUZZ_DASHES = ("-", "--", "---", "–", "——", "—", "-–", "—-—", "\u2010", "\u2212")
+FUZZ_SYMBOLS = "!@#$%^&*<>{}[]\\|()/:;,\"'~`+=_?."
+# dotted / dotless i, letters that change length when lowercased or
+# uppercased, a ligature, CJK, an emoji, a combining accent, a zero-width space
+FUZZ_UNICODE_CHARS = (
+    "\u0130\u0131\u00df\u00e9\u00c9\u00f8\u00c6\u0153\ufb01\u03a9\u03c3\u0416"
+    "\u4e2d\U0001f600\u0301\u200b"
+)
+FUZZ_SENTENCE_ENDS = (".", ".", ".", "!", "?", "", "...", "?!", "!.", ". .", ".\u201d")
+# str.split() whitespace, ASCII (also the \x1c-\x1f separators) and not
+FUZZ_WHITESPACE = (" ", " ", " ", "  ", "\n", "\t", "\r\n", "\x0b", "\x0c", "\x1c")
+FUZZ_WHITESPACE += ("\x1f", "\x85", "\xa0", "\u2003", "\u2028", "\u3000")
+FUZZ_CHARACTER_ALPHABET = (
+    "aeiouy bcdfgstrhn TheAndIs.!?-–—' Mr. \n\t#$@\xa0" + FUZZ_UNICODE_CHARS
+)
+# (kind, weight): see generate_fuzz_document()
+FUZZ_DOCUMENT_KINDS = (
+    ("sentences", 6),
+    ("long_sentence", 2),
+    ("symbols", 1),
+    ("characters", 1),
+)
+
+
+def _fuzz_vocabulary() -> tuple[list[str], list[str]]:
+    """(stopwords, verbs/prepositions), sorted: the same for every seed."""
+    return (
+        sorted(lang_detect.NLTK_STOPWORDS_SET),
+        sorted(lang_detect.VERB_AND_PREPOS_TERMS_SET),
+    )
+
+
+def _fuzz_word(
+    rng: random.Random,
+    vocabulary: tuple[list[str], list[str]],
+    stopword_share: float,
+) -> str:
+    """A word, sometimes mutated to hit one of the word rules."""
+    stopwords, verbs_prepositions = vocabulary
+    pick = rng.random()
+    if pick < stopword_share:
+        word = rng.choice(stopwords)
+    elif pick < stopword_share + 0.25:
+        word = rng.choice(verbs_prepositions)
+    elif pick < stopword_share + 0.3:
+        return rng.choice(FUZZ_ABBREVIATIONS)
+    else:
+        word = rng.choice(FUZZ_CONTENT_WORDS)
+
+    mutation = rng.random()
+    if mutation < 0.04:
+        position = rng.randrange(len(word) + 1)
+        word = word[:position] + rng.choice(FUZZ_SYMBOLS) + word[position:]
+    elif mutation < 0.07:
+        word = word + rng.choice(FUZZ_DASHES) + rng.choice(FUZZ_CONTENT_WORDS)
+    elif mutation < 0.09:
+        position = rng.randrange(len(word) + 1)
+        word = word[:position] + rng.choice(FUZZ_UNICODE_CHARS) + word[position:]
+    elif mutation < 0.11:
+        word = word.upper()
+    elif mutation < 0.13:
+        word = word.capitalize()
+    elif mutation < 0.14:
+        word = word + str(rng.randrange(1000))
+    elif mutation < 0.15:
+        word = ".".join(word)
+    return word
+
+
+def _fuzz_sentence(
+    rng: random.Random,
+    vocabulary: tuple[list[str], list[str]],
+    length: int,
+    stopword_share: float = 0.35,
+) -> str:
+    words = [_fuzz_word(rng, vocabulary, stopword_share) for _ in range(length)]
+    if words and rng.random() < 0.5:
+        words[0] = words[0].capitalize()
+    if rng.random() < 0.1:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FUZZ_DASHES))
+    return _join_words(rng, words) + rng.choice(FUZZ_SENTENCE_ENDS)
+
+
+def _join_words(rng: random.Random, words: list[str]) -> str:
+    """words joined by single spaces, or now and then other whitespace."""
+    if rng.random() < 0.7:
+        return " ".join(words)
+    return "".join(word + rng.choice(FUZZ_WHITESPACE) for word in words).rstrip(" ")
+
+
+def generate_fuzz_document(
+    rng: random.Random,
+    vocabulary: tuple[list[str], list[str]] | None = None,
+) -> str:
+    """
+    One generated document, of a kind drawn from FUZZ_DOCUMENT_KINDS:
+        sentences       1 to 6 short sentences (0 to 14 words)
+        long_sentence   one sentence of MAX_WORDS_PER_SENTENCE - 2 to
+                        3 * MAX_WORDS_PER_SENTENCE words, often with few
+                        stopwords, sometimes followed by short sentences
+        symbols         tokens of symbols, dashes and letters
+        characters      random characters from FUZZ_CHARACTER_ALPHABET
+    """
+    vocabulary = vocabulary or _fuzz_vocabulary()
+    kinds, weights = zip(*FUZZ_DOCUMENT_KINDS)
+    kind = rng.choices(kinds, weights)[0]
+
+    if kind == "sentences":
+        sentences = [
+            _fuzz_sentence(rng, vocabulary, rng.randint(0, 14))
+            for _ in range(rng.randint(1, 6))
+        ]
+        return rng.choice(FUZZ_WHITESPACE).join(sentences)
+
+    if kind == "long_sentence":
+        max_words = lang_detect.MAX_WORDS_PER_SENTENCE
+        length = rng.randint(max_words - 2, 3 * max_words)
+        # few stopwords: segments near the (stricter) segment stopword rule
+        stopword_share = rng.choice((0.35, 0.06, 0.03))
+        sentences = [_fuzz_sentence(rng, vocabulary, length, stopword_share)]
+        for _ in range(rng.randint(0, 2)):
+            sentences.append(_fuzz_sentence(rng, vocabulary, rng.randint(3, 10)))
+        return " ".join(sentences)
+
+    if kind == "symbols":
+        alphabet = FUZZ_SYMBOLS + "".join(FUZZ_DASHES) + "aeiouxyz" + FUZZ_UNICODE_CHARS
+        tokens = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+            for _ in range(rng.randint(1, 20))
+        ]
+        return _join_words(rng, tokens)
+
+    return "".join(
+        rng.choice(FUZZ_CHARACTER_ALPHABET) for _ in range(rng.randint(0, 120))
+    )
+
+
+def generate_fuzz_documents(
+    count: int = DEFAULT_FUZZ_DOCUMENTS,
+    seed: int = DEFAULT_FUZZ_SEED,
+) -> list[str]:
+    """
+    count generated documents (see generate_fuzz_document()),
+    the same ones for the same seed.
+
+    Example:
+        >>> generate_fuzz_documents(2, seed=1) == generate_fuzz_documents(2, seed=1)
+        True
+    """
+    rng = random.Random(seed)
+    vocabulary = _fuzz_vocabulary()
+    return [generate_fuzz_document(rng, vocabulary) for _ in range(count)]
+
+
+def differential_documents(
+    count: int = DEFAULT_FUZZ_DOCUMENTS,
+    seed: int = DEFAULT_FUZZ_SEED,
+    corpora: bool = True,
+) -> list[str]:
+    """
+    The bundled test cases, the bundled corpora (if corpora) and
+    count generated documents.
+    """
+    test_cases = bundled_test_cases()
+    documents = test_cases["valid"] + test_cases["invalid"]
+    if corpora:
+        for name in BUNDLED_CORPORA:
+            if name == "wikipedia_samples_text_doc":
+                documents.append(read_bundled_corpus(name))
+            else:
+                documents.extend(bundled_corpus_lines(name))
+    return documents + generate_fuzz_documents(count, seed)
+
+
+# Engines: each scores a list of documents (str)
+# to a list of (words, sentences), in order
+
+
+def per_document(counter):
+    """An engine that scores each document with counter(document)."""
+
+    def engine(documents: list[str]) -> list[tuple[int, int]]:
+        return [counter(document) for document in documents]
+
+    return engine
+
+
+def _count_span_events(document: str) -> tuple[int, int]:
+    words = sentences = 0
+    for kind, _, _ in iter_lang_detect_spans(document):
+        if kind == "word":
+            words += 1
+        else:
+            sentences += 1
+    return (words, sentences)
+
+
+def _score_sentence_cut_pieces(document: str) -> tuple[int, int]:
+    """The summed counts of the pieces of split_document_at_sentences()."""
+    words = sentences = 0
+    for piece in split_document_at_sentences(document, DIFFERENTIAL_PIECE_CHARS):
+        piece_words, piece_sentences = lang_detect_word_sentence_counter(piece)
+        words += piece_words
+        sentences += piece_sentences
+    return (words, sentences)
+
+
+def _score_column(documents: list[str]) -> list[tuple[int, int]]:
+    words, sentences, _ = score_values(documents, chunk_rows=64)
+    return list(zip(words, sentences))
+
+
+DIFFERENTIAL_ENGINES = {
+    "standard": per_document(lang_detect_word_sentence_counter),
+    "bytes": per_document(
+        lambda document: lang_detect_word_sentence_counter_bytes(
+            document.encode("utf-8")
+        )
+    ),
+    "spans": per_document(_count_span_events),
+    "prefix_sums": per_document(
+        lambda document: lang_detect_word_sentence_counter_prefix_sums(
+            document, use_numpy=False
+        )
+    ),
+    "pipeline": per_document(lang_detect_word_sentence_counter_pipeline),
+    "lean": per_document(lang_detect_word_sentence_counter_lean),
+    "pieces": per_document(
+        lambda document: score_large_document(
+            document, piece_chars=DIFFERENTIAL_PIECE_CHARS
+        )
+    ),
+    "sentence_cuts": per_document(_score_sentence_cut_pieces),
+    "guards_off": per_document(
+        lambda document: score_document_guarded(document, None, None)[:2]
+    ),
+    "column": _score_column,
+}
+if np is not None:
+    DIFFERENTIAL_ENGINES["prefix_sums_numpy"] = per_document(
+        lambda document: lang_detect_word_sentence_counter_prefix_sums(
+            document, use_numpy=True
+        )
+    )
+
+REFERENCE_ENGINE = per_document(reference_word_sentence_counter)
+
+
+def _timed_results(engine, documents: list[str], rounds: int) -> tuple[float, list]:
+    """(fastest of rounds runs, results of the last run)."""
+    best_seconds = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = engine(documents)
+        seconds = time.perf_counter() - start
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+    return (best_seconds, results)
+
+
+def compare_engines(
+    documents: list[str],
+    engines: dict | None = None,
+    rounds: int = 1,
+) -> dict:
+    """
+    Scores documents with the reference and with each engine,
+    and compares the results per document.
+
+    Args:
+        documents (list[str]): texts to score
+        engines (dict | None): {name: engine}, default DIFFERENTIAL_ENGINES.
+            An engine scores a list of documents to a list of
+            (words, sentences), in order (see per_document()).
+        rounds (int): runs per engine; the fastest one is timed
+
+    Returns:
+        dict: {
+            "documents": int, "chars": int, "reference_seconds": float,
+            "engines": {name: {
+                "seconds": float,
+                "throughput_ratio": float (reference seconds / seconds),
+                "mismatch_count": int,
+                "mismatches": [(document index, reference result, result), ...]
+                    (the first MAX_REPORTED_MISMATCHES),
+            }},
+        }
+
+    Raises:
+        ValueError: if an engine returns a result list of another length
+    """
+    engines = DIFFERENTIAL_ENGINES if engines is None else engines
+    reference_seconds, expected = _timed_results(REFERENCE_ENGINE, documents, rounds)
+
+    report: dict = {
+        "documents": len(documents),
+        "chars": sum(map(len, documents)),
+        "reference_seconds": reference_seconds,
+        "engines": {},
+    }
+    for name, engine in engines.items():
+        seconds, results = _timed_results(engine, documents, rounds)
+        if len(results) != len(expected):
+            raise ValueError(
+                f"engine {name!r}: {len(results)} results for {len(expected)} documents"
+            )
+        mismatches = [
+            (index, expected_result, tuple(result))
+            for index, (expected_result, result) in enumerate(zip(expected, results))
+            if tuple(result) != expected_result
+        ]
+        report["engines"][name] = {
+            "seconds": seconds,
+            "throughput_ratio": reference_seconds / seconds if seconds else float("inf"),
+            "mismatch_count": len(mismatches),
+            "mismatches": mismatches[:MAX_REPORTED_MISMATCHES],
+        }
+    return report
+
+
+def format_differential_report(report: dict, documents: list[str] | None = None) -> str:
+    """
+    The report of compare_engines() as a table, with the mismatched
+    documents (shortened) when documents are given.
+    """
+    lines = [
+        f"{report['documents']:,} documents, {report['chars']:,} chars; "
+        f"reference {report['reference_seconds']:.2f} s",
+        f"{'engine':<20}{'seconds':>9}{'x reference':>13}{'mismatches':>12}",
+    ]
+    for name, engine_report in report["engines"].items():
+        lines.append(
+            f"{name:<20}{engine_report['seconds']:>9.2f}"
+            f"{engine_report['throughput_ratio']:>13.2f}"
+            f"{engine_report['mismatch_count']:>12}"
+        )
+    for name, engine_report in report["engines"].items():
+        for index, expected, result in engine_report["mismatches"]:
+            line = f"  {name}: document {index}: reference {expected}, engine {result}"
+            if documents is not None:
+                line += f": {documents[index][:120]!r}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare every lang-detect engine with the frozen reference."
+    )
+    parser.add_argument("--count", type=int, default=DEFAULT_FUZZ_DOCUMENTS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_FUZZ_SEED)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=sorted(DIFFERENTIAL_ENGINES),
+        help="default: all",
+    )
+    parser.add_argument(
+        "--no-corpora", action="store_true", help="generated documents only"
+    )
+    args = parser.parse_args(argv)
+
+    documents = differential_documents(args.count, args.seed, not args.no_corpora)
+    engines = DIFFERENTIAL_ENGINES
+    if args.engines:
+        engines = {name: DIFFERENTIAL_ENGINES[name] for name in args.engines}
+    report = compare_engines(documents, engines, args.rounds)
+    print(format_differential_report(report, documents))
+    if any(engine["mismatch_count"] for engine in report["engines"].values()):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+"""
+# Language-Detect: per-document guards
+
+Scoring time grows with document size, and with the size of each token:
+is_valid_english_word() slices and scans a whole token before the capped
+length check of check_vowel_count_for_length(). A 20 MB string with no
+whitespace, or a pasted binary blob, can hold a worker for seconds
+and blow out the p99 latency of everything queued behind it.
+
+score_document_guarded() scores a document with three guards:
+
+1. max_token_chars: whitespace-delimited runs longer than this are
+   rejected (dropped) by one regex pass, before any per-character work.
+   Such runs are never words in practice (see DEFAULT_MAX_TOKEN_CHARS);
+   results change only for documents that have one.
+2. max_document_chars: larger documents are, by oversize_policy,
+   "truncate": scored up to the first whitespace after max_document_chars,
+       or cut at max_document_chars when no whitespace follows within
+       max_token_chars (DEFAULT_MAX_TOKEN_CHARS when that is None),
+   "approximate": scored on APPROXIMATE_SAMPLES windows spread over the
+       document, max_document_chars in all, with the counts scaled up
+       to the whole document.
+3. time_budget_seconds: the document is scored in pieces of about
+   BUDGET_PIECE_CHARS, cut at whitespace; once the budget is spent, the
+   remaining pieces are skipped. The counts of the scored pieces are
+   exactly those of the scored prefix (see merge_document_pieces()).
+   At least one piece is always scored.
+
+Results from part of a document (2. and 3.) are flagged truncated.
+Guard activations are counted for the process, see guard_counters().
+
+Example:
+    >>> score_document_guarded("-" * 20_000_000)
+    (0, 0, False)
+    >>> guard_counters()["long_tokens"]
+    1
+"""
+
+import re
+import threading
+import time
+from functools import lru_cache
+
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_batch import (
+    WHITESPACE_RE,
+    iter_split_document_at_whitespace,
+    merge_document_pieces,
+    score_document_piece,
+)
+
+# Longer whitespace-delimited runs are rejected; the bundled wikipedia
+# sample has no run over 256 characters, and only 2 over 100 (URLs)
+DEFAULT_MAX_TOKEN_CHARS = 256
+# about a second of scoring, at the standard profile's speed
+DEFAULT_MAX_DOCUMENT_CHARS = 1_000_000
+OVERSIZE_POLICIES = ("truncate", "approximate")
+APPROXIMATE_SAMPLES = 8
+# Characters scored between clock checks, with a time budget
+BUDGET_PIECE_CHARS = 16_384
+
+GUARD_COUNTER_NAMES = (
+    "documents",  # documents scored by score_document_guarded()
+    "long_tokens",  # runs over max_token_chars rejected
+    "long_token_chars",  # characters in those runs
+    "truncated",  # oversize documents truncated
+    "approximated",  # oversize documents approximated
+    "time_budget_exceeded",  # documents whose time budget ran out
+    "skipped_chars",  # characters not scored (oversize or out of time)
+)
+
+_guard_counters = dict.fromkeys(GUARD_COUNTER_NAMES, 0)
+_guard_counters_lock = threading.Lock()
+
+
+def guard_counters() -> dict[str, int]:
+    """A snapshot of the GUARD_COUNTER_NAMES counters of this process."""
+    with _guard_counters_lock:
+        return dict(_guard_counters)
+
+
+def reset_guard_counters() -> dict[str, int]:
+    """Sets the counters to 0, and returns their values from before."""
+    global _guard_counters
+    with _guard_counters_lock:
+        counters = _guard_counters
+        _guard_counters = dict.fromkeys(GUARD_COUNTER_NAMES, 0)
+    return counters
+
+
+def _count_guards(**increments: int) -> None:
+    with _guard_counters_lock:
+        for name, increment in increments.items():
+            _guard_counters[name] += increment
+
+
+@lru_cache(maxsize=16)
+def _long_run_re(max_token_chars: int) -> re.Pattern:
+    # anchored at run starts: each character is looked at about once
+    return re.compile(r"(?<!\S)\S{%d,}" % (max_token_chars + 1))
+
+
+def drop_long_tokens(text: str, max_token_chars: int) -> tuple[str, int, int]:
+    """
+    Replaces each whitespace-delimited run longer than max_token_chars
+    with a space.
+
+    Returns:
+        tuple[str, int, int]: (text, runs dropped, characters dropped)
+
+    Example:
+        >>> drop_long_tokens("a " + "x" * 9 + " b", 8)
+        ('a   b', 1, 9)
+    """
+    if len(text) <= max_token_chars:
+        return (text, 0, 0)
+    long_runs = 0
+    long_run_chars = 0
+
+    def drop(match: re.Match) -> str:
+        nonlocal long_runs, long_run_chars
+        long_runs += 1
+        long_run_chars += match.end() - match.start()
+        return " "
+
+    text = _long_run_re(max_token_chars).sub(drop, text)
+    return (text, long_runs, long_run_chars)
+
+
+def _next_whitespace(text: str, position: int, max_token_chars: int) -> int:
+    """
+    position, moved on to the next whitespace (or the end of text) within
+    max_token_chars; without whitespace that near, position itself (a hard cut).
+    """
+    search_end = position + max_token_chars + 1
+    match = WHITESPACE_RE.search(text, position, search_end)
+    if match is not None:
+        return match.start()
+    return len(text) if search_end >= len(text) else position
+
+
+def sample_windows(
+    text: str,
+    sample_chars: int,
+    samples: int,
+    max_token_chars: int = DEFAULT_MAX_TOKEN_CHARS,
+) -> list[str]:
+    """
+    samples windows of about sample_chars / samples characters,
+    evenly spread over text, each starting and ending at whitespace
+    when there is whitespace within max_token_chars (else cut there).
+    """
+    window_chars = max(sample_chars // samples, 1)
+    windows = []
+    previous_end = 0
+    for sample in range(samples):
+        start = max(
+            _next_whitespace(text, len(text) * sample // samples, max_token_chars),
+            previous_end,
+        )
+        end = _next_whitespace(text, start + window_chars, max_token_chars)
+        if start < end:
+            windows.append(text[start:end])
+        previous_end = end
+    return windows
+
+
+def _score_until(text: str, profile: str, deadline: float | None) -> tuple:
+    """(words, sentences, characters scored) of text, or of its prefix at deadline."""
+    if deadline is None or len(text) <= BUDGET_PIECE_CHARS:
+        return (*lang_detect.lang_detect_word_sentence_counter(text, profile), len(text))
+    piece_results = []
+    scored_chars = 0
+    for piece in iter_split_document_at_whitespace(text, BUDGET_PIECE_CHARS):
+        if piece_results and time.perf_counter() >= deadline:
+            break
+        piece_results.append(score_document_piece(piece, profile))
+        scored_chars += len(piece)
+    return (*merge_document_pieces(piece_results, profile), scored_chars)
+
+
+def score_document_guarded(
+    document: str | bytes,
+    max_token_chars: int | None = DEFAULT_MAX_TOKEN_CHARS,
+    max_document_chars: int | None = DEFAULT_MAX_DOCUMENT_CHARS,
+    oversize_policy: str = "truncate",
+    time_budget_seconds: float | None = None,
+    profile: str = "standard",
+    prescreen: bool = False,
+) -> tuple[int, int, bool]:
+    """
+    lang_detect_word_sentence_counter(), with the per-document guards.
+
+    Args:
+        document (str | bytes): text, or UTF-8 encoded text
+        max_token_chars (int | None): longest whitespace-delimited run kept;
+            None: no limit
+        max_document_chars (int | None): most characters scored; None: no limit
+        oversize_policy (str): "truncate" or "approximate", see OVERSIZE_POLICIES
+        time_budget_seconds (float | None): wall-clock budget; None: no limit
+        profile (str), prescreen (bool): see lang_detect_word_sentence_counter().
+            The prescreen looks at the whole document.
+
+    Returns:
+        tuple[int, int, bool]: (words, sentences, truncated),
+            truncated: the counts are from part of the document
+            (truncated or out of time), or scaled up from samples
+
+    Raises:
+        ValueError: on an unknown oversize_policy or profile
+
+    Example:
+        >>> text = "He had a great time there. " * 100_000
+        >>> score_document_guarded(text, max_document_chars=100_000)
+        (18519, 3704, True)
+        >>> score_document_guarded(
+        ...     text, max_document_chars=100_000, oversize_policy="approximate"
+        ... )
+        (500000, 100000, True)
+    """
+    if oversize_policy not in OVERSIZE_POLICIES:
+        raise ValueError(
+            f"unknown oversize_policy {oversize_policy!r}, use one of {OVERSIZE_POLICIES}"
+        )
+    if profile not in lang_detect.DETECTOR_PROFILES:
+        raise ValueError(
+            f"unknown profile {profile!r}, use one of {lang_detect.DETECTOR_PROFILES}"
+        )
+    started = time.perf_counter()
+    deadline = None if time_budget_seconds is None else started + time_budget_seconds
+    text = document if isinstance(document, str) else str(document, "utf-8", "replace")
+    _count_guards(documents=1)
+
+    if prescreen and not lang_detect.prescreen_text_for_language(text):
+        return (0, 0, False)
+
+    if max_token_chars is not None:
+        text, long_runs, long_run_chars = drop_long_tokens(text, max_token_chars)
+        if long_runs:
+            _count_guards(long_tokens=long_runs, long_token_chars=long_run_chars)
+
+    if max_document_chars is None or len(text) <= max_document_chars:
+        words, sentences, scored_chars = _score_until(text, profile, deadline)
+        out_of_time = scored_chars < len(text)
+        if out_of_time:
+            _count_guards(time_budget_exceeded=1, skipped_chars=len(text) - scored_chars)
+        return (words, sentences, out_of_time)
+
+    # runs are at most max_token_chars long now: a cut point is that near
+    cut_search_chars = max_token_chars
+    if cut_search_chars is None:
+        cut_search_chars = DEFAULT_MAX_TOKEN_CHARS
+    if oversize_policy == "truncate":
+        prefix = text[: _next_whitespace(text, max_document_chars, cut_search_chars)]
+        words, sentences, scored_chars = _score_until(prefix, profile, deadline)
+        _count_guards(
+            truncated=1,
+            time_budget_exceeded=int(scored_chars < len(prefix)),
+            skipped_chars=len(text) - scored_chars,
+        )
+        return (words, sentences, True)
+
+    # approximate: score the windows while there is time, and scale up
+    words = sentences = scored_chars = 0
+    for window in sample_windows(
+        text, max_document_chars, APPROXIMATE_SAMPLES, cut_search_chars
+    ):
+        if scored_chars and deadline is not None and time.perf_counter() >= deadline:
+            _count_guards(time_budget_exceeded=1)
+            break
+        window_words, window_sentences, window_chars = _score_until(
+            window, profile, deadline
+        )
+        words += window_words
+        sentences += window_sentences
+        scored_chars += window_chars
+        if window_chars < len(window):
+            _count_guards(time_budget_exceeded=1)
+            break
+    _count_guards(approximated=1, skipped_chars=len(text) - scored_chars)
+    if not scored_chars:
+        return (0, 0, True)
+    scale = len(text) / scored_chars
+    return (round(words * scale), round(sentences * scale), True)
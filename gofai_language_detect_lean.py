@@ -0,0 +1,254 @@
+"""
+# Language-Detect: memory-lean counting
+
+For batch jobs over millions of documents. The standard pipeline makes
+several short-lived strings for every token of every document:
+two normalized copies of the text, the token list, a lowercase copy of
+each word for the category lookup, the word_part and punct_part slices
+of each sentence-ending word, and the lists of words per sentence.
+
+lang_detect_word_sentence_counter_lean() gives exactly the results of
+the standard profile, with:
+
+1. one str.split() per piece of text (LEAN_TEXT_PIECE_CHARS, cut at
+   whitespace), and no other copy of the text: a run is de-duplicated
+   or split after its periods only when it has to be;
+2. a token cache, shared by all calls: each distinct token of up to
+   LEAN_CACHE_MAX_TOKEN_CHARS characters is looked up once (word rules,
+   lowercase copy, category flags), and the result is kept as one int,
+   packed with the TOKEN_* bits. The first LEAN_TOKEN_CACHE_SIZE distinct
+   tokens are kept, so the frequent ones are (one interned copy each);
+   later duplicates are freed as soon as they are looked up;
+3. punctuation splits as offsets: a word ending a sentence counts as its
+   word part when the token is longer than one character, with no slice;
+4. no lowercase copy of a token that is already lowercase;
+5. sentences as running counts (words, verbs/prepositions, stopwords,
+   and the same for the current SPLIT_SENTENCES_ON_N_WORDS segment)
+   instead of lists of words.
+
+The cache is dropped when the detector tables change
+(load_detector_config(), register_category_words()).
+
+See benchmarks/benchmark_memory_lean.py for tracemalloc peaks and RSS.
+
+Example:
+    >>> lang_detect_word_sentence_counter_lean("He had a great time there.")
+    (5, 1)
+"""
+
+import re
+
+import gofai_language_detect_v52 as lang_detect
+
+# about 2.5 MB when full; the bundled corpora have 41k distinct tokens
+LEAN_TOKEN_CACHE_SIZE = 32_768
+LEAN_CACHE_MAX_TOKEN_CHARS = 24
+# Longer texts are split (at whitespace) in pieces of about this size
+LEAN_TEXT_PIECE_CHARS = 64 * 1024
+
+# Token cache values: TOKEN_* bits, and the category flags above them
+TOKEN_VALID = 1  # passes is_valid_english_word()
+TOKEN_ENDS_SENTENCE = 2  # ends in SENTENCE_ENDINGS, not an abbreviation
+TOKEN_IN_SENTENCE = 4  # adds a word to its sentence (not a bare mark)
+TOKEN_FLAGS_SHIFT = 3
+
+WHITESPACE_RE = re.compile(r"\s")
+
+_token_cache: dict[str, int] = {}
+_token_cache_tables: tuple = ()
+
+
+def token_info(token: str) -> int:
+    """
+    The TOKEN_* bits and category flags of one token.
+
+    Example:
+        >>> token_info("o!#K")
+        0
+        >>> bool(token_info("went.") & TOKEN_ENDS_SENTENCE)
+        True
+    """
+    if not lang_detect.is_valid_english_word(token):
+        return 0
+    # lower() changes no character of a str.islower() token
+    flags = lang_detect.TOKEN_CATEGORY_FLAGS.get(
+        token if token.islower() else token.lower(), 0
+    )
+    info = TOKEN_VALID | flags << TOKEN_FLAGS_SHIFT
+    if (
+        token[-1] in lang_detect.SENTENCE_ENDINGS
+        and not flags & lang_detect.CATEGORY_ABBREVIATION
+    ):
+        info |= TOKEN_ENDS_SENTENCE
+        if len(token) > 1:
+            info |= TOKEN_IN_SENTENCE
+    else:
+        info |= TOKEN_IN_SENTENCE
+    return info
+
+
+def current_token_cache() -> dict[str, int]:
+    """The token cache, emptied first if the detector tables have changed."""
+    global _token_cache, _token_cache_tables
+    tables = (
+        lang_detect.LEN_TO_N_VOWELS,
+        lang_detect.TOKEN_CATEGORY_FLAGS,
+        lang_detect.INVALID_SYMBOLS,
+        lang_detect.SENTENCE_ENDINGS,
+    )
+    if len(tables) != len(_token_cache_tables) or any(
+        table is not cached_table
+        for table, cached_table in zip(tables, _token_cache_tables)
+    ):
+        _token_cache = {}
+        _token_cache_tables = tables
+    return _token_cache
+
+
+def _iter_text_pieces(text: str):
+    """text, or for long text pieces of it cut at whitespace (no run is cut)."""
+    if len(text) <= LEAN_TEXT_PIECE_CHARS:
+        yield text
+        return
+    piece_start = 0
+    while len(text) - piece_start > LEAN_TEXT_PIECE_CHARS:
+        match = WHITESPACE_RE.search(text, piece_start + LEAN_TEXT_PIECE_CHARS)
+        if match is None:
+            break
+        yield text[piece_start : match.start()]
+        piece_start = match.start()
+    yield text[piece_start:]
+
+
+def _accepted_sentences(
+    words: int,
+    verbs_prepositions: int,
+    stopwords: int,
+    segment_length: int,
+    segment_verbs_prepositions: int,
+    segment_stopwords: int,
+    accepted_segments: int,
+) -> int:
+    """
+    Sentences split_wordlist_into_sentences_and_filter() accepts
+    for one potential sentence, from its running counts.
+    """
+    if words > lang_detect.MAX_WORDS_PER_SENTENCE:
+        # a segment that passes implies the whole sentence does
+        return accepted_segments + _segment_passes(
+            segment_length, segment_verbs_prepositions, segment_stopwords
+        )
+    return int(
+        words >= lang_detect.MIN_WORDS_PER_SENTENCE
+        and verbs_prepositions >= lang_detect.MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+        and stopwords >= lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+    )
+
+
+def _segment_passes(length: int, verbs_prepositions: int, stopwords: int) -> bool:
+    """The (stricter) rules for the segments of an over-long sentence."""
+    return (
+        length >= lang_detect.MIN_WORDS_PER_SENTENCE
+        and verbs_prepositions >= lang_detect.MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+        and stopwords > lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+    )
+
+
+def lang_detect_word_sentence_counter_lean(input_text: str) -> tuple[int, int]:
+    """
+    lang_detect_word_sentence_counter() (standard profile), memory-lean:
+    see the module docstring.
+
+    Returns:
+        tuple[int, int]: (words, sentences)
+    """
+    cache = current_token_cache()
+    cache_room = LEAN_TOKEN_CACHE_SIZE - len(cache)
+    remove_duplicate_chars = lang_detect.remove_duplicate_chars
+
+    segment_words = lang_detect.SPLIT_SENTENCES_ON_N_WORDS
+    verb_prepos_bit = lang_detect.CATEGORY_VERB_PREPOS << TOKEN_FLAGS_SHIFT
+    stopword_bit = lang_detect.CATEGORY_STOPWORD << TOKEN_FLAGS_SHIFT
+
+    word_count = 0
+    sentence_count = 0
+    # the sentence in progress, and its segment in progress
+    sentence_words = sentence_verbs_prepositions = sentence_stopwords = 0
+    segment_length = segment_verbs_prepositions = segment_stopwords = 0
+    accepted_segments = 0
+
+    for piece in _iter_text_pieces(input_text):
+        for run in piece.split():
+            run = remove_duplicate_chars(run)
+            # "there." is one token; "a.b." is split after each period
+            if run.find(".", 0, len(run) - 1) == -1:
+                tokens = (run,)
+            else:
+                tokens = run.replace(".", ". ").split()
+
+            for token in tokens:
+                info = cache.get(token)
+                if info is None:
+                    info = token_info(token)
+                    if cache_room > 0 and len(token) <= LEAN_CACHE_MAX_TOKEN_CHARS:
+                        cache[token] = info
+                        cache_room -= 1
+                if not info & TOKEN_VALID:
+                    continue
+                word_count += 1
+
+                if info & TOKEN_IN_SENTENCE:
+                    is_verb_prepos = 1 if info & verb_prepos_bit else 0
+                    is_stopword = 1 if info & stopword_bit else 0
+                    sentence_words += 1
+                    sentence_verbs_prepositions += is_verb_prepos
+                    sentence_stopwords += is_stopword
+                    segment_length += 1
+                    segment_verbs_prepositions += is_verb_prepos
+                    segment_stopwords += is_stopword
+                    if segment_length == segment_words:
+                        accepted_segments += _segment_passes(
+                            segment_length, segment_verbs_prepositions, segment_stopwords
+                        )
+                        segment_length = segment_verbs_prepositions = 0
+                        segment_stopwords = 0
+
+                if info & TOKEN_ENDS_SENTENCE:
+                    sentence_count += _accepted_sentences(
+                        sentence_words,
+                        sentence_verbs_prepositions,
+                        sentence_stopwords,
+                        segment_length,
+                        segment_verbs_prepositions,
+                        segment_stopwords,
+                        accepted_segments,
+                    )
+                    sentence_words = sentence_verbs_prepositions = 0
+                    sentence_stopwords = 0
+                    segment_length = segment_verbs_prepositions = 0
+                    segment_stopwords = accepted_segments = 0
+
+    if sentence_words:
+        sentence_count += _accepted_sentences(
+            sentence_words,
+            sentence_verbs_prepositions,
+            sentence_stopwords,
+            segment_length,
+            segment_verbs_prepositions,
+            segment_stopwords,
+            accepted_segments,
+        )
+    return (word_count, sentence_count)
+
+
+def score_batch_lean(documents: list[str | bytes]) -> list[tuple[int, int]]:
+    """
+    score_batch() (standard profile) with the lean counter.
+    bytes are decoded as UTF-8, invalid bytes replaced.
+    """
+    return [
+        lang_detect_word_sentence_counter_lean(
+            document if isinstance(document, str) else str(document, "utf-8", "replace")
+        )
+        for document in documents
+    ]
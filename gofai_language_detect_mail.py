@@ -0,0 +1,256 @@
+"""
+# Language-Detect: mail input
+
+Reads email straight from mbox files and .eml files, one document
+per message, for the command line scorer (--split mbox / --split eml):
+no export step, no intermediate file.
+
+## Message text
+The text/plain parts of a message, transfer encoding (base64,
+quoted-printable) and charset decoded; attachments are skipped.
+With include_html, a message with no text/plain part uses its text/html
+parts, with tags, scripts and styles stripped.
+
+## Quoted replies
+Unless keep_quotes, quoted reply chains are dropped:
+    "> ..." lines (and <blockquote> in html parts)
+    "On <date>, <someone> wrote:" attributions (on one or two lines),
+        only with a date or time, or an email address, in them,
+        and only when "> " lines follow (else they are ordinary text)
+    "-----Original Message-----" and Outlook "From: / Sent:" headers,
+        with the rest of the text
+
+## Streaming
+An mbox is read line by line and parsed one message at a time,
+so memory use is that of the largest message, not of the mbox;
+stdin works as well as files.
+
+Example:
+    python3 gofai_language_detect_cli.py inbox.mbox --split mbox --jobs 8
+    python3 gofai_language_detect_cli.py maildir/ --split eml --html > scores.jsonl
+"""
+
+import re
+from html.parser import HTMLParser
+
+MAIL_SPLIT_MODES = ("mbox", "eml")
+EML_SUFFIX = ".eml"
+
+# mboxrd escapes body lines starting with "From " as ">From ", ">>From ", ...
+MBOX_ESCAPED_FROM_RE = re.compile(rb"^>(>*From )")
+
+REPLY_ATTRIBUTION_RE = re.compile(r"^\s*On\s.{1,300}\swrote:\s*$", re.IGNORECASE)
+# What makes "On ... wrote:" an attribution: a date or time, or an address
+REPLY_ATTRIBUTION_DATE_RE = re.compile(
+    r"\b\d{1,2}:\d{2}\b"  # 10:00
+    r"|\b(19|20)\d{2}\b"  # 2024
+    r"|\b\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}\b"  # 2024-06-03, 3/6/24
+    r"|\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}\b"
+    r"|\b\d{1,2}\.?\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)",
+    re.IGNORECASE,
+)
+REPLY_ATTRIBUTION_ADDRESS_RE = re.compile(r"[^\s<>@]+@[^\s<>@]+\.\w+")
+REPLY_SEPARATOR_RE = re.compile(
+    r"^\s*(-{2,}\s*(Original|Forwarded) Message\s*-{2,}|_{20,})\s*$", re.IGNORECASE
+)
+OUTLOOK_HEADER_RE = re.compile(r"^\s*\*?From:\*?\s", re.IGNORECASE)
+OUTLOOK_NEXT_HEADER_RE = re.compile(r"^\s*\*?(Sent|Date|To):\*?\s", re.IGNORECASE)
+
+# Tags whose text is not message text
+HTML_SKIPPED_TAGS = frozenset(("script", "style", "head", "title"))
+# Tags that end a line of text
+HTML_BLOCK_TAGS = frozenset(
+    ("p", "br", "div", "li", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6", "hr")
+)
+
+
+def iter_mbox_messages(binary_file):
+    """
+    Yields the raw bytes of each message of an mbox, read line by line.
+
+    A message starts at a "From " line (as in the mailbox module);
+    ">From " escapes in bodies are undone.
+    """
+    lines: list[bytes] = []
+    in_message = False
+    for line in binary_file:
+        if line.startswith(b"From "):
+            if in_message:
+                yield b"".join(lines)
+            lines = []
+            in_message = True
+            continue
+        if not in_message:
+            continue
+        if line.startswith(b">"):
+            line = MBOX_ESCAPED_FROM_RE.sub(rb"\1", line)
+        lines.append(line)
+    if in_message:
+        yield b"".join(lines)
+
+
+class _HTMLTextExtractor(HTMLParser):
+    def __init__(self, keep_quotes: bool):
+        super().__init__(convert_charrefs=True)
+        self.keep_quotes = keep_quotes
+        self.parts: list[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_SKIPPED_TAGS or (tag == "blockquote" and not self.keep_quotes):
+            self.skip_depth += 1
+        elif tag in HTML_BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in HTML_SKIPPED_TAGS or (tag == "blockquote" and not self.keep_quotes):
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in HTML_BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str, keep_quotes: bool = False) -> str:
+    """The text of an html part: no tags, scripts or styles; blocks on own lines."""
+    extractor = _HTMLTextExtractor(keep_quotes)
+    extractor.feed(html)
+    extractor.close()
+    return "".join(extractor.parts)
+
+
+def _is_attribution(text: str) -> bool:
+    """True for "On ... wrote:" text with a date, time or email address in it."""
+    return bool(
+        REPLY_ATTRIBUTION_RE.match(text)
+        and (
+            REPLY_ATTRIBUTION_DATE_RE.search(text)
+            or REPLY_ATTRIBUTION_ADDRESS_RE.search(text)
+        )
+    )
+
+
+def _attribution_lines(lines: list[str], index: int) -> int:
+    """
+    Lines (0, 1 or 2) of the "On ... wrote:" attribution at lines[index],
+    counted only when "> " quoted lines follow it.
+    """
+    line = lines[index]
+    if _is_attribution(line):
+        attribution_lines = 1
+    elif (
+        index + 1 < len(lines)
+        and line.lstrip().lower().startswith("on ")
+        and _is_attribution(line + " " + lines[index + 1])
+    ):
+        attribution_lines = 2
+    else:
+        return 0
+    following = next(
+        (
+            next_line
+            for next_line in lines[index + attribution_lines :]
+            if next_line.strip()
+        ),
+        "",
+    )
+    return attribution_lines if following.lstrip().startswith(">") else 0
+
+
+def strip_quoted_reply(text: str) -> str:
+    """text without its quoted reply chain (see "Quoted replies")."""
+    lines = text.splitlines()
+    kept = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if line.lstrip().startswith(">"):
+            index += 1
+            continue
+        if REPLY_SEPARATOR_RE.match(line):
+            break
+        if OUTLOOK_HEADER_RE.match(line) and any(
+            OUTLOOK_NEXT_HEADER_RE.match(next_line)
+            for next_line in lines[index + 1 : index + 3]
+        ):
+            break
+        attribution_lines = _attribution_lines(lines, index)
+        if attribution_lines:
+            index += attribution_lines
+            continue
+        kept.append(line)
+        index += 1
+    return "\n".join(kept)
+
+
+def _iter_body_parts(part):
+    """The leaf parts of a message, not descending into attachments."""
+    if part.get_content_disposition() == "attachment":
+        return
+    if part.is_multipart():
+        for subpart in part.get_payload():
+            yield from _iter_body_parts(subpart)
+    else:
+        yield part
+
+
+def _part_text(part) -> str:
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, "replace")
+    except LookupError:  # unknown charset name
+        return payload.decode("utf-8", "replace")
+
+
+def message_text(
+    message_bytes: bytes,
+    include_html: bool = False,
+    keep_quotes: bool = False,
+) -> tuple[str, str | None]:
+    """
+    The text of one raw message (see "Message text" and "Quoted replies").
+
+    Returns:
+        tuple: (text, Message-ID header or None)
+    """
+    # imported here: the email package takes longer to import than the
+    # detector, and the command line scorer only needs it for mail
+    from email.parser import BytesParser
+
+    message = BytesParser().parsebytes(message_bytes)
+    plain_parts = []
+    html_parts = []
+    for part in _iter_body_parts(message):
+        content_type = part.get_content_type()
+        if content_type == "text/plain":
+            plain_parts.append(_part_text(part))
+        elif include_html and content_type == "text/html":
+            html_parts.append(html_to_text(_part_text(part), keep_quotes))
+
+    text = "\n\n".join(plain_parts or html_parts)
+    if not keep_quotes:
+        text = strip_quoted_reply(text)
+    message_id = message.get("Message-ID")
+    return (text, str(message_id).strip() if message_id is not None else None)
+
+
+def iter_mail_documents(
+    binary_file,
+    split: str,
+    include_html: bool = False,
+    keep_quotes: bool = False,
+):
+    """
+    Yields (message text, Message-ID or None) per message of a binary input:
+    every message of an mbox, or the one message of an .eml file.
+    """
+    if split == "mbox":
+        for message_bytes in iter_mbox_messages(binary_file):
+            yield message_text(message_bytes, include_html, keep_quotes)
+    elif split == "eml":
+        yield message_text(binary_file.read(), include_html, keep_quotes)
+    else:
+        raise ValueError(f"unknown split {split!r}, use one of {MAIL_SPLIT_MODES}")
@@ -0,0 +1,279 @@
+"""
+# Language-Detect: rule packs
+
+The word rules of the detector are language specific
+(vowels, vowel counts per word length, stopwords, verbs/prepositions,
+abbreviations); the symbol and sentence structure rules are not.
+A rule pack holds one language's word rules, so one pass over a text
+can score it for several languages at once.
+
+## Pack files (json)
+    {
+      "language": "es",
+      "vowels": "aeiouyáéíóúü",
+      "len_to_n_vowels": {"2": [1], "3": [1, 2, 3], ...},
+      "stopwords": [...],
+      "verb_prepos": [...],
+      "abbreviations": ["sr.", ...]
+    }
+Keys starting with "_" (notes) are ignored.
+Bundled packs are in rule_packs/ (see BUNDLED_RULE_PACKS_DIR);
+"en" is built from the detector's own tables (see english_rule_pack_dict()),
+so its results are exactly those of lang_detect_word_sentence_counter().
+The non-English packs are provisional: calibrate them on labelled text.
+
+## Multi-pack scoring
+lang_detect_rule_packs() tokenizes once (the standard pipeline's
+sanitize_and_split_text()), then, in the same token loop, checks each
+token against every pack and keeps one sentence in progress per pack.
+best_rule_pack_language() returns the best-scoring language:
+most sentences, then most words found in the pack's word lists.
+
+Example:
+    >>> packs = load_rule_packs(["en", "es"])
+    >>> best_rule_pack_language("El perro está en la casa con los niños.", packs)
+    ('es', 9, 1)
+"""
+
+import json
+import os
+
+import gofai_language_detect_v52 as lang_detect
+
+BUNDLED_RULE_PACKS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "rule_packs"
+)
+
+RULE_PACK_KEYS = (
+    "language",
+    "vowels",
+    "len_to_n_vowels",
+    "stopwords",
+    "verb_prepos",
+    "abbreviations",
+)
+
+# Pack list name -> detector token category
+RULE_PACK_CATEGORIES = {
+    "stopwords": "stopword",
+    "verb_prepos": "verb_prepos",
+    "abbreviations": "abbreviation",
+}
+
+
+class RulePack:
+    """
+    One language's word rules, compiled for scoring.
+
+    Attributes:
+        language (str): e.g. "en"
+        vowels_delete_table (dict): str.translate() table deleting the vowels
+        len_to_n_vowels (dict[int, frozenset[int]]): as LEN_TO_N_VOWELS
+        min_word_len, max_word_len (int): bounds of len_to_n_vowels
+        token_flags (dict[str, int]): as TOKEN_CATEGORY_FLAGS
+    """
+
+    def __init__(self, pack: dict):
+        unknown_keys = [
+            key for key in pack if not key.startswith("_") and key not in RULE_PACK_KEYS
+        ]
+        if unknown_keys:
+            raise ValueError(f"unknown rule pack keys: {unknown_keys}")
+        missing_keys = [key for key in RULE_PACK_KEYS if key not in pack]
+        if missing_keys:
+            raise ValueError(f"rule pack is missing keys: {missing_keys}")
+
+        self.language = pack["language"]
+        vowels = pack["vowels"]
+        # Vowels are counted in the lowercased word
+        self.vowels_delete_table = str.maketrans("", "", vowels.lower() + vowels.upper())
+        # json object keys are strings
+        self.len_to_n_vowels = {
+            int(length): frozenset(vowel_counts)
+            for length, vowel_counts in pack["len_to_n_vowels"].items()
+        }
+        self.min_word_len = min(self.len_to_n_vowels)
+        self.max_word_len = max(self.len_to_n_vowels)
+
+        category_words = {
+            category: {word.lower() for word in pack[key]}
+            for key, category in RULE_PACK_CATEGORIES.items()
+        }
+        self.token_flags = lang_detect.build_token_category_flags(
+            category_words,
+            {
+                category: lang_detect.TOKEN_CATEGORY_BITS[category]
+                for category in category_words
+            },
+        )
+
+    def __repr__(self) -> str:
+        return f"RulePack({self.language!r})"
+
+
+def english_rule_pack_dict() -> dict:
+    """
+    The "en" pack, from the detector's current tables
+    (including words added with register_category_words()).
+    """
+    return {
+        "language": "en",
+        "vowels": "".join(sorted(vowel.lower() for vowel in lang_detect.ENGLISH_VOWELS)),
+        "len_to_n_vowels": {
+            str(length): sorted(vowel_counts)
+            for length, vowel_counts in lang_detect.LEN_TO_N_VOWELS.items()
+        },
+        **{
+            key: sorted(lang_detect.TOKEN_CATEGORY_WORDS.get(category, ()))
+            for key, category in RULE_PACK_CATEGORIES.items()
+        },
+    }
+
+
+def bundled_rule_pack_languages() -> list[str]:
+    """Languages with a bundled pack: "en", and each rule_packs/<language>.json."""
+    languages = ["en"]
+    for file_name in sorted(os.listdir(BUNDLED_RULE_PACKS_DIR)):
+        language, extension = os.path.splitext(file_name)
+        if extension == ".json" and language != "en":
+            languages.append(language)
+    return languages
+
+
+def load_rule_pack(source: dict | str) -> RulePack:
+    """
+    Loads one rule pack.
+
+    Args:
+        source (dict | str): a pack dict, the path of a pack json file,
+            or the language of a bundled pack ("en", "es", ...)
+
+    Raises:
+        ValueError: on unknown or missing pack keys
+        FileNotFoundError: for a path or language with no pack
+    """
+    if isinstance(source, dict):
+        return RulePack(source)
+    if source == "en":
+        return RulePack(english_rule_pack_dict())
+    path = source
+    if not os.path.exists(path):
+        path = os.path.join(BUNDLED_RULE_PACKS_DIR, f"{source}.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"no rule pack {source!r}")
+    with open(path, encoding="utf-8") as pack_file:
+        return RulePack(json.load(pack_file))
+
+
+def load_rule_packs(sources: list | None = None) -> list[RulePack]:
+    """load_rule_pack() for each source, default all bundled languages."""
+    if sources is None:
+        sources = bundled_rule_pack_languages()
+    return [load_rule_pack(source) for source in sources]
+
+
+def score_rule_packs(
+    input_text: str,
+    packs: list[RulePack],
+) -> list[tuple[int, int, int]]:
+    """
+    Scores input_text for each pack, from one tokenization.
+
+    Returns:
+        list[tuple[int, int, int]]: (words, sentences, lexicon words) per pack,
+            lexicon words being the valid words in the pack's word lists
+    """
+    tokens = lang_detect.sanitize_and_split_text(" ".join(input_text.split()))
+
+    invalid_symbols = lang_detect.INVALID_SYMBOLS
+    sentence_endings = lang_detect.SENTENCE_ENDINGS
+    category_abbreviation = lang_detect.CATEGORY_ABBREVIATION
+    count_accepted_sentences = lang_detect.count_accepted_sentences
+
+    word_counts = [0] * len(packs)
+    sentence_counts = [0] * len(packs)
+    lexicon_counts = [0] * len(packs)
+    sentences_flags: list[list[int]] = [[] for _ in packs]
+
+    for token in tokens:
+        # is_valid_english_word(): the symbol rule is the same for every pack
+        token_len = len(token)
+        symbol_part = token[1:-1] if token_len >= 3 else token
+        if any(char in invalid_symbols for char in symbol_part):
+            continue
+        lowered = token.lower()
+        ends_sentence = token[-1] in sentence_endings
+
+        for index, pack in enumerate(packs):
+            # check_vowel_count_for_length(), with the pack's tables
+            capped_len = min(token_len, pack.max_word_len)
+            if capped_len < pack.min_word_len:
+                continue
+            vowel_count = len(lowered) - len(lowered.translate(pack.vowels_delete_table))
+            if vowel_count not in pack.len_to_n_vowels.get(capped_len, ()):
+                continue
+            word_counts[index] += 1
+
+            # split_wordlist_into_sentences_and_filter(), counting only
+            flags = pack.token_flags.get(lowered, 0)
+            if flags:
+                lexicon_counts[index] += 1
+            if ends_sentence and not flags & category_abbreviation:
+                if token_len > 1:
+                    sentences_flags[index].append(flags)
+                sentence_counts[index] += count_accepted_sentences(sentences_flags[index])
+                sentences_flags[index] = []
+            else:
+                sentences_flags[index].append(flags)
+
+    for index, sentence_flags in enumerate(sentences_flags):
+        if sentence_flags:
+            sentence_counts[index] += count_accepted_sentences(sentence_flags)
+
+    return list(zip(word_counts, sentence_counts, lexicon_counts))
+
+
+def lang_detect_rule_packs(
+    input_text: str,
+    packs: list[RulePack],
+) -> dict[str, tuple[int, int]]:
+    """
+    (words, sentences) of input_text for each pack, from one tokenization.
+
+    Per pack, the result is that of the standard pipeline
+    with the pack's word rules in place of the English ones.
+
+    Returns:
+        dict[str, tuple[int, int]]: {language: (words, sentences)}, in pack order
+
+    Example:
+        >>> lang_detect_rule_packs("He had a great time there.", load_rule_packs(["en"]))
+        {'en': (5, 1)}
+    """
+    return {
+        pack.language: (words, sentences)
+        for pack, (words, sentences, _) in zip(packs, score_rule_packs(input_text, packs))
+    }
+
+
+def best_rule_pack_language(
+    input_text: str,
+    packs: list[RulePack],
+) -> tuple[str | None, int, int]:
+    """
+    The best-scoring language of score_rule_packs(): most sentences,
+    then most lexicon words, then most words; ties go to the earlier pack.
+
+    Returns:
+        tuple: (language, words, sentences), or (None, 0, 0)
+            when no pack finds a word
+    """
+    best = (None, 0, 0)
+    best_score = (0, 0, 0)
+    for pack, (words, sentences, lexicon_words) in zip(
+        packs, score_rule_packs(input_text, packs)
+    ):
+        if (sentences, lexicon_words, words) > best_score:
+            best = (pack.language, words, sentences)
+            best_score = (sentences, lexicon_words, words)
+    return best
@@ -0,0 +1,288 @@
+"""
+# Language-Detect: lazy pipeline of rule stages
+
+lang_detect_word_sentence_counter() builds a list at every step:
+the tokens, the valid words, the potential sentences, the valid sentences.
+Here the same steps are a chain of lazy stages, one item at a time:
+
+    iter_tokens(text)                  potential words, as sanitize_and_split_text()
+    filter_words(tokens, rules)        words that pass every word rule
+    iter_sentences(words)              potential sentences (Sentence tuples)
+    filter_sentences(sentences, rules) sentences that pass every sentence rule
+
+No list of the document's tokens, words or sentences is ever built:
+memory holds one potential sentence, and no more than
+MAX_WORDS_PER_SENTENCE + 1 words of it (see iter_sentences()).
+
+## Rules
+A word rule is a function(word) -> bool, a sentence rule a
+function(Sentence) -> bool; each rule is one lazy filter stage, applied
+in order. Insert, remove or reorder rules by passing other tuples:
+
+    WORD_RULES           is_valid_english_word(), as two rules
+    STRICT_WORD_RULES    the "strict" profile: also the per-word caps
+                         (MAX_UPPERCASE_PER_WORD, MAX_DIGITS_PER_WORD, ...)
+    SENTENCE_RULES       split_wordlist_into_sentences_and_filter()'s rules
+
+With these, lang_detect_word_sentence_counter_pipeline() gives exactly
+the results of the "standard" (and "strict") profile.
+
+Example:
+    >>> rules = WORD_RULES + (word_uppercase_within_max,)
+    >>> lang_detect_word_sentence_counter_pipeline("THE cat sat on the mat.", rules)
+    (5, 1)
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+import gofai_language_detect_v52 as lang_detect
+
+NON_WHITESPACE_RUN_RE = re.compile(r"\S+")
+
+
+class Sentence(NamedTuple):
+    """
+    A potential sentence: its words, without a removed ending punctuation
+    mark, and their TOKEN_CATEGORY_FLAGS.
+    segment is True for the pieces of a sentence over MAX_WORDS_PER_SENTENCE
+    (see split_over_max_onesentence_wordlist()), which have stricter rules.
+    """
+
+    words: list[str]
+    flags: list[int]
+    segment: bool = False
+
+
+def iter_tokens(input_text: str) -> Iterator[str]:
+    """
+    Tokenize stage: yields the tokens of
+    sanitize_and_split_text(" ".join(input_text.split())),
+    from one whitespace-separated run at a time.
+
+    Example:
+        >>> list(iter_tokens("Hi  there.Bye --- now"))
+        ['Hi', 'there.', 'Bye', '-', 'now']
+    """
+    for match in NON_WHITESPACE_RUN_RE.finditer(input_text):
+        run = lang_detect.remove_duplicate_chars(match.group())
+        if "." in run:
+            yield from run.replace(".", ". ").split()
+        else:
+            yield run
+
+
+def apply_rules(items: Iterable, rules: Iterable[Callable]) -> Iterator:
+    """items, through one lazy filter() stage per rule, in order."""
+    items = iter(items)
+    for rule in rules:
+        items = filter(rule, items)
+    return items
+
+
+# Word rules
+
+
+def word_has_no_inner_symbols(word: str) -> bool:
+    """
+    No INVALID_SYMBOLS inside the word (anywhere, when under 3 characters):
+    "ok!" and "(fine)" pass, "o!#K" and "f(n)e" do not.
+    """
+    if not word:
+        return False
+    inner_word = word[1:-1] if len(word) >= 3 else word
+    return not any(char in lang_detect.INVALID_SYMBOLS for char in inner_word)
+
+
+def word_uppercase_within_max(word: str) -> bool:
+    """No more than MAX_UPPERCASE_PER_WORD capitals."""
+    return sum(1 for char in word if char.isupper()) <= lang_detect.MAX_UPPERCASE_PER_WORD
+
+
+def word_digits_within_max(word: str) -> bool:
+    """No more than MAX_DIGITS_PER_WORD digits."""
+    return sum(1 for char in word if char.isdigit()) <= lang_detect.MAX_DIGITS_PER_WORD
+
+
+def word_hyphens_within_max(word: str) -> bool:
+    """No more than MAX_HYPHENS_PER_WORD hyphens."""
+    return word.count("-") <= lang_detect.MAX_HYPHENS_PER_WORD
+
+
+def word_underscores_within_max(word: str) -> bool:
+    """No more than MAX_UNDERSCORES_PER_WORD underscores."""
+    return word.count("_") <= lang_detect.MAX_UNDERSCORES_PER_WORD
+
+
+# is_valid_english_word(), and is_strict_english_word()
+WORD_RULES = (word_has_no_inner_symbols, lang_detect.check_vowel_count_for_length)
+STRICT_WORD_RULES = WORD_RULES + (
+    word_hyphens_within_max,
+    word_underscores_within_max,
+    word_uppercase_within_max,
+    word_digits_within_max,
+)
+
+
+def filter_words(tokens: Iterable[str], rules: tuple = WORD_RULES) -> Iterator[str]:
+    """Word filter stage: the tokens that pass every word rule."""
+    return apply_rules(tokens, rules)
+
+
+# Sentence segmenting
+
+
+def iter_sentences(words: Iterable[str]) -> Iterator[Sentence]:
+    """
+    Sentence segment stage: splits words into potential sentences,
+    as split_wordlist_into_sentences_and_filter() does.
+
+    A word ending in SENTENCE_ENDINGS, that is not an abbreviation, ends a
+    sentence; its punctuation mark is dropped, as it is dropped before the
+    sentence rules there. Trailing words are a last sentence.
+
+    A sentence over MAX_WORDS_PER_SENTENCE words is yielded as segments of
+    SPLIT_SENTENCES_ON_N_WORDS words (Sentence.segment is True), each as
+    soon as it is complete, so no more than MAX_WORDS_PER_SENTENCE + 1
+    words are held. The list pipeline only keeps the segments of a
+    sentence that passes the sentence rules; a segment that passes the
+    (stricter) segment rules of SENTENCE_RULES always does.
+
+    Example:
+        >>> [sentence.words for sentence in iter_sentences(["Dr.", "Who", "is", "here."])]
+        [['Dr.', 'Who', 'is', 'here']]
+    """
+    token_category_flags = lang_detect.TOKEN_CATEGORY_FLAGS
+    sentence_endings = lang_detect.SENTENCE_ENDINGS
+    category_abbreviation = lang_detect.CATEGORY_ABBREVIATION
+    max_words = lang_detect.MAX_WORDS_PER_SENTENCE
+    segment_words = lang_detect.SPLIT_SENTENCES_ON_N_WORDS
+
+    sentence_words: list[str] = []
+    sentence_flags: list[int] = []
+    long_sentence = False
+
+    for word in words:
+        flags = token_category_flags.get(word.lower(), 0)
+        ends_sentence = (
+            word[-1:] in sentence_endings and not flags & category_abbreviation
+        )
+        if ends_sentence:
+            # flags are already those of the word without its mark
+            word = word[:-1]
+
+        if word:
+            sentence_words.append(word)
+            sentence_flags.append(flags)
+            if long_sentence:
+                if len(sentence_words) == segment_words:
+                    yield Sentence(sentence_words, sentence_flags, True)
+                    sentence_words = []
+                    sentence_flags = []
+            elif len(sentence_words) > max_words:
+                long_sentence = True
+                complete = len(sentence_words) - len(sentence_words) % segment_words
+                for start in range(0, complete, segment_words):
+                    yield Sentence(
+                        sentence_words[start : start + segment_words],
+                        sentence_flags[start : start + segment_words],
+                        True,
+                    )
+                sentence_words = sentence_words[complete:]
+                sentence_flags = sentence_flags[complete:]
+
+        if ends_sentence:
+            if sentence_words:
+                yield Sentence(sentence_words, sentence_flags, long_sentence)
+            sentence_words = []
+            sentence_flags = []
+            long_sentence = False
+
+    if sentence_words:
+        yield Sentence(sentence_words, sentence_flags, long_sentence)
+
+
+# Sentence rules
+
+
+def sentence_has_min_words(sentence: Sentence) -> bool:
+    """At least MIN_WORDS_PER_SENTENCE words."""
+    return len(sentence.words) >= lang_detect.MIN_WORDS_PER_SENTENCE
+
+
+def sentence_has_verbs_prepositions(sentence: Sentence) -> bool:
+    """At least MIN_VERBS_PREPOSITIONS_PER_SENTENCE verbs and prepositions."""
+    category = lang_detect.CATEGORY_VERB_PREPOS
+    count = sum(1 for flags in sentence.flags if flags & category)
+    return count >= lang_detect.MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+
+
+def sentence_has_stopwords(sentence: Sentence) -> bool:
+    """
+    At least MIN_NLTK_STOPWORDS_PER_SENTENCE stopwords;
+    segments need more than that, as in the list pipeline.
+    """
+    category = lang_detect.CATEGORY_STOPWORD
+    count = sum(1 for flags in sentence.flags if flags & category)
+    if sentence.segment:
+        return count > lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+    return count >= lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+
+
+SENTENCE_RULES = (
+    sentence_has_min_words,
+    sentence_has_verbs_prepositions,
+    sentence_has_stopwords,
+)
+
+
+def filter_sentences(
+    sentences: Iterable[Sentence], rules: tuple = SENTENCE_RULES
+) -> Iterator[Sentence]:
+    """Sentence filter stage: the sentences that pass every sentence rule."""
+    return apply_rules(sentences, rules)
+
+
+class _CountingIterator:
+    """Passes items through, counting them."""
+
+    def __init__(self, items: Iterable):
+        self.items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.items)
+        self.count += 1
+        return item
+
+
+def lang_detect_word_sentence_counter_pipeline(
+    input_text: str,
+    word_rules: tuple = WORD_RULES,
+    sentence_rules: tuple = SENTENCE_RULES,
+) -> tuple[int, int]:
+    """
+    (words, sentences) of input_text, through the lazy stages.
+
+    Args:
+        input_text (str): raw input text
+        word_rules (tuple): word rules, in order; STRICT_WORD_RULES for
+            the "strict" profile
+        sentence_rules (tuple): sentence rules, in order
+
+    Returns:
+        tuple[int, int]: (words, sentences); with the default rules,
+            those of lang_detect_word_sentence_counter()
+
+    Example:
+        >>> lang_detect_word_sentence_counter_pipeline("He had a great time there.")
+        (5, 1)
+    """
+    words = _CountingIterator(filter_words(iter_tokens(input_text), word_rules))
+    sentences = filter_sentences(iter_sentences(words), sentence_rules)
+    sentence_count = sum(1 for _ in sentences)
+    return (words.count, sentence_count)
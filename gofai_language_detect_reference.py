@@ -0,0 +1,173 @@
+"""
+# Language-Detect: frozen reference
+
+The oracle for differential testing (gofai_language_detect_differential):
+the list pipeline of lang_detect_word_sentence_counter() (standard
+profile), as it was before any of the optimized engines, kept in
+this one module so that changes to gofai_language_detect_v52 cannot
+move it along with the engines it checks.
+
+Do not optimize this module. Each step is the original one:
+per-character remove_duplicate_chars(), a list of tokens, a list of
+valid words, lists of words per sentence, and the sentence rules
+recounted over each list with .lower() lookups.
+
+Only the data is read from gofai_language_detect_v52, at call time,
+so that load_detector_config() and register_category_words() apply
+to the reference and the engines alike:
+    settings        MIN_*, MAX_WORDS_PER_SENTENCE, SPLIT_SENTENCES_ON_N_WORDS
+    tables          LEN_TO_N_VOWELS, ENGLISH_VOWELS, INVALID_SYMBOLS,
+                    SENTENCE_ENDINGS
+    word lists      TOKEN_CATEGORY_WORDS "stopword", "verb_prepos"
+                    and "abbreviation" (lowercase words)
+
+Example:
+    >>> reference_word_sentence_counter("Please reply to my request about weather.")
+    (7, 1)
+"""
+
+import gofai_language_detect_v52 as lang_detect
+
+# Characters whose consecutive repeats are collapsed, as originally
+REFERENCE_CHARS_TO_DEDUPE = frozenset({" ", "-", "–", "—"})
+
+
+def reference_remove_duplicate_chars(text: str) -> str:
+    """Collapses repeats of REFERENCE_CHARS_TO_DEDUPE, one character at a time."""
+    result: list[str] = []
+    prev_char: str | None = None
+    for char in text:
+        if char in REFERENCE_CHARS_TO_DEDUPE and char == prev_char:
+            continue
+        result.append(char)
+        prev_char = char
+    return "".join(result)
+
+
+def reference_split_text(raw_text: str) -> list[str]:
+    """remove duplicate characters, a space after each period, split."""
+    if not raw_text:
+        return []
+    raw_text = reference_remove_duplicate_chars(raw_text)
+    text = raw_text.replace("\n", " ").replace("\t", " ").replace(".", ". ")
+    return text.split()
+
+
+def reference_check_vowel_count(word: str) -> bool:
+    """Vowel count of word in LEN_TO_N_VOWELS for its (capped) length."""
+    len_to_n_vowels = lang_detect.LEN_TO_N_VOWELS
+    word_len = min(len(word), max(len_to_n_vowels.keys()))
+    if word_len < min(len_to_n_vowels.keys()):
+        return False
+    vowel_count = sum(1 for char in word.lower() if char in lang_detect.ENGLISH_VOWELS)
+    return vowel_count in len_to_n_vowels.get(word_len, [])
+
+
+def reference_is_valid_word(word_candidate: str) -> bool:
+    """No INVALID_SYMBOLS inside the word (ends allowed from 3 chars), vowel count."""
+    if not word_candidate:
+        return False
+    if len(word_candidate) >= 3:
+        checked_chars = word_candidate[1:-1]
+    else:
+        checked_chars = word_candidate
+    if any(char in lang_detect.INVALID_SYMBOLS for char in checked_chars):
+        return False
+    return reference_check_vowel_count(word_candidate)
+
+
+def reference_split_into_sentences(words: list[str]) -> list[list[str]]:
+    """
+    Words as potential sentences, split after each word that ends in
+    SENTENCE_ENDINGS (and is not an abbreviation): the ending character
+    becomes a token of its own. Trailing words get a "." token.
+    """
+    abbreviations = lang_detect.TOKEN_CATEGORY_WORDS["abbreviation"]
+    sentences: list[list[str]] = []
+    current_sentence: list[str] = []
+    for word in words:
+        if (
+            any(word.endswith(end) for end in lang_detect.SENTENCE_ENDINGS)
+            and word.lower() not in abbreviations
+        ):
+            if word[:-1]:
+                current_sentence.append(word[:-1])
+            current_sentence.append(word[-1])
+            sentences.append(current_sentence)
+            current_sentence = []
+        else:
+            current_sentence.append(word)
+
+    if current_sentence:
+        if not any(
+            current_sentence[-1].endswith(end) for end in lang_detect.SENTENCE_ENDINGS
+        ):
+            current_sentence.append(".")
+        sentences.append(current_sentence)
+    return sentences
+
+
+def reference_filter_sentences(sentences: list[list[str]]) -> list[list[str]]:
+    """
+    The sentence rules, recounted over each list of words. A sentence over
+    MAX_WORDS_PER_SENTENCE is kept as those of its SPLIT_SENTENCES_ON_N_WORDS
+    segments that pass the (stricter: stopwords > minimum) segment rules.
+    """
+    verbs_prepositions = lang_detect.TOKEN_CATEGORY_WORDS["verb_prepos"]
+    stopwords = lang_detect.TOKEN_CATEGORY_WORDS["stopword"]
+    final_sentences: list[list[str]] = []
+    for sentence in sentences:
+        if sentence[-1] in (".", "!", "?"):
+            del sentence[-1]
+
+        verb_preposition_count = sum(
+            1 for word in sentence if word.lower() in verbs_prepositions
+        )
+        stopword_count = sum(1 for word in sentence if word.lower() in stopwords)
+        if not (
+            len(sentence) >= lang_detect.MIN_WORDS_PER_SENTENCE
+            and verb_preposition_count >= lang_detect.MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+            and stopword_count >= lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+        ):
+            continue
+
+        if len(sentence) <= lang_detect.MAX_WORDS_PER_SENTENCE:
+            final_sentences.append(sentence)
+            continue
+
+        split_on = lang_detect.SPLIT_SENTENCES_ON_N_WORDS
+        for start in range(0, len(sentence), split_on):
+            segment = sentence[start : start + split_on]
+            if (
+                len(segment) >= lang_detect.MIN_WORDS_PER_SENTENCE
+                and sum(1 for word in segment if word.lower() in verbs_prepositions)
+                >= lang_detect.MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+                and sum(1 for word in segment if word.lower() in stopwords)
+                > lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+            ):
+                final_sentences.append(segment)
+    return final_sentences
+
+
+def reference_word_sentence_counter(input_text: str) -> tuple[int, int]:
+    """
+    The frozen reference for lang_detect_word_sentence_counter()
+    (standard profile): see the module docstring.
+
+    Args:
+        input_text (str): raw text
+
+    Returns:
+        tuple[int, int]: (words, sentences)
+    """
+    input_text = " ".join(input_text.split())
+    words = [
+        word for word in reference_split_text(input_text) if reference_is_valid_word(word)
+    ]
+    sentences = reference_filter_sentences(reference_split_into_sentences(words))
+    valid_sentences = [
+        sentence
+        for sentence in sentences
+        if lang_detect.MIN_WORDS_PER_SENTENCE <= len(sentence)
+    ]
+    return (len(words), len(valid_sentences))
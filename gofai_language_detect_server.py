@@ -0,0 +1,567 @@
+"""
+# Language-Detect: scoring server
+
+A long-running process with warm detector workers,
+for callers in other languages and services
+(no python start-up or import per call).
+
+## Protocols
+1. Newline-delimited json (NDJSON), over a Unix domain socket or localhost TCP.
+   One request per line, one response line per request, in request order
+   (requests on one connection are pipelined: send many, then read).
+   At most --max-pending-per-connection requests of a connection are read
+   ahead of their responses being written: a client that sends without
+   reading stops being read (backpressure), it does not grow the server.
+
+    {"id": 7, "text": "Some text."}         -> {"id": 7, "words": 2, "sentences": 0}
+    {"id": 8, "texts": ["a b", "c d"]}      -> {"id": 8, "results": [[0, 0], [0, 0]]}
+    {"op": "stats"}                         -> {"stats": {...}}
+    bad request                             -> {"id": ..., "error": "..."}
+    scoring error                           -> {"id": ..., "error": "scoring failed..."}
+
+2. HTTP/1.1 on localhost, same json bodies:
+    POST /score   (body: a request object as above)
+    GET  /stats
+   A bad request is answered with status 400, a scoring error with 500;
+   the connection stays open in both cases.
+
+## Micro-batching
+Requests from all connections go into one queue.
+A batch is sent to a worker when it has --max-batch-size requests,
+or --max-wait-ms after its first request, whichever is first,
+so one worker task scores many small requests.
+At most 2 batches per worker are in flight;
+further requests wait in the queue (see "queue_depth" in the stats).
+
+## Stats
+    queue_depth, in_flight_batches, requests (received), completed,
+    batches, mean_batch_size,
+    latency_ms histogram: {"le_<ms>": requests, ...}, p50 / p99, max
+
+## Command line
+    python3 gofai_language_detect_server.py --unix /tmp/lang_detect.sock --workers 4
+    python3.13t gofai_language_detect_server.py --http 127.0.0.1:8080 --backend threads
+    python3 gofai_language_detect_server.py --http 127.0.0.1:8080 --tcp 127.0.0.1:8081
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from gofai_language_detect_batch import (
+    EXECUTOR_BACKENDS,
+    make_executor,
+    score_batch,
+    warm_worker,
+)
+from gofai_language_detect_v52 import DETECTOR_PROFILES
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+# Longest accepted request line / http body
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# NDJSON requests of one connection read but not yet answered
+DEFAULT_MAX_PENDING_PER_CONNECTION = 256
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Too Large",
+    500: "Internal Server Error",
+}
+
+
+class LatencyHistogram:
+    """Request latencies, counted in LATENCY_BUCKETS_MS buckets."""
+
+    def __init__(self, bucket_bounds_ms: tuple = LATENCY_BUCKETS_MS):
+        self.bucket_bounds_ms = bucket_bounds_ms
+        # one extra bucket for anything over the last bound
+        self.bucket_counts = [0] * (len(bucket_bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        bucket = 0
+        for bucket, bound in enumerate(self.bucket_bounds_ms):
+            if latency_ms <= bound:
+                break
+        else:
+            bucket = len(self.bucket_bounds_ms)
+        self.bucket_counts[bucket] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def quantile_ms(self, quantile: float) -> float:
+        """Upper bound of the bucket holding the quantile (an estimate)."""
+        running_total = 0
+        for bound, bucket_count in zip(self.bucket_bounds_ms, self.bucket_counts):
+            running_total += bucket_count
+            if running_total >= quantile * self.count:
+                return float(bound)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        histogram = {
+            f"le_{bound}": bucket_count
+            for bound, bucket_count in zip(self.bucket_bounds_ms, self.bucket_counts)
+        }
+        histogram["over"] = self.bucket_counts[-1]
+        return {
+            "histogram": histogram,
+            "count": self.count,
+            "mean": self.total_ms / self.count if self.count else 0.0,
+            "p50": self.quantile_ms(0.5) if self.count else 0.0,
+            "p99": self.quantile_ms(0.99) if self.count else 0.0,
+            "max": self.max_ms,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent score() calls into batches for the executor.
+
+    Args:
+        executor: runs score_batch(); a warm ProcessPoolExecutor,
+            or a ThreadPoolExecutor for in-process scoring.
+        max_batch_size (int): most requests per batch
+        max_wait_ms (float): longest wait for a batch to fill,
+            counted from its first request
+        max_in_flight (int): most batches sent to the executor at once
+        profile (str): detector profile, see DETECTOR_PROFILES
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_in_flight: int = 2,
+        profile: str = "standard",
+    ):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.profile = profile
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.completed = 0
+        self.batches = 0
+        self.in_flight_batches = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._batch_tasks: set = set()
+        self._loop_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._loop_task = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def close(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def score(self, text: str) -> tuple[int, int]:
+        """(words, sentences) of text, scored in the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            self.in_flight_batches += 1
+            task = loop.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, score_batch, [text for text, _, _ in batch], self.profile
+            )
+        except Exception as error:  # e.g. a broken worker process
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.in_flight_batches -= 1
+            self._slots.release()
+
+        self.batches += 1
+        now = time.perf_counter()
+        for (_, future, enqueued), result in zip(batch, results):
+            self.completed += 1
+            self.latency.record((now - enqueued) * 1000)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight_batches": self.in_flight_batches,
+            "requests": self.requests,
+            "completed": self.completed,
+            "batches": self.batches,
+            "mean_batch_size": self.completed / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "latency_ms": self.latency.snapshot(),
+        }
+
+
+class ScoringServer:
+    """
+    NDJSON (Unix socket / TCP) and HTTP front ends over one MicroBatcher.
+
+    Args:
+        workers (int): workers; 0 scores in one thread of this process
+            (no process start-up, e.g. for tests and small loads)
+        max_batch_size, max_wait_ms, profile: see MicroBatcher
+        backend (str): processes or threads, see EXECUTOR_BACKENDS
+        max_pending_per_connection (int): NDJSON requests read from one
+            connection before their responses are written; reading waits
+
+    Example:
+        >>> async def main():
+        ...     server = ScoringServer(workers=2)
+        ...     await server.start(unix_path="/tmp/lang_detect.sock")
+        ...     await server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        profile: str = "standard",
+        backend: str = "auto",
+        max_pending_per_connection: int = DEFAULT_MAX_PENDING_PER_CONNECTION,
+    ):
+        self.workers = workers
+        self.backend = backend
+        self.max_pending_per_connection = max_pending_per_connection
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.profile = profile
+        self.executor: Executor | None = None
+        self.batcher: MicroBatcher | None = None
+        self.servers: list = []
+        self._connection_tasks: set = set()
+
+    async def start(
+        self,
+        unix_path: str | None = None,
+        tcp_address: tuple[str, int] | None = None,
+        http_address: tuple[str, int] | None = None,
+    ) -> None:
+        """Starts the workers and listens on each given address."""
+        if self.workers > 0:
+            self.executor = make_executor(self.workers, self.backend, self.profile)
+            # Start every worker now, not on the first requests
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(self.executor, warm_worker, self.profile)
+                    for _ in range(self.workers)
+                )
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.batcher = MicroBatcher(
+            self.executor,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            max_in_flight=2 * max(1, self.workers),
+            profile=self.profile,
+        )
+        self.batcher.start()
+
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)  # left over from a previous run
+            self.servers.append(
+                await asyncio.start_unix_server(
+                    self._handle_ndjson, path=unix_path, limit=MAX_REQUEST_BYTES
+                )
+            )
+        if tcp_address is not None:
+            self.servers.append(
+                await asyncio.start_server(
+                    self._handle_ndjson, *tcp_address, limit=MAX_REQUEST_BYTES
+                )
+            )
+        if http_address is not None:
+            self.servers.append(
+                await asyncio.start_server(
+                    self._handle_http, *http_address, limit=MAX_REQUEST_BYTES
+                )
+            )
+
+    def addresses(self) -> list:
+        """Bound addresses, e.g. to find the port when started on port 0."""
+        return [server.sockets[0].getsockname() for server in self.servers]
+
+    async def serve_forever(self) -> None:
+        await asyncio.gather(*(server.serve_forever() for server in self.servers))
+
+    async def close(self) -> None:
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        # Open connections are dropped (not waited for)
+        for task in list(self._connection_tasks):
+            task.cancel()
+        if self._connection_tasks:
+            await asyncio.gather(*self._connection_tasks, return_exceptions=True)
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        stats = self.batcher.stats()
+        stats["workers"] = self.workers
+        stats["profile"] = self.profile
+        return stats
+
+    async def handle_request(self, request) -> dict:
+        """Response object for one request object (see module docstring)."""
+        _, response = await self._respond(request)
+        return response
+
+    async def _respond(self, request) -> tuple[int, dict]:
+        """(http status, response object) for one request object."""
+        if not isinstance(request, dict):
+            return (400, {"error": "request must be a json object"})
+        response = {"id": request["id"]} if "id" in request else {}
+
+        if request.get("op") == "stats":
+            response["stats"] = self.stats()
+            return (200, response)
+        try:
+            if isinstance(request.get("text"), str):
+                response["words"], response["sentences"] = await self.batcher.score(
+                    request["text"]
+                )
+            elif isinstance(request.get("texts"), list) and all(
+                isinstance(text, str) for text in request["texts"]
+            ):
+                results = await asyncio.gather(
+                    *(self.batcher.score(text) for text in request["texts"]),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                response["results"] = [list(result) for result in results]
+            else:
+                response["error"] = (
+                    'expected "text": str, "texts": [str] or "op": "stats"'
+                )
+                return (400, response)
+        except Exception as error:  # e.g. a broken worker process
+            response["error"] = f"scoring failed: {error!r}"
+            return (500, response)
+        return (200, response)
+
+    async def _handle_line(self, line: bytes) -> tuple[int, dict]:
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            return (400, {"error": f"invalid json: {error}"})
+        return await self._respond(request)
+
+    async def _handle_ndjson(self, reader, writer) -> None:
+        # Responses are written in request order, while later requests
+        # are already queued for scoring; a slot is freed once a response
+        # is written (and drained: a client that does not read holds them)
+        pending: deque = deque()
+        pending_slots = asyncio.Semaphore(self.max_pending_per_connection)
+        response_ready = asyncio.Event()
+        reading = True
+
+        async def write_responses():
+            while reading or pending:
+                if not pending:
+                    response_ready.clear()
+                    await response_ready.wait()
+                    continue
+                _, response = await pending.popleft()
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+                pending_slots.release()
+
+        self._connection_tasks.add(asyncio.current_task())
+        writer_task = asyncio.get_running_loop().create_task(write_responses())
+        try:
+            while True:
+                await pending_slots.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:  # line over MAX_REQUEST_BYTES
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    pending.append(asyncio.ensure_future(self._handle_line(line)))
+                    response_ready.set()
+                else:
+                    pending_slots.release()
+            reading = False
+            response_ready.set()
+            await writer_task
+        except ConnectionError:
+            pass  # client gone
+        finally:
+            writer_task.cancel()
+            for response in pending:
+                response.cancel()
+            writer.close()
+            self._connection_tasks.discard(asyncio.current_task())
+
+    async def _handle_http(self, reader, writer) -> None:
+        self._connection_tasks.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if not header_line.strip():
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get("content-length", "0"))
+                if content_length > MAX_REQUEST_BYTES:
+                    await self._write_http(writer, 413, {"error": "body too large"})
+                    break
+                body = await reader.readexactly(content_length)
+
+                if method == "GET" and path == "/stats":
+                    status, response = 200, {"stats": self.stats()}
+                elif method == "POST" and path == "/score":
+                    status, response = await self._handle_line(body)
+                else:
+                    status, response = 404, {"error": f"no route {method} {path}"}
+                await self._write_http(writer, status, response)
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # malformed request or client gone: drop the connection
+        finally:
+            writer.close()
+            self._connection_tasks.discard(asyncio.current_task())
+
+    @staticmethod
+    async def _write_http(writer, status: int, response: dict) -> None:
+        body = json.dumps(response).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+
+def parse_host_port(address: str) -> tuple[str, int]:
+    """ "127.0.0.1:8080" -> ("127.0.0.1", 8080)"""
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+async def run_server(args) -> None:
+    server = ScoringServer(
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        profile=args.profile,
+        backend=args.backend,
+        max_pending_per_connection=args.max_pending_per_connection,
+    )
+    await server.start(
+        unix_path=args.unix,
+        tcp_address=parse_host_port(args.tcp) if args.tcp else None,
+        http_address=parse_host_port(args.http) if args.http else None,
+    )
+    print(f"listening on {server.addresses()} with {args.workers} workers", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve lang-detect scoring over NDJSON (Unix socket / TCP) and HTTP."
+    )
+    parser.add_argument("--unix", help="Unix socket path for NDJSON requests")
+    parser.add_argument("--tcp", help="host:port for NDJSON requests")
+    parser.add_argument("--http", help="host:port for HTTP requests")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--profile", choices=DETECTOR_PROFILES, default="standard")
+    parser.add_argument("--backend", choices=EXECUTOR_BACKENDS, default="auto")
+    parser.add_argument(
+        "--max-pending-per-connection",
+        type=int,
+        default=DEFAULT_MAX_PENDING_PER_CONNECTION,
+        help="NDJSON requests read ahead of their responses, per connection",
+    )
+    args = parser.parse_args(argv)
+
+    if not (args.unix or args.tcp or args.http):
+        parser.error("give at least one of --unix, --tcp, --http")
+
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,511 @@
+"""
+# Language-Detect: sharded multi-node runner
+
+Splits large inputs into shards, publishes them to a work queue,
+and lets any number of workers, on any host that sees the queue and
+the output directory, claim, score and commit shards; a final merge
+writes one results file in input order.
+
+## Shards
+A shard is a byte range [start, end) of one input file, cut just after a
+document separator (plan_byte_shards()), or every shard_rows documents
+(plan_row_shards()); a shard holds the documents that start in its range.
+Splits are those of gofai_language_detect_checkpoint.py: line, nul, jsonl.
+
+## Work queue
+WorkQueue is the interface; SQLiteWorkQueue, the default, needs no
+service: one SQLite file (on a shared filesystem with working locks
+for several hosts). A claimed shard is leased for lease_seconds; workers
+renew the lease while scoring, and a shard whose lease expired (dead
+worker) is claimed again by the next worker.
+
+## Idempotent commits
+A worker writes shard-<id>.bin (RESULT_RECORD_FORMAT records, doc_id
+counted within the shard) to a temporary file and renames it into
+place, then marks the shard done. A shard scored twice (a slow worker
+whose lease expired) gives the same file, and only the first
+completion counts.
+
+## Command line
+    python3 gofai_language_detect_shards.py plan jobs.sqlite corpus/*.txt --shard-mb 64
+    # on each host:
+    python3 gofai_language_detect_shards.py work jobs.sqlite shards/ --jobs 8
+    python3 gofai_language_detect_shards.py status jobs.sqlite
+    python3 gofai_language_detect_shards.py merge jobs.sqlite shards/ scores.bin
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+from gofai_language_detect_batch import score_document
+from gofai_language_detect_checkpoint import (
+    CHECKPOINT_SPLIT_MODES,
+    RESULT_RECORD,
+    iter_documents_with_offsets,
+)
+from gofai_language_detect_cli import parse_jsonl_document
+from gofai_language_detect_v52 import DETECTOR_PROFILES
+
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+DEFAULT_LEASE_SECONDS = 300.0
+
+SHARD_SEPARATORS = {"line": b"\n", "nul": b"\0", "jsonl": b"\n"}
+SEPARATOR_SCAN_BYTES = 64 * 1024
+
+
+def find_document_start(binary_file, position: int, separator: bytes) -> int:
+    """The first offset at or after position that starts a document."""
+    if position == 0:
+        return 0
+    # a document starts right after a separator
+    binary_file.seek(position - 1)
+    scanned = position - 1
+    while True:
+        chunk = binary_file.read(SEPARATOR_SCAN_BYTES)
+        if not chunk:
+            return scanned
+        index = chunk.find(separator)
+        if index >= 0:
+            return scanned + index + 1
+        scanned += len(chunk)
+
+
+def plan_byte_shards(
+    path: str,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    split: str = "line",
+) -> list[tuple[int, int]]:
+    """
+    Byte ranges [start, end) of about shard_bytes covering path,
+    each starting at a document.
+    """
+    separator = SHARD_SEPARATORS[split]
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as binary_file:
+        while boundaries[-1] + shard_bytes < size:
+            start = find_document_start(
+                binary_file, boundaries[-1] + shard_bytes, separator
+            )
+            if start >= size:
+                break
+            boundaries.append(start)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def plan_row_shards(
+    path: str,
+    shard_rows: int,
+    split: str = "line",
+    field: str = "text",
+) -> list[tuple[int, int]]:
+    """Byte ranges [start, end) of shard_rows documents each (one read of path)."""
+    shards = []
+    start = 0
+    rows = 0
+    with open(path, "rb") as binary_file:
+        for _, offset in iter_documents_with_offsets(binary_file, split, field):
+            rows += 1
+            if rows == shard_rows:
+                shards.append((start, offset))
+                start = offset
+                rows = 0
+    size = os.path.getsize(path)
+    if rows or not shards:
+        shards.append((start, size))
+    return shards
+
+
+def iter_shard_documents(path: str, start: int, end: int, split: str, field: str):
+    """Yields the documents that start in [start, end) of path."""
+    with open(path, "rb") as binary_file:
+        binary_file.seek(start)
+        if split == "jsonl":
+            # blank lines are not documents: track each line's own start
+            line_start = start
+            for line in binary_file:
+                if line_start >= end:
+                    return
+                line_start += len(line)
+                if line.strip():
+                    yield parse_jsonl_document(line, field, None)[0]
+            return
+
+        # line / nul documents are contiguous
+        document_start = start
+        for document, offset in iter_documents_with_offsets(binary_file, split, field):
+            if document_start >= end:
+                return
+            yield document
+            document_start = offset
+
+
+class WorkQueue(ABC):
+    """
+    Shard work queue interface: implement these abstract methods
+    for another backend (a job service, a message queue, ...).
+
+    A shard is a dict: {"shard_id", "input", "start", "end", "split",
+    "field", "profile", "lease"} ("lease" identifies the claim).
+    """
+
+    @abstractmethod
+    def publish(self, shards: list[dict]) -> int:
+        """Adds shards (without ids or leases); returns the number added."""
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> dict | None:
+        """Leases one pending (or expired) shard to worker; None if there is none."""
+
+    @abstractmethod
+    def renew(self, shard: dict, lease_seconds: float) -> bool:
+        """Extends a lease; False if the shard was claimed by another worker."""
+
+    @abstractmethod
+    def complete(self, shard: dict, rows: int) -> bool:
+        """Marks a shard done; False if it was already done."""
+
+    @abstractmethod
+    def shards(self) -> list[dict]:
+        """Every shard with its "status" and "rows", in publishing order."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue in one SQLite file; safe for concurrent worker processes.
+
+    Args:
+        path (str): database file, created if missing
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # autocommit; transactions are explicit (BEGIN IMMEDIATE)
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shards (
+                shard_id INTEGER PRIMARY KEY,
+                input TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                end INTEGER NOT NULL,
+                split TEXT NOT NULL,
+                field TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL,
+                rows INTEGER
+            )
+            """
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def publish(self, shards: list[dict]) -> int:
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT INTO shards (input, start, end, split, field, profile)"
+                " VALUES (:input, :start, :end, :split, :field, :profile)",
+                shards,
+            )
+        return len(shards)
+
+    def claim(self, worker: str, lease_seconds: float) -> dict | None:
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            row = self.connection.execute(
+                "SELECT shard_id, input, start, end, split, field, profile, lease"
+                " FROM shards WHERE status = 'pending'"
+                " OR (status = 'leased' AND lease_expires < ?)"
+                " ORDER BY shard_id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            lease = row[7] + 1
+            self.connection.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease = ?,"
+                " lease_expires = ? WHERE shard_id = ?",
+                (worker, lease, now + lease_seconds, row[0]),
+            )
+        keys = ("shard_id", "input", "start", "end", "split", "field", "profile")
+        return {**dict(zip(keys, row[:7])), "lease": lease}
+
+    def renew(self, shard: dict, lease_seconds: float) -> bool:
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE shards SET lease_expires = ?"
+                " WHERE shard_id = ? AND lease = ? AND status = 'leased'",
+                (time.time() + lease_seconds, shard["shard_id"], shard["lease"]),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard: dict, rows: int) -> bool:
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE shards SET status = 'done', rows = ?, lease_expires = NULL"
+                " WHERE shard_id = ? AND status != 'done'",
+                (rows, shard["shard_id"]),
+            )
+        return cursor.rowcount == 1
+
+    def shards(self) -> list[dict]:
+        cursor = self.connection.execute(
+            "SELECT shard_id, input, start, end, split, field, profile, status,"
+            " worker, lease, lease_expires, rows FROM shards ORDER BY shard_id"
+        )
+        keys = [column[0] for column in cursor.description]
+        return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+def publish_input_shards(
+    queue: WorkQueue,
+    paths: list[str],
+    split: str = "line",
+    field: str = "text",
+    profile: str = "standard",
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    shard_rows: int | None = None,
+) -> int:
+    """
+    Plans the shards of each input (by rows when shard_rows is given,
+    else by bytes) and publishes them, inputs in order.
+
+    Returns:
+        int: the number of shards published
+    """
+    if split not in CHECKPOINT_SPLIT_MODES:
+        raise ValueError(f"unknown split {split!r}, use one of {CHECKPOINT_SPLIT_MODES}")
+    shards = []
+    for path in paths:
+        if shard_rows:
+            ranges = plan_row_shards(path, shard_rows, split, field)
+        else:
+            ranges = plan_byte_shards(path, shard_bytes, split)
+        shards.extend(
+            {
+                "input": os.path.abspath(path),
+                "start": start,
+                "end": end,
+                "split": split,
+                "field": field,
+                "profile": profile,
+            }
+            for start, end in ranges
+        )
+    return queue.publish(shards)
+
+
+def shard_results_path(output_dir: str, shard_id: int) -> str:
+    return os.path.join(output_dir, f"shard-{shard_id:08d}.bin")
+
+
+def score_shard(
+    queue: WorkQueue,
+    shard: dict,
+    output_dir: str,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+) -> bool:
+    """
+    Scores one claimed shard and commits it.
+
+    Returns:
+        bool: True if committed, False if the lease was lost
+            to another worker (the shard is theirs now)
+    """
+    renew_every = lease_seconds / 3
+    last_renewal = time.monotonic()
+    records = bytearray()
+    rows = 0
+    for document in iter_shard_documents(
+        shard["input"], shard["start"], shard["end"], shard["split"], shard["field"]
+    ):
+        records += RESULT_RECORD.pack(rows, *score_document(document, shard["profile"]))
+        rows += 1
+        if time.monotonic() - last_renewal >= renew_every:
+            if not queue.renew(shard, lease_seconds):
+                return False
+            last_renewal = time.monotonic()
+
+    results_path = shard_results_path(output_dir, shard["shard_id"])
+    temporary_path = f"{results_path}.{shard['lease']}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as results_file:
+        results_file.write(records)
+        results_file.flush()
+        os.fsync(results_file.fileno())
+    # same content whoever scores the shard: replacing is harmless
+    os.replace(temporary_path, results_path)
+    queue.complete(shard, rows)
+    return True
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_shard_worker(
+    queue: WorkQueue,
+    output_dir: str,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    worker: str | None = None,
+    max_shards: int | None = None,
+) -> int:
+    """
+    Claims and scores shards until none is left (or max_shards).
+
+    Returns:
+        int: shards committed by this worker
+    """
+    worker = worker or default_worker_name()
+    os.makedirs(output_dir, exist_ok=True)
+    committed = 0
+    while max_shards is None or committed < max_shards:
+        shard = queue.claim(worker, lease_seconds)
+        if shard is None:
+            break
+        committed += score_shard(queue, shard, output_dir, lease_seconds)
+    return committed
+
+
+def run_sqlite_worker(queue_path: str, output_dir: str, lease_seconds: float) -> int:
+    """run_shard_worker() on its own SQLiteWorkQueue connection (one per process)."""
+    queue = SQLiteWorkQueue(queue_path)
+    try:
+        return run_shard_worker(queue, output_dir, lease_seconds)
+    finally:
+        queue.close()
+
+
+def merge_shard_results(queue: WorkQueue, output_dir: str, results_path: str) -> dict:
+    """
+    Writes every shard's results to results_path in input order,
+    with doc_id counted across the whole job.
+
+    Raises:
+        RuntimeError: when some shards are not done
+
+    Returns:
+        dict: {"shards": count, "rows": count}
+    """
+    shards = queue.shards()
+    not_done = [shard["shard_id"] for shard in shards if shard["status"] != "done"]
+    if not_done:
+        raise RuntimeError(f"{len(not_done)} shards are not done, e.g. {not_done[:5]}")
+
+    doc_id = 0
+    temporary_path = results_path + ".tmp"
+    with open(temporary_path, "wb") as results_file:
+        for shard in shards:
+            shard_path = shard_results_path(output_dir, shard["shard_id"])
+            with open(shard_path, "rb") as shard_file:
+                records = shard_file.read()
+            if len(records) != shard["rows"] * RESULT_RECORD.size:
+                raise RuntimeError(f"shard {shard['shard_id']} results are incomplete")
+            merged = bytearray()
+            for _, words, sentences in RESULT_RECORD.iter_unpack(records):
+                merged += RESULT_RECORD.pack(doc_id, words, sentences)
+                doc_id += 1
+            results_file.write(merged)
+        results_file.flush()
+        os.fsync(results_file.fileno())
+    os.replace(temporary_path, results_path)
+    return {"shards": len(shards), "rows": doc_id}
+
+
+def queue_status(queue: WorkQueue) -> dict:
+    """Shard counts per status, and the rows committed so far."""
+    status: dict = {"pending": 0, "leased": 0, "expired": 0, "done": 0, "rows": 0}
+    now = time.time()
+    for shard in queue.shards():
+        if shard["status"] == "leased" and shard["lease_expires"] < now:
+            status["expired"] += 1
+        else:
+            status[shard["status"]] += 1
+        status["rows"] += shard["rows"] or 0
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded multi-node lang-detect runner.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="split inputs into shards and publish")
+    plan_parser.add_argument("queue", help="SQLite work queue file")
+    plan_parser.add_argument("inputs", nargs="+")
+    plan_parser.add_argument("--split", choices=CHECKPOINT_SPLIT_MODES, default="line")
+    plan_parser.add_argument("--field", default="text")
+    plan_parser.add_argument("--profile", choices=DETECTOR_PROFILES, default="standard")
+    plan_parser.add_argument(
+        "--shard-mb", type=float, default=DEFAULT_SHARD_BYTES / 2**20
+    )
+    plan_parser.add_argument("--shard-rows", type=int, help="shard by rows, not bytes")
+
+    work_parser = commands.add_parser("work", help="claim and score shards")
+    work_parser.add_argument("queue")
+    work_parser.add_argument("output_dir")
+    work_parser.add_argument("--jobs", type=int, default=1, help="worker processes")
+    work_parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+
+    status_parser = commands.add_parser("status", help="shard counts")
+    status_parser.add_argument("queue")
+
+    merge_parser = commands.add_parser("merge", help="write the merged results")
+    merge_parser.add_argument("queue")
+    merge_parser.add_argument("output_dir")
+    merge_parser.add_argument("results")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            committed = sum(
+                executor.map(
+                    run_sqlite_worker,
+                    [args.queue] * args.jobs,
+                    [args.output_dir] * args.jobs,
+                    [args.lease_seconds] * args.jobs,
+                )
+            )
+        print(json.dumps({"committed_shards": committed}))
+        return 0
+
+    queue = SQLiteWorkQueue(args.queue)
+    try:
+        if args.command == "plan":
+            published = publish_input_shards(
+                queue,
+                args.inputs,
+                split=args.split,
+                field=args.field,
+                profile=args.profile,
+                shard_bytes=int(args.shard_mb * 2**20),
+                shard_rows=args.shard_rows,
+            )
+            print(json.dumps({"published_shards": published}))
+        elif args.command == "status":
+            print(json.dumps(queue_status(queue)))
+        else:
+            try:
+                summary = merge_shard_results(queue, args.output_dir, args.results)
+            except RuntimeError as error:
+                parser.error(str(error))
+            print(json.dumps(summary))
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
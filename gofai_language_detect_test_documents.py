@@ -0,0 +1,43 @@
+"""
+# Language-Detect: generated test documents
+
+Seeded document generators shared by the test modules. Each one draws
+from its own random.Random(seed): the documents are the same whatever
+other tests ran before, and the global random module is never reseeded.
+"""
+
+import random
+
+from gofai_language_detect_corpora import bundled_corpus_lines
+
+
+def random_documents(count: int, seed: int, alphabet: str, max_chars: int) -> list[str]:
+    """
+    count documents of 0 to max_chars characters drawn from alphabet.
+
+    Example:
+        >>> random_documents(3, seed=1, alphabet="ab ", max_chars=4)
+        [' ', '', 'ab']
+    """
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_chars)))
+        for _ in range(count)
+    ]
+
+
+def long_sentence_documents(count: int, seed: int) -> list[str]:
+    """
+    Corpus sentences run together, 15 at a time, mostly without their periods:
+    sentences over MAX_WORDS_PER_SENTENCE, split into segments.
+    """
+    rng = random.Random(seed)
+    sentences = bundled_corpus_lines("clean_sentences_list")[:2000]
+    documents = []
+    for _ in range(count):
+        words = " ".join(rng.sample(sentences, 15)).split()
+        kept_periods = [
+            word.rstrip(".") if rng.random() < 0.97 else word for word in words
+        ]
+        documents.append(" ".join(kept_periods))
+    return documents
@@ -1,4 +1,4 @@
-# Module for language detection unit tests below
+# Language detection module; unit tests are in test_gofai_language_detect_v52.py
 # use/import form module with; from gofai_language_detect import lang_detect_word_sentence_counter as lang_detect
 """
 # Language-Detect:
@@ -170,8 +170,13 @@ LEN_TO_N_VOWELS = {
 
 """
 
-# import re
-import unittest
+# Importing this module loads only the detector (no unittest, re, typing):
+# see benchmarks/benchmark_import_time.py
+import _thread
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 # Sentence structure rules 1
 MIN_VERBS_PREPOSITIONS_PER_SENTENCE = 1
@@ -179,7 +184,7 @@ MIN_NLTK_STOPWORDS_PER_SENTENCE = 1
 MIN_WORDS_PER_SENTENCE = 4  # Common sentences have subject and predicate
 
 # List of stop words
-NLTK_STOPWORDS = [
+NLTK_STOPWORDS = (
     "i",
     "me",
     "my",
@@ -307,8 +312,8 @@ NLTK_STOPWORDS = [
     "don",
     "should",
     "now",
-]
-NLTK_STOPWORDS_SET = set(NLTK_STOPWORDS)
+)
+NLTK_STOPWORDS_SET = frozenset(NLTK_STOPWORDS)
 
 # Vowel count per word length (-s if over len 5]
 # word_len_to_vowel_count_list_lookup
@@ -338,11 +343,24 @@ LEN_TO_N_VOWELS_BASE = {
 
 # Convert list lookups to sets for O(1) lookup time
 LEN_TO_N_VOWELS = {
-    length: set(vowels) for length, vowels in LEN_TO_N_VOWELS_BASE.items()
+    length: frozenset(vowels) for length, vowels in LEN_TO_N_VOWELS_BASE.items()
 }
 
+
+def _min_vowels_per_word(len_to_n_vowels: dict) -> int:
+    """The fewest vowels a valid word can have under len_to_n_vowels."""
+    return min(
+        (min(vowel_counts) for vowel_counts in len_to_n_vowels.values() if vowel_counts),
+        default=0,
+    )
+
+
+# Derived from LEN_TO_N_VOWELS (and rebuilt with it) for the prescreen
+PRESCREEN_MIN_VOWELS_PER_WORD = _min_vowels_per_word(LEN_TO_N_VOWELS)
+
 # Character sets and linguistic rules
-ENGLISH_VOWELS = set("aeiouAEIOUyY")
+ENGLISH_VOWELS = frozenset("aeiouAEIOUyY")
+ENGLISH_VOWELS_DELETE_TABLE = str.maketrans("", "", "".join(sorted(ENGLISH_VOWELS)))
 # Word formation rules
 MAX_LENGTH_VOWELS_ONLY = 1  # Only "a", "I" as single vowel words
 MAX_LENGTH_NO_VOWELS = 0  # Common short consonant clusters like "Mrs"
@@ -354,10 +372,10 @@ MAX_UNDERSCORES_PER_WORD = 1  # Standard words don't have underscores
 MAX_WORDS_PER_SENTENCE = 100  # Reasonable limit for normal text
 SPLIT_SENTENCES_ON_N_WORDS = 30
 # Character sets for validation
-VALID_WORD_SYMBOLS = set("-'_")  # Symbols allowed within words
+VALID_WORD_SYMBOLS = frozenset("-'_")  # Symbols allowed within words
 
-VERB_AND_PREPOS_TERMS_SET = set(
-    [
+VERB_AND_PREPOS_TERMS_SET = frozenset(
+    (
         # prepositions
         "about",
         "above",
@@ -547,47 +565,290 @@ VERB_AND_PREPOS_TERMS_SET = set(
         "put",
         "puts",
         "putting",
-    ]
+    )
+)
+SENTENCE_ENDINGS = frozenset(".!?")  # Characters that CAN end sentences (not required)
+ABBREVIATIONS_SET = frozenset(
+    {
+        "mr.",
+        "mrs.",
+        "ms.",
+        "dr.",
+        "prof.",
+        "sr.",
+        "jr.",
+        "vs.",
+        "etc.",
+        "e.g.",
+        "i.e.",
+        "st.",
+        "dr.",
+        "cir.",
+        "inc.",
+        # upper
+        "Mr.",
+        "Mrs.",
+        "Ms.",
+        "Dr.",
+        "Prof.",
+        "Sr.",
+        "Jr.",
+        "Vs.",
+        "VS.",
+        "Etc.",
+        "E.g.",
+        "I.e.",
+        "St.",
+        "Dr.",
+        "Cir.",
+        "Inc.",
+    }
 )
-SENTENCE_ENDINGS = set(".!?")  # Characters that CAN end sentences (not required)
-ABBREVIATIONS_SET = {
-    "mr.",
-    "mrs.",
-    "ms.",
-    "dr.",
-    "prof.",
-    "sr.",
-    "jr.",
-    "vs.",
-    "etc.",
-    "e.g.",
-    "i.e.",
-    "st.",
-    "dr.",
-    "cir.",
-    "inc.",
-    # upper
-    "Mr.",
-    "Mrs.",
-    "Ms.",
-    "Dr.",
-    "Prof.",
-    "Sr.",
-    "Jr.",
-    "Vs.",
-    "VS.",
-    "Etc.",
-    "E.g.",
-    "I.e.",
-    "St.",
-    "Dr.",
-    "Cir.",
-    "Inc.",
-}
 
-INVALID_SYMBOLS = set("!@#$%^&*<>{}[]\\|")  # Symbols that invalidate words
+INVALID_SYMBOLS = frozenset("!@#$%^&*<>{}[]\\|")  # Symbols that invalidate words
 # INVALID_SYMBOLS = set("!@#$%^&*()")  # Add any other prohibited symbols as needed
 
+"""
+Token categories
+----------------
+Every word-list rule (stopwords, verbs/prepositions, abbreviations, ...)
+is a category bit. TOKEN_CATEGORY_FLAGS maps a lowercased token
+to the bitmask of all its categories, so the sentence filter
+needs one dict probe per token, whatever the number of categories.
+
+For a token that ends a sentence ("is." "done!"), the stored flags
+are those of the word without its ending punctuation,
+since that is the word the sentence rules count.
+Abbreviations ("mr.") are stored as themselves, with CATEGORY_ABBREVIATION.
+
+Use register_category_words() to add words or whole new categories.
+"""
+CATEGORY_STOPWORD = 1
+CATEGORY_VERB_PREPOS = 2
+CATEGORY_ABBREVIATION = 4
+
+TOKEN_CATEGORY_BITS = {
+    "stopword": CATEGORY_STOPWORD,
+    "verb_prepos": CATEGORY_VERB_PREPOS,
+    "abbreviation": CATEGORY_ABBREVIATION,
+}
+
+# {category name: set of lowercase words}
+TOKEN_CATEGORY_WORDS = {
+    "stopword": set(NLTK_STOPWORDS_SET),
+    "verb_prepos": set(VERB_AND_PREPOS_TERMS_SET),
+    # lowercased tokens can only ever match the lowercase entries
+    "abbreviation": {abbrev for abbrev in ABBREVIATIONS_SET if abbrev == abbrev.lower()},
+}
+
+
+def build_token_category_flags(
+    category_words: dict[str, set[str]],
+    category_bits: dict[str, int],
+) -> dict[str, int]:
+    """
+    Builds the merged {lowercase token: category bitmask} lookup.
+
+    Args:
+        category_words (dict): {category name: set of lowercase words}
+        category_bits (dict): {category name: bit flag}
+
+    Returns:
+        dict[str, int]: token -> bitmask. Keys ending in a SENTENCE_ENDINGS
+            character (and not abbreviations) carry the bitmask
+            of the word before that character.
+    """
+    abbreviation_words = category_words.get("abbreviation", set())
+
+    # {word: bitmask} as registered
+    direct_flags: dict[str, int] = {}
+    for category, words in category_words.items():
+        bit = category_bits[category]
+        for word in words:
+            direct_flags[word] = direct_flags.get(word, 0) | bit
+
+    token_flags: dict[str, int] = {}
+    for word, flags in direct_flags.items():
+        # A registered word that ends a sentence is never looked up whole
+        if word[-1:] not in SENTENCE_ENDINGS or word in abbreviation_words:
+            token_flags[word] = flags
+
+        # The same word followed by sentence-ending punctuation
+        for end_char in SENTENCE_ENDINGS:
+            ending_token = word + end_char
+            if ending_token not in abbreviation_words:
+                token_flags[ending_token] = flags & ~CATEGORY_ABBREVIATION
+
+    return token_flags
+
+
+TOKEN_CATEGORY_FLAGS = build_token_category_flags(
+    TOKEN_CATEGORY_WORDS, TOKEN_CATEGORY_BITS
+)
+
+
+def build_ascii_bytes_token_flags(token_flags: dict[str, int]) -> dict[bytes, int]:
+    """
+    The ASCII keys of token_flags, as bytes, for lookups of
+    lowercased ASCII byte tokens (see lang_detect_word_sentence_counter_bytes).
+
+    Non-ASCII keys are left out: an ASCII token can never match them.
+    """
+    return {
+        token.encode("ascii"): flags
+        for token, flags in token_flags.items()
+        if token.isascii()
+    }
+
+
+TOKEN_CATEGORY_FLAGS_BYTES = build_ascii_bytes_token_flags(TOKEN_CATEGORY_FLAGS)
+
+
+"""
+Thread safety
+-------------
+The detector functions keep no state between calls and write no shared
+data, so any number of threads may score at once, also on free-threaded
+(no GIL) CPython builds, sharing the tables without copies:
+- word lists and character sets are tuples / frozensets
+- tables that can be reconfigured (TOKEN_CATEGORY_FLAGS,
+  TOKEN_CATEGORY_FLAGS_BYTES, LEN_TO_N_VOWELS) are never changed in place:
+  register_category_words() and load_detector_config() build new ones and
+  then swap them in, holding DETECTOR_TABLES_LOCK, so writers never race.
+  A call that runs during a reconfiguration may use the tables from before it.
+Any future cache must follow the same rule: build, then swap in under the lock.
+Hold DETECTOR_TABLES_LOCK (reentrant) to apply several changes as one.
+"""
+# threading.RLock is this same _thread.RLock, but importing threading
+# (and with it collections) would triple this module's import time
+DETECTOR_TABLES_LOCK = _thread.RLock()
+
+
+def register_category_words(category: str, words) -> int:
+    """
+    Adds words to a token category, creating the category if it is new,
+    and rebuilds TOKEN_CATEGORY_FLAGS.
+
+    Lookups stay one probe per token however many categories exist.
+    Thread safe (see "Thread safety").
+
+    Args:
+        category (str): e.g. "verb_prepos" to add domain verbs
+            to the existing verb/preposition rule, or a new name.
+        words (iterable of str): words to add (lowercased here).
+
+    Returns:
+        int: the category's bit flag
+    """
+    global TOKEN_CATEGORY_FLAGS, TOKEN_CATEGORY_FLAGS_BYTES
+
+    new_words = [word.lower() for word in words]
+    with DETECTOR_TABLES_LOCK:
+        if category not in TOKEN_CATEGORY_BITS:
+            TOKEN_CATEGORY_BITS[category] = 1 << len(TOKEN_CATEGORY_BITS)
+        TOKEN_CATEGORY_WORDS.setdefault(category, set()).update(new_words)
+
+        token_category_flags = build_token_category_flags(
+            TOKEN_CATEGORY_WORDS, TOKEN_CATEGORY_BITS
+        )
+        token_category_flags_bytes = build_ascii_bytes_token_flags(token_category_flags)
+        TOKEN_CATEGORY_FLAGS = token_category_flags
+        TOKEN_CATEGORY_FLAGS_BYTES = token_category_flags_bytes
+        return TOKEN_CATEGORY_BITS[category]
+
+
+# Settings a detector config (json or dict) may set
+DETECTOR_CONFIG_KEYS = (
+    "LEN_TO_N_VOWELS",
+    "MIN_WORDS_PER_SENTENCE",
+    "MIN_VERBS_PREPOSITIONS_PER_SENTENCE",
+    "MIN_NLTK_STOPWORDS_PER_SENTENCE",
+    "MAX_WORDS_PER_SENTENCE",
+    "SPLIT_SENTENCES_ON_N_WORDS",
+)
+
+
+def load_detector_config(config: dict | str) -> None:
+    """
+    Applies a detector config, e.g. as written by
+    gofai_language_detect_calibrate.py, to this module's settings.
+
+    Args:
+        config (dict | str): a dict, or the path of a json file,
+            with keys from DETECTOR_CONFIG_KEYS.
+            Keys starting with "_" (reports, notes) are ignored.
+
+    Raises:
+        ValueError: on an unknown setting name
+
+    Thread safe (see "Thread safety"): the whole config is applied
+    under DETECTOR_TABLES_LOCK.
+    """
+    if isinstance(config, str):
+        import json
+
+        with open(config, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+
+    unknown_keys = [
+        key
+        for key in config
+        if not key.startswith("_") and key not in DETECTOR_CONFIG_KEYS
+    ]
+    if unknown_keys:
+        raise ValueError(f"unknown detector config settings: {unknown_keys}")
+
+    # All new values are built first, then swapped in together
+    new_settings = {}
+    for key, value in config.items():
+        if key.startswith("_"):
+            continue
+        if key == "LEN_TO_N_VOWELS":
+            # json object keys are strings
+            len_to_n_vowels_base = {
+                int(length): list(vowel_counts) for length, vowel_counts in value.items()
+            }
+            new_settings["LEN_TO_N_VOWELS_BASE"] = len_to_n_vowels_base
+            new_settings["LEN_TO_N_VOWELS"] = {
+                length: frozenset(vowel_counts)
+                for length, vowel_counts in len_to_n_vowels_base.items()
+            }
+            new_settings["PRESCREEN_MIN_VOWELS_PER_WORD"] = _min_vowels_per_word(
+                len_to_n_vowels_base
+            )
+        else:
+            new_settings[key] = int(value)
+
+    with DETECTOR_TABLES_LOCK:
+        globals().update(new_settings)
+
+
+# Characters whose consecutive repeats are collapsed before splitting
+CHARS_TO_DEDUPE = frozenset({" ", "-", "–", "—"})
+
+# Every character str.split() splits on (all str.isspace() characters)
+WHITESPACE_CHARS = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+# The prescreen's character classes, each mapped to a member of its class:
+# after one translate(), .count(" ") counts whitespace and .count("a") vowels.
+# Vowels as counted after word.lower(): "İ".lower() is "i" + a combining dot
+PRESCREEN_VOWELS = "".join(sorted(ENGLISH_VOWELS)) + "\u0130"
+PRESCREEN_CLASS_TABLE = str.maketrans(
+    WHITESPACE_CHARS + PRESCREEN_VOWELS,
+    " " * len(WHITESPACE_CHARS) + "a" * len(PRESCREEN_VOWELS),
+)
+
+# Byte versions of the word rules, for pure-ASCII input
+# (ASCII lower() stays ASCII, so counting both cases matches word.lower())
+ENGLISH_VOWELS_BYTES = "".join(sorted(ENGLISH_VOWELS)).encode("ascii")
+INVALID_SYMBOLS_BYTES = "".join(sorted(INVALID_SYMBOLS)).encode("ascii")
+SENTENCE_ENDINGS_BYTES = frozenset(end.encode("ascii") for end in SENTENCE_ENDINGS)
+# bytes.split() only splits on b" \t\n\r\x0b\x0c", str.split() also on \x1c-\x1f
+ASCII_WHITESPACE_TO_SPACE_TABLE = bytes.maketrans(b"\x1c\x1d\x1e\x1f", b"    ")
+
 
 # add comments
 def is_valid_english_word(word_candidate: str) -> bool:
@@ -711,14 +972,15 @@ def check_vowel_count_for_length(word: str) -> bool:
 
 def remove_duplicate_chars(
     text: str,
-    chars_to_dedupe: set[str] | None = None,
+    chars_to_dedupe: set[str] | frozenset[str] | None = None,
 ) -> str:
     """
-    Alternative implementation using iterative approach instead of regex.
-
     Remove duplicate consecutive occurrences of specified characters from a string.
-    This version processes the string character by character for potentially
-    better performance on smaller strings.
+
+    Each run of a character in chars_to_dedupe becomes one occurrence.
+    Every str.replace() of a doubled character at least halves its runs,
+    so a run of n characters (e.g. millions of dashes) takes about log2(n)
+    passes in C, instead of a Python loop over every character.
 
     Args:
         text (str): The input string to process
@@ -727,34 +989,21 @@ def remove_duplicate_chars(
 
     Returns:
         str: The processed string with duplicate characters removed
+
+    Example:
+        >>> remove_duplicate_chars("so  --  fine---")
+        'so - fine-'
     """
 
     # Default characters to remove duplicates for
     if chars_to_dedupe is None:
-        chars_to_dedupe = {" ", "-", "–", "—"}  # Using set for O(1) lookup
-
-    # # Input validation
-    # if not isinstance(text, str):
-    #     raise TypeError("Input must be a string")
-
-    if not text:  # Handle empty string
-        return text
-
-    result: list[str] = []  # Type annotation for result
-    prev_char: str | None = None  # Type annotation for prev_char
-
-    # Iterate through each character
-    for char in text:
-        # If current char is in our target set and same as previous, skip it
-        if char in chars_to_dedupe and char == prev_char:
-            continue
-        else:
-            result.append(char)
-            prev_char = char
-
-    final_result = "".join(result)
+        chars_to_dedupe = CHARS_TO_DEDUPE
 
-    return final_result
+    for char in chars_to_dedupe:
+        doubled = char + char
+        while doubled in text:
+            text = text.replace(doubled, char)
+    return text
 
 
 def sanitize_and_split_text(raw_text: str) -> list[str]:
@@ -833,10 +1082,10 @@ def split_wordlist_into_sentences_and_filter(
 
     Dependencies:
         - SENTENCE_ENDINGS (tuple): Valid sentence-ending punctuation
-        - ABBREVIATIONS_SET (set): Known abbreviations to handle
+        - TOKEN_CATEGORY_FLAGS (dict): One lookup per word for abbreviations,
+          verbs/prepositions and stopwords (see register_category_words())
         - MIN_WORDS_PER_SENTENCE (int): Minimum words required
         - MAX_WORDS_PER_SENTENCE (int): Maximum words allowed
-        - VERB_AND_PREPOS_TERMS_SET (set): Required grammatical elements
         - split_over_max_onesentence_wordlist(): Handles oversized sentences
 
     Examples:
@@ -857,25 +1106,36 @@ def split_wordlist_into_sentences_and_filter(
         - Split segments must independently meet all validity criteria
     """
     sentences: list[list[str]] = []
+    # Category bitmask of each word, one TOKEN_CATEGORY_FLAGS probe per token
+    sentences_flags: list[list[int]] = []
     current_sentence: list[str] = []
+    current_flags: list[int] = []
     final_sentences: list[list[str]] = []
+    token_category_flags = TOKEN_CATEGORY_FLAGS
 
     # First: Split into actual sentences
     for word in words:
+        flags = token_category_flags.get(word.lower(), 0)
         if (
-            any(word.endswith(end) for end in SENTENCE_ENDINGS)
-            and word.lower() not in ABBREVIATIONS_SET
+            word[-1:] in SENTENCE_ENDINGS
+            and not flags & CATEGORY_ABBREVIATION
         ):
+            # flags are already those of word_part (see TOKEN_CATEGORY_FLAGS)
             word_part = word[:-1]
             punct_part = word[-1]
 
             if word_part:
                 current_sentence.append(word_part)
+                current_flags.append(flags)
             current_sentence.append(punct_part)
+            current_flags.append(0)
             sentences.append(current_sentence)
+            sentences_flags.append(current_flags)
             current_sentence = []
+            current_flags = []
         else:
             current_sentence.append(word)
+            current_flags.append(flags)
 
     # Handle any remaining words in last sentence
     """
@@ -886,10 +1146,12 @@ def split_wordlist_into_sentences_and_filter(
     if current_sentence:
         if not any(current_sentence[-1].endswith(end) for end in SENTENCE_ENDINGS):
             current_sentence.append(".")
+            current_flags.append(0)
         sentences.append(current_sentence)
+        sentences_flags.append(current_flags)
 
     # Now filter the sentences and handle length
-    for this_sentence in sentences:
+    for this_sentence, this_flags in zip(sentences, sentences_flags):
 
         """
         remove punctuation from the end of the sentence
@@ -904,23 +1166,16 @@ def split_wordlist_into_sentences_and_filter(
         ]
         remove_set = set(remove_list)
 
-        # # inspection
-        # print(this_sentence[-1])
-
         if this_sentence[-1] in remove_set:
             del this_sentence[-1]
-
-        # # inspection
-        # print(this_sentence[-1])
+            del this_flags[-1]
 
         # Calculate the count of verbs/prepositions in the current sentence
         verb_preposition_count = sum(
-            1 for word in this_sentence if word.lower() in VERB_AND_PREPOS_TERMS_SET
+            1 for flags in this_flags if flags & CATEGORY_VERB_PREPOS
         )
 
-        nltk_stopword_count = sum(
-            1 for word in this_sentence if word.lower() in NLTK_STOPWORDS
-        )
+        nltk_stopword_count = sum(1 for flags in this_flags if flags & CATEGORY_STOPWORD)
 
         # First check if it's a valid sentence
         if (
@@ -932,17 +1187,16 @@ def split_wordlist_into_sentences_and_filter(
             # If valid and too long, split while preserving meaning
             if len(this_sentence) > MAX_WORDS_PER_SENTENCE:
                 split_segments = split_over_max_onesentence_wordlist(this_sentence)
+                split_segments_flags = split_over_max_onesentence_wordlist(this_flags)
 
                 # validate each split segment
-                for segment in split_segments:
+                for segment, segment_flags in zip(split_segments, split_segments_flags):
                     # Calculate count for segment
                     segment_verb_preposition_count = sum(
-                        1
-                        for word in segment
-                        if word.lower() in VERB_AND_PREPOS_TERMS_SET
+                        1 for flags in segment_flags if flags & CATEGORY_VERB_PREPOS
                     )
                     segment_nltk_stopword_count_count = sum(
-                        1 for word in segment if word.lower() in NLTK_STOPWORDS
+                        1 for flags in segment_flags if flags & CATEGORY_STOPWORD
                     )
 
                     if (
@@ -1187,7 +1441,63 @@ def split_wordlist_into_sentences_and_filter(
 # return sentences
 
 
-def lang_detect_word_sentence_counter(input_text: str) -> tuple[int, int]:
+def character_class_histogram(input_text: str) -> dict[str, int]:
+    """
+    Counts the character classes the prescreen needs, over the whole text:
+    one C-speed str.translate() to class representatives, then .count()s
+    (no python loop).
+
+    Returns:
+        dict[str, int]: {"chars", "whitespace", "vowels", "periods"},
+            where vowels are counted as the word rules count them.
+    """
+    classes = input_text.translate(PRESCREEN_CLASS_TABLE)
+    return {
+        "chars": len(input_text),
+        "whitespace": classes.count(" "),
+        "vowels": classes.count("a"),
+        "periods": classes.count("."),
+    }
+
+
+def prescreen_text_for_language(input_text: str) -> bool:
+    """
+    Cheap check, before tokenizing, that input_text can possibly
+    contain a valid sentence (under any of the DETECTOR_PROFILES).
+
+    Returns False only when one of these must-have conditions fails:
+    1. Enough potential words: a sentence needs MIN_WORDS_PER_SENTENCE words,
+       and there are at most (whitespace chars + periods + 1) of them,
+       since only whitespace and periods split words.
+    2. Enough vowels: every valid word has at least as many vowels as the
+       smallest count in LEN_TO_N_VOWELS (PRESCREEN_MIN_VOWELS_PER_WORD),
+       so a sentence needs MIN_WORDS_PER_SENTENCE times that many in the text.
+
+    False-reject guarantee:
+        When this returns False, the word rules cannot produce a sentence,
+        so lang_detect_word_sentence_counter() would return 0 sentences.
+        (It may have found some words, e.g. "Hello there" is (2, 0);
+        with prescreen=True such input is reported as (0, 0).)
+        It returns True for all the bundled valid test cases.
+
+    Typical rejects: base64 blobs, minified json, long urls,
+    and digit, hex or symbol runs with no spaces or too few vowels.
+    """
+    histogram = character_class_histogram(input_text)
+
+    if histogram["whitespace"] + histogram["periods"] + 1 < MIN_WORDS_PER_SENTENCE:
+        return False
+
+    return (
+        histogram["vowels"] >= MIN_WORDS_PER_SENTENCE * PRESCREEN_MIN_VOWELS_PER_WORD
+    )
+
+
+def lang_detect_word_sentence_counter(
+    input_text: str,
+    profile: str = "standard",
+    prescreen: bool = False,
+) -> tuple[int, int]:
     """
     Analyzes input text to count valid English words and complete sentences.
 
@@ -1201,6 +1511,11 @@ def lang_detect_word_sentence_counter(input_text: str) -> tuple[int, int]:
     Args:
         input_text (str): Raw input text to analyze. Can contain multiple sentences,
             spacing variations, and punctuation.
+        profile (str): "standard" (default), or "fast" / "strict",
+            see DETECTOR_PROFILES.
+        prescreen (bool): if True, first run prescreen_text_for_language()
+            and return (0, 0) at once for text that cannot hold a sentence.
+            Sentence counts are never changed by the prescreen.
 
     Returns:
         tuple[int, int]: A tuple containing:
@@ -1220,6 +1535,16 @@ def lang_detect_word_sentence_counter(input_text: str) -> tuple[int, int]:
         >>> lang_detect_word_sentence_counter(text)
         (7, 1)
     """
+    if prescreen and not prescreen_text_for_language(input_text):
+        return (0, 0)
+
+    if profile != "standard":
+        if profile == "fast":
+            return lang_detect_word_sentence_counter_fast(input_text)
+        if profile == "strict":
+            return lang_detect_word_sentence_counter_strict(input_text)
+        raise ValueError(f"unknown profile {profile!r}, use one of {DETECTOR_PROFILES}")
+
     # Normalize spaces and join split words back together
     input_text = " ".join(word for word in input_text.split())
 
@@ -1255,133 +1580,435 @@ def lang_detect_word_sentence_counter(input_text: str) -> tuple[int, int]:
     return (len(valid_wordslist), len(valid_sentences))
 
 
-# # Example usage and testing
-# test_text = "please reply to my request about weather, tom"
-# word_count, sentence_count = lang_detect_word_sentence_counter(test_text)
-# print(f"Valid words found: {word_count}")
-# print(f"Complete sentences identified: {sentence_count}")
+"""
+Profiles
+--------
+"Pipeline can be made more strict or loose":
+
+fast:
+    Only the two cheap rules: raw whitespace-split words,
+    vowels per word (LEN_TO_N_VOWELS), and runs of at least
+    MIN_WORDS_PER_SENTENCE valid words between sentence endings.
+    No duplicate-character or period clean-up, no symbol checks,
+    no abbreviation or stopword/verb lookups, no long-sentence splitting.
+standard:
+    The full pipeline of lang_detect_word_sentence_counter().
+strict:
+    The standard pipeline, plus the per-word caps
+    MAX_UPPERCASE_PER_WORD, MAX_DIGITS_PER_WORD,
+    MAX_HYPHENS_PER_WORD and MAX_UNDERSCORES_PER_WORD.
+
+See benchmarks/benchmark_profiles.py for speed and agreement
+with the standard profile.
+"""
+DETECTOR_PROFILES = ("fast", "standard", "strict")
 
 
-# empty/incomplete emails
-invalid_incomplete_test_cases_2 = [
+def lang_detect_word_sentence_counter_fast(input_text: str) -> tuple[int, int]:
+    """
+    The "fast" profile: (words, sentences) using only
+    raw space-split words and vowels per word.
+
+    Example:
+        >>> lang_detect_word_sentence_counter_fast("He had a great time there.")
+        (5, 1)
     """
-"buy $$$"
-""",
+    word_count = 0
+    sentence_count = 0
+    words_in_sentence = 0
+
+    # check_vowel_count_for_length(), with the table lookups hoisted
+    len_to_n_vowels = LEN_TO_N_VOWELS
+    min_word_len = min(len_to_n_vowels.keys())
+    max_word_len = max(len_to_n_vowels.keys())
+
+    for word in input_text.split():
+        word_len = min(len(word), max_word_len)
+        if word_len >= min_word_len:
+            lowered = word.lower()
+            vowel_count = len(lowered) - len(
+                lowered.translate(ENGLISH_VOWELS_DELETE_TABLE)
+            )
+            if vowel_count in len_to_n_vowels.get(word_len, ()):
+                word_count += 1
+                words_in_sentence += 1
+        if word[-1] in SENTENCE_ENDINGS:
+            if words_in_sentence >= MIN_WORDS_PER_SENTENCE:
+                sentence_count += 1
+            words_in_sentence = 0
+
+    if words_in_sentence >= MIN_WORDS_PER_SENTENCE:
+        sentence_count += 1
+
+    return (word_count, sentence_count)
+
+
+def is_strict_english_word(word_candidate: str) -> bool:
     """
-    "BUY SPAM BUY SPAM!",  # not valid
-""",
-]
+    The "strict" profile word rule: is_valid_english_word(),
+    and no more than MAX_UPPERCASE_PER_WORD capitals,
+    MAX_DIGITS_PER_WORD digits, MAX_HYPHENS_PER_WORD hyphens
+    and MAX_UNDERSCORES_PER_WORD underscores.
 
-# short/borderline examples
-valid_short_test_cases_4 = [
+    Example:
+        >>> is_strict_english_word("Hello"), is_strict_english_word("HeLLo")
+        (True, False)
     """
-He had a great time there.
-""",
+    if not is_valid_english_word(word_candidate):
+        return False
+    if (
+        word_candidate.count("-") > MAX_HYPHENS_PER_WORD
+        or word_candidate.count("_") > MAX_UNDERSCORES_PER_WORD
+    ):
+        return False
+    if sum(1 for char in word_candidate if char.isupper()) > MAX_UPPERCASE_PER_WORD:
+        return False
+    return sum(1 for char in word_candidate if char.isdigit()) <= MAX_DIGITS_PER_WORD
+
+
+def lang_detect_word_sentence_counter_strict(input_text: str) -> tuple[int, int]:
     """
-This is sentence one.
-""",
+    The "strict" profile: the standard pipeline
+    with is_strict_english_word() as the word rule.
+    """
+    input_text = " ".join(word for word in input_text.split())
+    words_list: list[str] = sanitize_and_split_text(input_text)
+    valid_wordslist: list[str] = [
+        word for word in words_list if is_strict_english_word(word)
+    ]
+    sentences = split_wordlist_into_sentences_and_filter(valid_wordslist)
+    return (len(valid_wordslist), len(sentences))
+
+
+def iter_sanitized_tokens_with_offsets(
+    input_text: str,
+) -> "Iterator[tuple[str, int, int]]":
+    """
+    Yields the same potential words as sanitize_and_split_text()
+    (applied to space-normalized text, as in lang_detect_word_sentence_counter)
+    together with their character offsets in the original input_text.
+
+    Works directly on input_text: no normalized copy of the document is made.
+    Offsets come from str.find() of each str.split() run, in order
+    (only whitespace lies between runs, so the next match is the run itself).
+    Each whitespace-separated run is de-duplicated (see CHARS_TO_DEDUPE)
+    and split after each period, the same as the string pipeline does.
+
+    Args:
+        input_text (str): Raw, un-normalized input text.
+
+    Yields:
+        tuple[str, int, int]: (token, start, end), where
+            input_text[start:end] is the source of the token.
+            When a run of duplicate dashes was collapsed,
+            the span covers the whole original run.
+
+    Example:
+        >>> list(iter_sanitized_tokens_with_offsets("Hi  there.Bye"))
+        [('Hi', 0, 2), ('there.', 4, 10), ('Bye', 10, 13)]
+    """
+    search_start = 0
+    for raw_token in input_text.split():
+        token_start = input_text.find(raw_token, search_start)
+        token_end = token_start + len(raw_token)
+        search_start = token_end
+
+        # Map de-duplicated characters back to original positions
+        # (only needed when the token holds a character to de-duplicate)
+        kept_positions: list[int] | None = None
+        if any(char in raw_token for char in CHARS_TO_DEDUPE):
+            kept_chars: list[str] = []
+            kept_positions = []
+            prev_char: str | None = None
+            for position, char in enumerate(raw_token):
+                if char in CHARS_TO_DEDUPE and char == prev_char:
+                    continue
+                kept_chars.append(char)
+                kept_positions.append(position)
+                prev_char = char
+            token = "".join(kept_chars)
+        else:
+            token = raw_token
+
+        token_len = len(token)
+        piece_start = 0
+        while piece_start < token_len:
+            period_index = token.find(".", piece_start)
+            piece_end = token_len if period_index == -1 else period_index + 1
+
+            if kept_positions is None:
+                start = token_start + piece_start
+                end = token_start + piece_end
+            else:
+                start = token_start + kept_positions[piece_start]
+                # The last kept character stands for its whole run
+                if piece_end < token_len:
+                    end = token_start + kept_positions[piece_end]
+                else:
+                    end = token_end
+
+            yield (token[piece_start:piece_end], start, end)
+            piece_start = piece_end
+
+
+def _iter_accepted_sentence_spans(
+    elements: list[tuple[int, int, int]],
+    sentence_end: int,
+) -> "Iterator[tuple[int, int]]":
+    """
+    Applies the sentence rules of split_wordlist_into_sentences_and_filter()
+    to one potential sentence and yields the spans that pass.
+
+    Args:
+        elements (list): (category flags, start, end) for each word
+            of the sentence, not including a removed sentence-ending
+            punctuation mark.
+        sentence_end (int): Offset where the whole sentence ends
+            (after its ending punctuation, if any).
+
+    Yields:
+        tuple[int, int]: (start, end) of the sentence, or of each valid
+            segment when the sentence is over MAX_WORDS_PER_SENTENCE.
     """
-This is really a sentence.
-""",
-]
+    if len(elements) < MIN_WORDS_PER_SENTENCE:
+        return
 
-valid_sample_cases = [
-    "Mr. Smith went to Washington. He had a great time!",
-    "This is sentence one. This is sentence two! What about three?",
-    "Short. Too short. This is a proper sentence.",
-    "Dr. Jones, Prof. Smith and Mrs. Brown attended the meeting on Downing St. Inc.",
-    "This sentence is not incomplete.",
-]
+    verb_preposition_count = sum(
+        1 for flags, _, _ in elements if flags & CATEGORY_VERB_PREPOS
+    )
+    nltk_stopword_count = sum(1 for flags, _, _ in elements if flags & CATEGORY_STOPWORD)
+    if (
+        verb_preposition_count < MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+        or nltk_stopword_count < MIN_NLTK_STOPWORDS_PER_SENTENCE
+    ):
+        return
+
+    if len(elements) <= MAX_WORDS_PER_SENTENCE:
+        yield (elements[0][1], sentence_end)
+        return
+
+    # Same segmenting and (stricter) segment rules as the list pipeline
+    for segment in split_over_max_onesentence_wordlist(elements):
+        segment_verb_preposition_count = sum(
+            1 for flags, _, _ in segment if flags & CATEGORY_VERB_PREPOS
+        )
+        segment_nltk_stopword_count = sum(
+            1 for flags, _, _ in segment if flags & CATEGORY_STOPWORD
+        )
+        if (
+            len(segment) >= MIN_WORDS_PER_SENTENCE
+            and segment_verb_preposition_count >= MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+            and segment_nltk_stopword_count > MIN_NLTK_STOPWORDS_PER_SENTENCE
+        ):
+            segment_end = segment[-1][2]
+            if segment[-1] is elements[-1]:
+                segment_end = sentence_end
+            yield (segment[0][1], segment_end)
 
 
-# # Valid Emails
-valid_borderline_test_cases_3 = [
+def iter_lang_detect_spans(input_text: str) -> "Iterator[tuple[str, int, int]]":
     """
-This is a proper sentence.
-""",
+    Streams the character offsets of valid words and valid sentences
+    in the original input_text, in a single pass over the text.
+
+    The words and sentences are exactly those counted by
+    lang_detect_word_sentence_counter(), so:
+        words == number of "word" events
+        sentences == number of "sentence" events
+
+    Args:
+        input_text (str): Raw input text, not normalized.
+
+    Yields:
+        tuple[str, int, int]: (kind, start, end) where kind is
+            "word" or "sentence" and input_text[start:end] is the span.
+            Word spans include attached punctuation ("there.").
+            Sentence spans include their ending punctuation, if any.
+            A sentence is yielded after the word that ends it.
+
+    Example:
+        >>> list(iter_lang_detect_spans("This is my sentence. Hi"))
+        [('word', 0, 4), ('word', 5, 7), ('word', 8, 10), ('word', 11, 20),
+         ('sentence', 0, 20), ('word', 21, 23)]
     """
-Short. Too short. This is a proper sentence.
-""",
-]
+    elements: list[tuple[int, int, int]] = []
+    token_category_flags = TOKEN_CATEGORY_FLAGS
 
-# probably_invalid edge cases
-edge_case_probably_invalid = [
+    for token, start, end in iter_sanitized_tokens_with_offsets(input_text):
+        if not is_valid_english_word(token):
+            continue
+        yield ("word", start, end)
+
+        flags = token_category_flags.get(token.lower(), 0)
+        if token[-1:] in SENTENCE_ENDINGS and not flags & CATEGORY_ABBREVIATION:
+            # word_part, without its (removed) ending punctuation
+            if len(token) > 1:
+                elements.append((flags, start, end - 1))
+            for span in _iter_accepted_sentence_spans(elements, end):
+                yield ("sentence", span[0], span[1])
+            elements = []
+        else:
+            elements.append((flags, start, end))
+
+    # Trailing words with no sentence-ending punctuation
+    if elements:
+        for span in _iter_accepted_sentence_spans(elements, elements[-1][2]):
+            yield ("sentence", span[0], span[1])
+
+
+def lang_detect_spans(
+    input_text: str,
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
     """
-buy $$$
-""",
+    Collects iter_lang_detect_spans() into lists.
+
+    Args:
+        input_text (str): Raw input text to analyze.
+
+    Returns:
+        tuple: (word_spans, sentence_spans), each a list of (start, end)
+            offsets into input_text. Their lengths equal the counts
+            returned by lang_detect_word_sentence_counter().
+
+    Example:
+        >>> text = "Please reply to my request about weather."
+        >>> word_spans, sentence_spans = lang_detect_spans(text)
+        >>> [text[start:end] for start, end in sentence_spans]
+        ['Please reply to my request about weather.']
     """
-SPAM SPAM!
-""",
-    "fraud@crypto is the B!!!est slimball.",
-]
-
-###########
-# Unittest
-###########
-"""
-NOTE: In Python's unittest framework,
-test methods must start with the word "test_"
-to be automatically discovered and executed by the test runner
+    word_spans: list[tuple[int, int]] = []
+    sentence_spans: list[tuple[int, int]] = []
+    for kind, start, end in iter_lang_detect_spans(input_text):
+        if kind == "word":
+            word_spans.append((start, end))
+        else:
+            sentence_spans.append((start, end))
+    return (word_spans, sentence_spans)
 
-use:
-    python3 -m unittest gofai_language_detect.py
-"""
 
+def count_accepted_sentences(sentence_flags: list[int]) -> int:
+    """
+    Applies the sentence rules of split_wordlist_into_sentences_and_filter()
+    to one potential sentence, given only the category flags of its words.
 
-# short_test_cases_4
-class ValidShortCasesTestLanguageDetection(unittest.TestCase):
-    def test_short_valid(self):
-        for test_case in valid_short_test_cases_4:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertGreater(result[1], 0)
+    Returns:
+        int: 1 for a valid sentence, or the number of valid segments
+            when it is over MAX_WORDS_PER_SENTENCE, else 0.
+    """
+    if len(sentence_flags) < MIN_WORDS_PER_SENTENCE:
+        return 0
 
+    verb_preposition_count = sum(
+        1 for flags in sentence_flags if flags & CATEGORY_VERB_PREPOS
+    )
+    nltk_stopword_count = sum(1 for flags in sentence_flags if flags & CATEGORY_STOPWORD)
+    if (
+        verb_preposition_count < MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+        or nltk_stopword_count < MIN_NLTK_STOPWORDS_PER_SENTENCE
+    ):
+        return 0
+
+    if len(sentence_flags) <= MAX_WORDS_PER_SENTENCE:
+        return 1
+
+    # Same segmenting and (stricter) segment rules as the list pipeline
+    accepted_segments = 0
+    for segment in split_over_max_onesentence_wordlist(sentence_flags):
+        if (
+            len(segment) >= MIN_WORDS_PER_SENTENCE
+            and sum(1 for flags in segment if flags & CATEGORY_VERB_PREPOS)
+            >= MIN_VERBS_PREPOSITIONS_PER_SENTENCE
+            and sum(1 for flags in segment if flags & CATEGORY_STOPWORD)
+            > MIN_NLTK_STOPWORDS_PER_SENTENCE
+        ):
+            accepted_segments += 1
+    return accepted_segments
 
-class EmptyInvalidTestLanguageDetection(unittest.TestCase):
-    def test_empty_invalid(self):
-        for test_case in invalid_incomplete_test_cases_2:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertEqual(result[1], 0)
 
+def lang_detect_word_sentence_counter_bytes(
+    input_bytes: bytes | bytearray | memoryview,
+    errors: str = "strict",
+) -> tuple[int, int]:
+    """
+    lang_detect_word_sentence_counter() for UTF-8 encoded input,
+    with the same results as scoring the decoded text.
 
-class EdgeCaseInvalidTestLanguageDetection(unittest.TestCase):
-    def test_edgecase_empty_invalid(self):
-        for test_case in edge_case_probably_invalid:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertEqual(result[1], 0)
+    Pure-ASCII input (most message bodies) is scored on the bytes,
+    with no decode: bytes.split(), bytes.translate() and the byte
+    vowel / symbol tables and TOKEN_CATEGORY_FLAGS_BYTES.
+    Other input is decoded and scored by the str pipeline.
 
+    Args:
+        input_bytes (bytes | bytearray | memoryview): UTF-8 text.
+            bytearray and memoryview input is copied to bytes once.
+        errors (str): UTF-8 decoding errors handling for non-ASCII input,
+            as for bytes.decode().
 
-class ValidBorderlineTestLanguageDetection(unittest.TestCase):
-    def test_valid_borderline(self):
-        for test_case in valid_borderline_test_cases_3:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertGreater(result[1], 0)
+    Returns:
+        tuple[int, int]: (words, sentences), see lang_detect_word_sentence_counter()
 
+    Raises:
+        UnicodeDecodeError: on invalid UTF-8 when errors="strict"
 
-class ValidSampleTestLanguageDetection(unittest.TestCase):
-    def test_valid_samples(self):
-        for test_case in valid_sample_cases:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertGreater(result[1], 0)
+    Example:
+        >>> lang_detect_word_sentence_counter_bytes(b"He had a great time there.")
+        (5, 1)
+    """
+    if not isinstance(input_bytes, bytes):
+        input_bytes = bytes(input_bytes)
+
+    if not input_bytes.isascii():
+        return lang_detect_word_sentence_counter(str(input_bytes, "utf-8", errors))
+
+    # Same steps as " ".join(text.split()), remove_duplicate_chars()
+    # (spaces are gone after splitting, only "-" runs are ASCII)
+    # and sanitize_and_split_text()
+    text_bytes = input_bytes.translate(ASCII_WHITESPACE_TO_SPACE_TABLE)
+    while b"--" in text_bytes:
+        text_bytes = text_bytes.replace(b"--", b"-")
+    words_list = text_bytes.replace(b".", b". ").split()
+
+    # is_valid_english_word() and check_vowel_count_for_length(), on bytes
+    len_to_n_vowels = LEN_TO_N_VOWELS
+    min_word_len = min(len_to_n_vowels.keys())
+    max_word_len = max(len_to_n_vowels.keys())
+    token_category_flags = TOKEN_CATEGORY_FLAGS_BYTES
+
+    word_count = 0
+    sentence_count = 0
+    sentence_flags: list[int] = []
+
+    for word in words_list:
+        word_len = len(word)
+        symbol_part = word[1:-1] if word_len >= 3 else word
+        if len(symbol_part.translate(None, INVALID_SYMBOLS_BYTES)) != len(symbol_part):
+            continue
+        capped_len = min(word_len, max_word_len)
+        if capped_len < min_word_len:
+            continue
+        vowel_count = word_len - len(word.translate(None, ENGLISH_VOWELS_BYTES))
+        if vowel_count not in len_to_n_vowels.get(capped_len, ()):
+            continue
+        word_count += 1
+
+        # split_wordlist_into_sentences_and_filter(), counting only
+        flags = token_category_flags.get(word.lower(), 0)
+        if word[-1:] in SENTENCE_ENDINGS_BYTES and not flags & CATEGORY_ABBREVIATION:
+            if word_len > 1:
+                sentence_flags.append(flags)
+            sentence_count += count_accepted_sentences(sentence_flags)
+            sentence_flags = []
+        else:
+            sentence_flags.append(flags)
 
+    if sentence_flags:
+        sentence_count += count_accepted_sentences(sentence_flags)
 
-# Unittest N
-class ShortCasesTestLanguageDetection(unittest.TestCase):
-    def test_short_valid(self):
-        short_test_cases_4 = [
-            "please reply to my request about weather, tom",
-            "This is sentence one. This is sentence two. Here is!",
-        ]
-        for test_case in short_test_cases_4:
-            with self.subTest(test_case=test_case):
-                result = lang_detect_word_sentence_counter(test_case)
-                self.assertGreater(result[1], 0)
+    return (word_count, sentence_count)
 
 
-if __name__ == "__main__":
-    result = unittest.main()
-    print(result)
+# # Example usage and testing
+# test_text = "please reply to my request about weather, tom"
+# word_count, sentence_count = lang_detect_word_sentence_counter(test_text)
+# print(f"Valid words found: {word_count}")
+# print(f"Complete sentences identified: {sentence_count}")
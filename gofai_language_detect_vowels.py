@@ -0,0 +1,213 @@
+"""
+# Language-Detect: prefix-sum vowel engine
+
+check_vowel_count_for_length() counts the vowels of each word with a
+Python generator over word.lower(), and is_valid_english_word() checks
+the inner characters of each word against INVALID_SYMBOLS the same way.
+This engine classifies every character of a document once instead:
+
+1. encode("latin-1", "replace") gives one byte per character (every
+   vowel and invalid symbol is ASCII; other characters may become "?"),
+   and one bytes.translate() per class gives a 0/1 byte per character;
+2. itertools.accumulate() (or numpy.cumsum) gives the prefix sums;
+3. a token's vowels (or inner invalid symbols) are one subtraction of
+   the prefix sums at its start and end offsets.
+
+The tokens are those of the standard pipeline, joined by single spaces,
+so their offsets follow from their lengths. With NumPy, the offsets,
+subtractions and LEN_TO_N_VOWELS lookups are vectorized too.
+
+lang_detect_word_sentence_counter_prefix_sums() is the standard profile
+of lang_detect_word_sentence_counter() on this engine: same results.
+
+Vowels are counted as in word.lower(): the only character that is not in
+ENGLISH_VOWELS but lowercases to one is "\\u0130" (capital I with dot
+above), which is read as "I" here.
+
+See benchmarks/benchmark_vowel_engine.py for speed against the per-word path.
+
+Example:
+    >>> token_vowel_counts(["Hello", "rhythm", "İzmir"])
+    [2, 1, 2]
+"""
+
+from itertools import accumulate
+from operator import sub
+
+import gofai_language_detect_v52 as lang_detect
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# Characters that lowercase to a vowel without being in ENGLISH_VOWELS,
+# and the vowel each is read as
+EXTRA_LOWERCASE_VOWELS = {"\u0130": "I"}
+
+# bytes.translate: class members -> 1, every other byte -> 0
+VOWEL_CLASS_BYTES_TABLE = bytes(
+    int(chr(byte) in lang_detect.ENGLISH_VOWELS) for byte in range(256)
+)
+SYMBOL_CLASS_BYTES_TABLE = bytes(
+    int(chr(byte) in lang_detect.INVALID_SYMBOLS) for byte in range(256)
+)
+
+
+def character_class_bytes(text: str) -> tuple[bytes, bytes]:
+    """
+    (vowel flags, invalid symbol flags) of text: one 0/1 byte per character.
+
+    Example:
+        >>> character_class_bytes("a#b")
+        (b'\\x01\\x00\\x00', b'\\x00\\x01\\x00')
+    """
+    for extra_vowel, vowel in EXTRA_LOWERCASE_VOWELS.items():
+        if extra_vowel in text:
+            text = text.replace(extra_vowel, vowel)
+    encoded = text.encode("latin-1", "replace")
+    return (
+        encoded.translate(VOWEL_CLASS_BYTES_TABLE),
+        encoded.translate(SYMBOL_CLASS_BYTES_TABLE),
+    )
+
+
+def prefix_sums(flags: bytes) -> list[int]:
+    """[0, flags[0], flags[0] + flags[1], ...]: len(flags) + 1 sums."""
+    return list(accumulate(flags, initial=0))
+
+
+def _numpy_prefix_sums(flags: bytes):
+    sums = np.zeros(len(flags) + 1, dtype=np.int64)
+    np.cumsum(np.frombuffer(flags, dtype=np.uint8), out=sums[1:])
+    return sums
+
+
+def _numpy_token_offsets(tokens: list[str]):
+    """(starts, ends) of tokens in " ".join(tokens), as int64 arrays."""
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    ends = np.cumsum(lengths + 1) - 1
+    return (ends - lengths, ends)
+
+
+def _use_numpy(use_numpy: bool | None) -> bool:
+    if use_numpy and np is None:
+        raise ImportError("numpy is required for use_numpy=True: pip install numpy")
+    return np is not None if use_numpy is None else use_numpy
+
+
+def token_vowel_counts(tokens: list[str], use_numpy: bool | None = None) -> list[int]:
+    """
+    Vowels per token (as counted by check_vowel_count_for_length()),
+    from one pass over the joined tokens.
+
+    Args:
+        use_numpy (bool | None): None: NumPy when installed
+    """
+    # each token with the space after it: spaces have no vowels
+    vowel_flags, _ = character_class_bytes(" ".join(tokens) + " ")
+    if _use_numpy(use_numpy):
+        vowel_sums = _numpy_prefix_sums(vowel_flags)
+        starts, ends = _numpy_token_offsets(tokens)
+        return (vowel_sums[ends] - vowel_sums[starts]).tolist()
+
+    # sums at the token boundaries, and their differences, without a Python loop
+    vowel_sums = prefix_sums(vowel_flags)
+    boundaries = accumulate([len(token) + 1 for token in tokens], initial=0)
+    boundary_sums = list(map(vowel_sums.__getitem__, boundaries))
+    return list(map(sub, boundary_sums[1:], boundary_sums[:-1]))
+
+
+def _valid_word_mask_stdlib(tokens: list[str], vowel_flags, symbol_flags) -> list[bool]:
+    vowel_sums = prefix_sums(vowel_flags)
+    symbol_sums = prefix_sums(symbol_flags)
+    len_to_n_vowels = lang_detect.LEN_TO_N_VOWELS
+    min_word_len = min(len_to_n_vowels)
+    max_word_len = max(len_to_n_vowels)
+
+    mask = []
+    start = 0
+    for token in tokens:
+        token_len = len(token)
+        end = start + token_len
+        # is_valid_english_word(): no invalid symbol inside (anywhere if short)
+        if token_len >= 3:
+            has_symbol = symbol_sums[end - 1] != symbol_sums[start + 1]
+        else:
+            has_symbol = symbol_sums[end] != symbol_sums[start]
+        capped_len = min(token_len, max_word_len)
+        mask.append(
+            not has_symbol
+            and capped_len >= min_word_len
+            and vowel_sums[end] - vowel_sums[start]
+            in len_to_n_vowels.get(capped_len, ())
+        )
+        start = end + 1
+    return mask
+
+
+def _valid_word_mask_numpy(tokens: list[str], vowel_flags, symbol_flags) -> list[bool]:
+    len_to_n_vowels = lang_detect.LEN_TO_N_VOWELS
+    max_word_len = max(len_to_n_vowels)
+
+    starts, ends = _numpy_token_offsets(tokens)
+    lengths = ends - starts
+    vowel_sums = _numpy_prefix_sums(vowel_flags)
+    symbol_sums = _numpy_prefix_sums(symbol_flags)
+
+    long_tokens = lengths >= 3
+    inner_starts = np.where(long_tokens, starts + 1, starts)
+    inner_ends = np.where(long_tokens, ends - 1, ends)
+    has_symbol = symbol_sums[inner_ends] != symbol_sums[inner_starts]
+
+    vowel_counts = vowel_sums[ends] - vowel_sums[starts]
+    capped_lengths = np.minimum(lengths, max_word_len)
+    # allowed[length, vowels]; the last column stands for every larger count
+    max_vowels = max(
+        max_word_len, *(max(counts, default=0) for counts in len_to_n_vowels.values())
+    )
+    # lengths below the table's minimum have no allowed counts
+    allowed = np.zeros((max_word_len + 1, max_vowels + 2), dtype=bool)
+    for length, allowed_counts in len_to_n_vowels.items():
+        for vowel_count in allowed_counts:
+            allowed[length, vowel_count] = True
+    allowed_vowels = allowed[capped_lengths, np.minimum(vowel_counts, max_vowels + 1)]
+    return (~has_symbol & allowed_vowels).tolist()
+
+
+def valid_word_mask(tokens: list[str], use_numpy: bool | None = None) -> list[bool]:
+    """
+    is_valid_english_word() of each token, from one pass over the joined tokens.
+
+    Args:
+        use_numpy (bool | None): None: NumPy when installed
+    """
+    if not tokens:
+        return []
+    vowel_flags, symbol_flags = character_class_bytes(" ".join(tokens))
+    if _use_numpy(use_numpy):
+        return _valid_word_mask_numpy(tokens, vowel_flags, symbol_flags)
+    return _valid_word_mask_stdlib(tokens, vowel_flags, symbol_flags)
+
+
+def lang_detect_word_sentence_counter_prefix_sums(
+    input_text: str,
+    use_numpy: bool | None = None,
+) -> tuple[int, int]:
+    """
+    lang_detect_word_sentence_counter() (standard profile),
+    with the word rules on the prefix-sum engine.
+
+    Example:
+        >>> lang_detect_word_sentence_counter_prefix_sums("He had a great time there.")
+        (5, 1)
+    """
+    tokens = lang_detect.sanitize_and_split_text(" ".join(input_text.split()))
+    valid_wordslist = [
+        token for token, valid in zip(tokens, valid_word_mask(tokens, use_numpy)) if valid
+    ]
+    sentences = lang_detect.split_wordlist_into_sentences_and_filter(valid_wordslist)
+    valid_sentences = sum(
+        1 for sentence in sentences if lang_detect.MIN_WORDS_PER_SENTENCE <= len(sentence)
+    )
+    return (len(valid_wordslist), valid_sentences)
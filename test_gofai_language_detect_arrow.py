@@ -0,0 +1,59 @@
+import unittest
+
+from gofai_language_detect_arrow import pa, score_arrow_string_column
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_arrow.py
+"""
+
+
+@unittest.skipIf(pa is None, "pyarrow not installed")
+class ArrowScoringTestLanguageDetection(unittest.TestCase):
+    texts = [
+        "Mr. Smith went to Washington. He had a great time!",
+        None,
+        "",
+        "buy $$$",
+        "This is sentence one. This is sentence two! What about three?",
+    ]
+
+    def expected(self):
+        return [
+            None if text is None else lang_detect_word_sentence_counter(text)
+            for text in self.texts
+        ]
+
+    def test_string_and_large_string(self):
+        for arrow_type in (pa.string(), pa.large_string()):
+            with self.subTest(arrow_type=arrow_type):
+                column = pa.array(self.texts, type=arrow_type)
+                words_array, sentences_array = score_arrow_string_column(column)
+                self.assertEqual(words_array.type, pa.int32())
+                result = [
+                    None if words is None else (words, sentences)
+                    for words, sentences in zip(
+                        words_array.to_pylist(), sentences_array.to_pylist()
+                    )
+                ]
+                self.assertEqual(result, self.expected())
+
+    def test_sliced_and_chunked(self):
+        column = pa.chunked_array([pa.array(self.texts[:2]), pa.array(self.texts[2:])])
+        words_array, _ = score_arrow_string_column(column)
+        self.assertEqual(words_array.num_chunks, 2)
+
+        sliced = pa.array(self.texts).slice(3)
+        words_array, sentences_array = score_arrow_string_column(sliced)
+        self.assertEqual(
+            list(zip(words_array.to_pylist(), sentences_array.to_pylist())),
+            self.expected()[3:],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import unittest
+
+from gofai_language_detect_batch import (
+    SizeAwareScheduler,
+    find_sentence_cut,
+    iter_score_batches,
+    iter_split_document_at_whitespace,
+    merge_document_pieces,
+    score_batch,
+    score_document_piece,
+    score_large_document,
+    split_document_at_sentences,
+    split_document_at_whitespace,
+)
+from gofai_language_detect_corpora import valid_sample_cases
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_batch.py
+"""
+
+
+class SizeAwareSchedulerTestLanguageDetection(unittest.TestCase):
+    huge_document = " ".join(valid_sample_cases * 40) + " Dr. Smith went home e.g. today."
+    documents = (
+        valid_sample_cases
+        + ["buy $$$", "", huge_document, "Café is on the menu today."]
+        + valid_sample_cases
+        + [huge_document.encode("utf-8")]
+    )
+
+    def expected(self, profile="standard"):
+        return score_batch(self.documents, profile)
+
+    def test_split_counts_add_up(self):
+        for profile in ("standard", "fast", "strict"):
+            for document in (self.huge_document, self.huge_document.encode("utf-8")):
+                with self.subTest(profile=profile, type=type(document).__name__):
+                    pieces = split_document_at_sentences(document, 500, profile)
+                    self.assertGreater(len(pieces), 5)
+                    self.assertEqual(type(document)().join(pieces), document)
+                    counts = score_batch(pieces, profile)
+                    self.assertEqual(
+                        (
+                            sum(count[0] for count in counts),
+                            sum(count[1] for count in counts),
+                        ),
+                        score_batch([document], profile)[0],
+                    )
+
+    def test_no_cut_after_abbreviation(self):
+        document = "I met Dr. Smith there. He waved."
+        self.assertEqual(find_sentence_cut(document, 0), len("I met Dr. Smith there."))
+        self.assertIsNone(find_sentence_cut("no sentence ends here", 0))
+
+    def test_scheduled_matches_direct(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                scheduler = SizeAwareScheduler(jobs=jobs, target_task_chars=1000)
+                self.assertEqual(scheduler.score(self.documents), self.expected())
+                stats = scheduler.stats()
+                self.assertEqual(stats["documents"], len(self.documents))
+                self.assertEqual(stats["split_documents"], 2)
+                self.assertGreater(stats["tasks"], 10)
+                self.assertEqual(
+                    sum(worker["tasks"] for worker in stats["workers"].values()),
+                    stats["tasks"],
+                )
+                for worker in stats["workers"].values():
+                    self.assertGreaterEqual(worker["utilisation"], 0.0)
+
+    def test_prescreen_and_profile(self):
+        scheduler = SizeAwareScheduler(
+            target_task_chars=1000, profile="strict", prescreen=True
+        )
+        expected = [
+            lang_detect_word_sentence_counter(
+                document if isinstance(document, str) else document.decode("utf-8"),
+                profile="strict",
+                prescreen=True,
+            )
+            for document in self.documents
+        ]
+        self.assertEqual(scheduler.score(self.documents), expected)
+
+    def test_packs_small_documents(self):
+        scheduler = SizeAwareScheduler(max_task_documents=3)
+        scheduler.score(valid_sample_cases)
+        self.assertEqual(scheduler.stats()["tasks"], 2)
+
+
+class LargeDocumentTestLanguageDetection(unittest.TestCase):
+    document = (
+        "\n".join(valid_sample_cases * 10)
+        + " I met Dr. Smith at the station and we walked to the river together"
+        + " without stopping once to look back"
+    )
+
+    def test_any_cut_matches_serial(self):
+        for profile in ("standard", "fast", "strict"):
+            expected = score_batch([self.document], profile)[0]
+            for piece_chars in (1, 13, 200, 5000):
+                for document in (self.document, self.document.encode("utf-8")):
+                    with self.subTest(profile=profile, piece_chars=piece_chars):
+                        self.assertEqual(
+                            score_large_document(
+                                document, piece_chars=piece_chars, profile=profile
+                            ),
+                            expected,
+                        )
+
+    def test_straddling_sentence_is_stitched(self):
+        text = "The cat sat on the mat with me."
+        pieces = split_document_at_whitespace(text, 10)
+        self.assertEqual("".join(pieces), text)
+        piece_results = [score_document_piece(piece) for piece in pieces]
+        # no piece holds the whole sentence
+        self.assertEqual(sum(result[1] for result in piece_results), 0)
+        self.assertEqual(merge_document_pieces(piece_results), score_batch([text])[0])
+
+    def test_no_sentence_end(self):
+        # every piece is open: all tokens are rescored in this process
+        document = "the cat sat on the mat with me and " * 2000
+        pieces = iter_split_document_at_whitespace(document, 500)
+        self.assertEqual(next(pieces), document[: document.index(" ", 500)])
+        self.assertEqual("".join(split_document_at_whitespace(document, 500)), document)
+        self.assertEqual(
+            score_large_document(document, jobs=2, piece_chars=500, backend="threads"),
+            score_batch([document])[0],
+        )
+
+    def test_parallel_and_prescreen(self):
+        self.assertEqual(
+            score_large_document(self.document, jobs=2, piece_chars=300),
+            score_batch([self.document])[0],
+        )
+        self.assertEqual(
+            score_large_document("$$$ ### " * 1000, jobs=2, prescreen=True), (0, 0)
+        )
+
+
+class BackendTestLanguageDetection(unittest.TestCase):
+    documents = valid_sample_cases * 5 + ["buy $$$", b"He had a great time there."]
+
+    def test_threads_match_processes(self):
+        batches = [
+            self.documents[start : start + 4] for start in range(0, len(self.documents), 4)
+        ]
+        expected = [score_batch(batch) for batch in batches]
+        for backend in ("threads", "processes"):
+            with self.subTest(backend=backend):
+                self.assertEqual(
+                    list(iter_score_batches(batches, jobs=2, backend=backend)), expected
+                )
+
+    def test_thread_scheduler_stats(self):
+        scheduler = SizeAwareScheduler(jobs=3, max_task_documents=2, backend="threads")
+        self.assertEqual(scheduler.score(self.documents), score_batch(self.documents))
+        stats = scheduler.stats()
+        # all workers are threads of this process
+        self.assertEqual(
+            {worker.split("/")[0] for worker in stats["workers"]}, {str(os.getpid())}
+        )
+        self.assertEqual(
+            sum(worker["pieces"] for worker in stats["workers"].values()),
+            len(self.documents),
+        )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            SizeAwareScheduler(backend="fibers")
+
+
+if __name__ == "__main__":
+    unittest.main()
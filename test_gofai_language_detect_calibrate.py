@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from gofai_language_detect_calibrate import (
+    calibrate_detector_config,
+    new_corpus_stats,
+    scan_corpus,
+    update_corpus_stats,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_calibrate.py
+"""
+
+
+class CalibrationTestLanguageDetection(unittest.TestCase):
+    corpus_lines = [
+        "The cat sat on the mat.",
+        "This is a proper sentence about the weather.",
+        "He went to the store and came back with bread.",
+        "",
+        "Dogs like to play outside in the park.",
+    ] * 5
+
+    def test_parallel_ranges_match_single_pass(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as corpus_file:
+            corpus_file.write("\n".join(self.corpus_lines) + "\n")
+        try:
+            single_pass = scan_corpus([corpus_file.name])
+            in_ranges = scan_corpus([corpus_file.name], jobs=1, chunk_bytes=7)
+            self.assertEqual(single_pass, in_ranges)
+            self.assertEqual(sum(single_pass["words_per_sentence"].values()), 20)
+        finally:
+            os.unlink(corpus_file.name)
+
+    def test_config_shape(self):
+        stats = new_corpus_stats()
+        for line in self.corpus_lines:
+            update_corpus_stats(stats, line)
+        config = calibrate_detector_config(stats, min_word_count=1)
+        self.assertEqual(config["LEN_TO_N_VOWELS"]["3"], [1])
+        self.assertEqual(config["MIN_NLTK_STOPWORDS_PER_SENTENCE"], 3)
+        self.assertEqual(config["MAX_WORDS_PER_SENTENCE"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gofai_language_detect_batch import SizeAwareScheduler, score_document
+from gofai_language_detect_checkpoint import (
+    RESULT_RECORD,
+    checkpoint_path_for,
+    iter_documents_with_offsets,
+    load_results_array,
+    np,
+    read_checkpoint,
+    read_results,
+    run_checkpointed,
+)
+from gofai_language_detect_corpora import valid_sample_cases
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_checkpoint.py
+"""
+
+
+class CheckpointTestLanguageDetection(unittest.TestCase):
+    documents = (valid_sample_cases + ["buy $$$", "", "Café is on the menu today."]) * 5
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.results_path = os.path.join(self.temp_dir.name, "scores.bin")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_input(self, split: str) -> str:
+        path = os.path.join(self.temp_dir.name, f"docs.{split}")
+        if split == "line":
+            data = "\n".join(self.documents) + "\n"
+        elif split == "nul":
+            data = "\0".join(self.documents)
+        else:
+            data = "".join(
+                json.dumps({"text": document}) + "\n\n" for document in self.documents
+            )
+        with open(path, "wb") as input_file:
+            input_file.write(data.encode("utf-8"))
+        return path
+
+    def expected(self):
+        return [
+            (doc_id, *lang_detect_word_sentence_counter(document))
+            for doc_id, document in enumerate(self.documents)
+        ]
+
+    def test_time_boxed_runs_resume_exactly(self):
+        for split in ("line", "nul", "jsonl"):
+            with self.subTest(split=split):
+                input_path = self.write_input(split)
+                runs = 0
+                while True:
+                    summary = run_checkpointed(
+                        input_path,
+                        self.results_path,
+                        split=split,
+                        checkpoint_rows=3,
+                        max_rows=7,
+                    )
+                    runs += 1
+                    if summary["done"]:
+                        break
+                self.assertGreater(runs, 5)
+                self.assertEqual(read_results(self.results_path), self.expected())
+                # a finished run does nothing
+                summary = run_checkpointed(input_path, self.results_path, split=split)
+                self.assertEqual(summary["checkpoints"], 0)
+                os.remove(self.results_path)
+                os.remove(checkpoint_path_for(self.results_path))
+
+    def test_nul_offsets_stop_at_the_end(self):
+        for data, offsets in ((b"a\0bc\0", [2, 5]), (b"a\0bc", [2, 4])):
+            with self.subTest(data=data), tempfile.TemporaryFile() as input_file:
+                input_file.write(data)
+                input_file.seek(0)
+                documents = iter_documents_with_offsets(input_file, "nul")
+                self.assertEqual([offset for _, offset in documents], offsets)
+        # the last document has no NUL after it: the offset stops at the end
+        input_path = self.write_input("nul")
+        run_checkpointed(input_path, self.results_path, split="nul")
+        self.assertEqual(
+            read_checkpoint(self.results_path)["input_offset"],
+            os.path.getsize(input_path),
+        )
+    def test_done_when_exactly_max_rows_remain(self):
+        input_path = self.write_input("line")
+        first = run_checkpointed(input_path, self.results_path, max_rows=10)
+        self.assertFalse(first["done"])
+        last = run_checkpointed(
+            input_path, self.results_path, max_rows=len(self.documents) - 10
+        )
+        self.assertTrue(last["done"])
+        self.assertTrue(read_checkpoint(self.results_path)["done"])
+        self.assertEqual(read_results(self.results_path), self.expected())
+
+    def test_uncommitted_rows_are_dropped(self):
+        input_path = self.write_input("line")
+        run_checkpointed(input_path, self.results_path, max_rows=10)
+        # a crash after writing rows, before their checkpoint
+        with open(self.results_path, "ab") as results_file:
+            results_file.write(RESULT_RECORD.pack(10, 99, 99) + b"\x01\x02")
+        summary = run_checkpointed(input_path, self.results_path, jobs=2)
+        self.assertEqual(summary["resumed_from"], 10)
+        self.assertEqual(read_results(self.results_path), self.expected())
+        self.assertEqual(
+            os.path.getsize(self.results_path), len(self.documents) * RESULT_RECORD.size
+        )
+
+    def test_interrupted_run_commits_completed_rows(self):
+        input_path = self.write_input("line")
+
+        class Interrupt(Exception):
+            pass
+
+        # stands in for the run being interrupted after 12 documents
+        def interrupted_iter_score(scheduler, documents):
+            for index, document in enumerate(documents):
+                if index == 12:
+                    raise Interrupt
+                yield score_document(document)
+
+        with mock.patch.object(SizeAwareScheduler, "iter_score", interrupted_iter_score):
+            with self.assertRaises(Interrupt):
+                run_checkpointed(input_path, self.results_path, checkpoint_rows=5)
+        self.assertEqual(read_checkpoint(self.results_path)["rows"], 12)
+
+        run_checkpointed(input_path, self.results_path)
+        self.assertEqual(read_results(self.results_path), self.expected())
+
+    def test_refuses_other_settings(self):
+        input_path = self.write_input("line")
+        run_checkpointed(input_path, self.results_path, max_rows=3)
+        with self.assertRaises(ValueError):
+            run_checkpointed(input_path, self.results_path, profile="strict")
+        os.remove(checkpoint_path_for(self.results_path))
+        with self.assertRaises(FileExistsError):
+            run_checkpointed(input_path, self.results_path)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_numpy_memmap(self):
+        run_checkpointed(self.write_input("line"), self.results_path)
+        results = load_results_array(self.results_path)
+        self.assertEqual(
+            [tuple(int(value) for value in row) for row in results], self.expected()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
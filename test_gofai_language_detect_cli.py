@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from gofai_language_detect_cli import (
+    expand_input_paths,
+    iter_split_chunks,
+    main,
+    score_to_stream,
+)
+from gofai_language_detect_corpora import valid_sample_cases
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_cli.py
+"""
+
+
+class CommandLineTestLanguageDetection(unittest.TestCase):
+    documents = valid_sample_cases + ["buy $$$", "", "Café is on the menu today."]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_file(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as output_file:
+            output_file.write(data)
+        return path
+
+    def expected(self):
+        return [lang_detect_word_sentence_counter(document) for document in self.documents]
+
+    def score(self, paths, **options) -> list[dict]:
+        output = io.StringIO()
+        score_to_stream(paths, output, **options)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_split_modes(self):
+        encoded = [document.encode("utf-8") for document in self.documents]
+        line_path = self.write_file("docs.txt", b"\n".join(encoded) + b"\n")
+        nul_path = self.write_file("docs.nul", b"\0".join(encoded))
+        jsonl_path = self.write_file(
+            "docs.jsonl",
+            "".join(
+                json.dumps({"key": index, "body": document}) + "\n"
+                for index, document in enumerate(self.documents)
+            ).encode("utf-8"),
+        )
+        for path, options in (
+            (line_path, {"split": "line"}),
+            (nul_path, {"split": "nul", "batch_documents": 3}),
+            (jsonl_path, {"split": "jsonl", "field": "body", "id_field": "key"}),
+        ):
+            with self.subTest(split=options["split"]):
+                records = self.score([path], **options)
+                self.assertEqual(
+                    [(record["words"], record["sentences"]) for record in records],
+                    self.expected(),
+                )
+                self.assertEqual(
+                    [record["index"] for record in records],
+                    list(range(len(self.documents))),
+                )
+        self.assertEqual(records[2]["id"], 2)
+
+        records = self.score([line_path, nul_path], split="file")
+        self.assertEqual([record["source"] for record in records], [line_path, nul_path])
+
+    def test_parallel_matches_serial(self):
+        path = self.write_file(
+            "docs.txt", "\n".join(self.documents * 20).encode("utf-8")
+        )
+        serial = self.score([path], batch_documents=7)
+        parallel = self.score([path], batch_documents=7, jobs=2)
+        self.assertEqual(parallel, serial)
+
+    def test_globs(self):
+        self.write_file("b.txt", b"x")
+        self.write_file("a.txt", b"x")
+        paths = expand_input_paths([os.path.join(self.temp_dir.name, "*.txt")])
+        self.assertEqual([os.path.basename(path) for path in paths], ["a.txt", "b.txt"])
+        with self.assertRaises(FileNotFoundError):
+            expand_input_paths([os.path.join(self.temp_dir.name, "*.none")])
+
+    def test_stdin_to_tsv(self):
+        completed = subprocess.run(
+            [sys.executable, "gofai_language_detect_cli.py", "--format", "tsv"],
+            input="\n".join(self.documents).encode("utf-8"),
+            capture_output=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        rows = [line.split("\t") for line in completed.stdout.decode().splitlines()]
+        self.assertEqual(
+            [(int(row[2]), int(row[3])) for row in rows], self.expected()
+        )
+        self.assertEqual(rows[0][:2], ["-", "0"])
+
+    def test_split_chunks(self):
+        data = b"ab\0\0cde\0" + b"x" * 5000 + b"\0--f-g--"
+        for separator in (b"\0", b"--", b"\0x"):
+            expected = data.split(separator)
+            if not expected[-1]:
+                expected.pop()
+            for chunk_bytes in (1, 2, 3, 7, 4096, 1 << 20):
+                with self.subTest(separator=separator, chunk_bytes=chunk_bytes):
+                    self.assertEqual(
+                        list(
+                            iter_split_chunks(io.BytesIO(data), separator, chunk_bytes)
+                        ),
+                        expected,
+                    )
+
+    def test_profile_choices(self):
+        path = self.write_file("documents.txt", b"He had a great time there.\n")
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            main([path, "--profile", "bogus"])
+
+
+if __name__ == "__main__":
+    unittest.main()
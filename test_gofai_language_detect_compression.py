@@ -0,0 +1,138 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import unittest
+
+from gofai_language_detect_calibrate import scan_corpus
+from gofai_language_detect_cli import score_to_stream
+from gofai_language_detect_compression import (
+    detect_compression,
+    find_gzip_member_starts,
+    open_decompressed,
+    open_input,
+    zstandard,
+)
+from gofai_language_detect_corpora import bundled_corpus_lines
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_compression.py
+"""
+
+
+class CompressionTestLanguageDetection(unittest.TestCase):
+    text = (
+        "\n".join(bundled_corpus_lines("clean_sentences_list")[:2000]) + "\n"
+    ).encode()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_file(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as output_file:
+            output_file.write(data)
+        return path
+
+    def multi_member_gzip(self, member_bytes: int = 5000) -> bytes:
+        # members cut mid-line, as bgzip does
+        return b"".join(
+            gzip.compress(self.text[start : start + member_bytes])
+            for start in range(0, len(self.text), member_bytes)
+        )
+
+    def test_formats(self):
+        half = len(self.text) // 2
+        inputs = {
+            "plain.txt": self.text,
+            "single.gz": gzip.compress(self.text),
+            "multi.gz": self.multi_member_gzip(),
+            "streams.bz2": (
+                bz2.compress(self.text[:half]) + bz2.compress(self.text[half:])
+            ),
+            "text.xz": lzma.compress(self.text),
+        }
+        if zstandard is not None:
+            inputs["text.zst"] = zstandard.ZstdCompressor().compress(self.text)
+        for name, data in inputs.items():
+            path = self.write_file(name, data)
+            for jobs in (1, 3):
+                with self.subTest(name=name, jobs=jobs):
+                    with open_input(path, jobs, member_range_bytes=4000) as input_file:
+                        self.assertEqual(input_file.read(), self.text)
+                    with open_input(path, jobs, member_range_bytes=4000) as input_file:
+                        self.assertEqual(
+                            b"".join(line for line in input_file), self.text
+                        )
+        self.assertIsNone(detect_compression(b"plain"))
+        self.assertEqual(detect_compression(gzip.compress(b"")), "gzip")
+
+    def test_parallel_gzip_member_starts(self):
+        data = self.multi_member_gzip()
+        starts = find_gzip_member_starts(data, 20_000)
+        self.assertGreater(len(starts), 2)
+        self.assertTrue(all(data[start : start + 2] == b"\x1f\x8b" for start in starts))
+
+        # a whole gzip member inside (stored) member data: a false member start,
+        # and zero padding after the last member
+        document = b"a" * 100 + gzip.compress(b"inner\n") + os.urandom(3000) + b"\n"
+        member = gzip.compress(document, compresslevel=0)
+        data = member * 4 + b"\0" * 8
+        self.assertGreater(len(find_gzip_member_starts(data, 10)), 4)
+        path = self.write_file("tricky.gz", data)
+        with open_input(path, jobs=3, member_range_bytes=10) as input_file:
+            self.assertEqual(input_file.read(), document * 4)
+
+    def test_truncated_input(self):
+        path = self.write_file("truncated.gz", gzip.compress(self.text)[:-100])
+        with self.assertRaises(EOFError):
+            with open_input(path) as input_file:
+                input_file.read()
+
+    def test_stdin_like_stream(self):
+        stream = io.BufferedReader(io.BytesIO(lzma.compress(self.text)))
+        with open_decompressed(stream) as input_file:
+            self.assertEqual(input_file.read(), self.text)
+        plain = io.BufferedReader(io.BytesIO(self.text))
+        self.assertIs(open_decompressed(plain), plain)
+
+    def test_command_line_and_corpus_scanner(self):
+        plain_path = self.write_file("corpus.txt", self.text)
+        gzip_path = self.write_file("corpus.txt.gz", self.multi_member_gzip())
+        outputs = []
+        for path in (plain_path, gzip_path):
+            output = io.StringIO()
+            score_to_stream([path], output, jobs=2, output_format="tsv")
+            outputs.append(
+                [line.split("\t", 1)[1] for line in output.getvalue().splitlines()]
+            )
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(
+            scan_corpus([gzip_path], jobs=2), scan_corpus([plain_path], jobs=2)
+        )
+
+    def test_plain_text_starting_like_bz2(self):
+        text = b"BZh is a prefix here, not a bz2 stream. We went to the park.\n"
+        path = self.write_file("bzh.txt", text)
+        self.assertIsNone(detect_compression(text))
+        self.assertEqual(detect_compression(bz2.compress(b"")), "bz2")
+        self.assertEqual(detect_compression(bz2.compress(text)), "bz2")
+        with open_input(path) as input_file:
+            self.assertEqual(input_file.read(), text)
+        output = io.StringIO()
+        score_to_stream([path], output, output_format="tsv")
+        self.assertEqual(len(output.getvalue().splitlines()), 1)
+        self.assertEqual(scan_corpus([path]), scan_corpus([self.write_file("t", text)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from gofai_language_detect_arrow import SENTENCES_COLUMN_NAME, WORDS_COLUMN_NAME
+from gofai_language_detect_corpora import bundled_test_cases
+from gofai_language_detect_dataframe import (
+    lang_detect_counts_expr,
+    pd,
+    pl,
+    score_polars_series,
+    score_values,
+    with_lang_detect_columns,
+)
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_dataframe.py
+"""
+
+test_cases = bundled_test_cases()
+TEXTS = test_cases["valid"] + [None, ""] + test_cases["invalid"]
+EXPECTED = [
+    (None, None) if text is None else lang_detect_word_sentence_counter(text)
+    for text in TEXTS
+]
+
+
+class ColumnValuesTestLanguageDetection(unittest.TestCase):
+    def test_chunked_parallel_scoring(self):
+        values = TEXTS + [float("nan"), "He had a great time there.".encode()]
+        for jobs, chunk_rows in ((1, 512), (1, 7), (2, 5)):
+            with self.subTest(jobs=jobs, chunk_rows=chunk_rows):
+                words, sentences, null_positions = score_values(
+                    values, jobs, chunk_rows, backend="threads"
+                )
+                self.assertEqual(null_positions, [len(test_cases["valid"]), len(TEXTS)])
+                results = list(zip(words, sentences))
+                for position in null_positions:
+                    results[position] = (None, None)
+                self.assertEqual(results, EXPECTED + [(None, None), (5, 1)])
+
+
+@unittest.skipIf(pd is None, "pandas not installed")
+class PandasAccessorTestLanguageDetection(unittest.TestCase):
+    def test_series_accessor(self):
+        series = pd.Series(TEXTS, index=range(100, 100 + len(TEXTS)))
+        counts = series.langdetect.counts(jobs=2, chunk_rows=16, backend="threads")
+        self.assertEqual(list(counts.index), list(series.index))
+        self.assertEqual(str(counts[WORDS_COLUMN_NAME].dtype), "Int32")
+        results = [
+            (None if pd.isna(words) else words, None if pd.isna(sentences) else sentences)
+            for words, sentences in zip(
+                counts[WORDS_COLUMN_NAME], counts[SENTENCES_COLUMN_NAME]
+            )
+        ]
+        self.assertEqual(results, EXPECTED)
+
+
+@unittest.skipIf(pl is None, "polars not installed")
+class PolarsTestLanguageDetection(unittest.TestCase):
+    def test_series_expression_and_frames(self):
+        frame = pl.DataFrame({"BODY": TEXTS})
+        expected = [
+            {WORDS_COLUMN_NAME: words, SENTENCES_COLUMN_NAME: sentences}
+            for words, sentences in EXPECTED
+        ]
+        self.assertEqual(
+            score_polars_series(frame["BODY"], chunk_rows=16).to_list(), expected
+        )
+        self.assertEqual(
+            frame.select(lang_detect_counts_expr("BODY")).to_series().to_list(), expected
+        )
+        for result in (
+            with_lang_detect_columns(frame, "BODY"),
+            with_lang_detect_columns(frame.lazy(), "BODY").collect(),
+        ):
+            self.assertEqual(result.schema[WORDS_COLUMN_NAME], pl.Int32)
+            self.assertEqual(
+                result.select(WORDS_COLUMN_NAME, SENTENCES_COLUMN_NAME).to_dicts(),
+                expected,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import io
+import json
+import tempfile
+import unittest
+
+from gofai_language_detect_batch import SizeAwareScheduler, score_document
+from gofai_language_detect_cli import score_to_stream
+from gofai_language_detect_corpora import bundled_test_cases
+from gofai_language_detect_dedup import (
+    NearDuplicateIndex,
+    document_tokens,
+    iter_score_deduplicated,
+    score_deduplicated,
+    simhash_tokens,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_dedup.py
+"""
+
+TEMPLATE = (
+    "Dear {name}, your order {order} has been shipped today. It should arrive "
+    "within three working days. Thank you for shopping with us and have a great week."
+)
+
+
+class DedupTestLanguageDetection(unittest.TestCase):
+    def templated_mail(self) -> list[str]:
+        return [
+            TEMPLATE.format(name=name, order=10000 + index)
+            for index, name in enumerate(["Alice", "Bob", "Carol", "Dave"] * 5)
+        ]
+
+    def test_simhash_is_stable(self):
+        tokens = document_tokens(TEMPLATE)
+        self.assertEqual(simhash_tokens(tokens), simhash_tokens(list(tokens)))
+        self.assertEqual(simhash_tokens([]), 0)
+        near = simhash_tokens(document_tokens(TEMPLATE.format(name="Bob", order=1)))
+        other = simhash_tokens(
+            document_tokens("The quick brown fox jumps over the lazy dog, twice a day.")
+        )
+        base = simhash_tokens(document_tokens(TEMPLATE.format(name="Eve", order=2)))
+        self.assertLess((near ^ base).bit_count(), (other ^ base).bit_count())
+
+    def test_templated_mail_collapses(self):
+        mail = self.templated_mail()
+        results, stats = score_deduplicated(mail, similarity_threshold=0.9)
+        self.assertEqual(results, [score_document(document) for document in mail])
+        self.assertEqual(stats["documents"], len(mail))
+        self.assertLess(stats["representatives"], len(mail) // 2)
+        self.assertEqual(
+            stats["saved_documents"], len(mail) - stats["representatives"]
+        )
+        self.assertGreater(stats["saved_fraction"], 0.5)
+
+    def test_exact_duplicates_and_short_documents(self):
+        documents = ["buy $$$", "buy $$$", "buy now", b"buy $$$", "", ""]
+        results, stats = score_deduplicated(documents)
+        self.assertEqual(results, [score_document(document) for document in documents])
+        self.assertEqual(stats["exact_duplicates"], 2)
+        self.assertEqual(stats["near_duplicates"], 0)
+
+    def test_distinct_documents_are_all_scored(self):
+        test_cases = bundled_test_cases()
+        documents = test_cases["valid"] + test_cases["invalid"]
+        index = NearDuplicateIndex(similarity_threshold=1.0)
+        results = list(iter_score_deduplicated(documents, index=index))
+        self.assertEqual(results, [score_document(document) for document in documents])
+        # only identical fingerprints collapse: here, texts differing in whitespace
+        self.assertEqual(index.stats()["near_duplicates"], 1)
+
+    def test_scheduler_and_command_line(self):
+        mail = self.templated_mail() + [
+            " ".join(document.split()) for document in bundled_test_cases()["valid"]
+        ]
+        scheduler = SizeAwareScheduler(jobs=2, target_task_chars=500)
+        results = list(iter_score_deduplicated(mail, scheduler.iter_score))
+        self.assertEqual(results, [score_document(document) for document in mail])
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as input_file:
+            input_file.write("\n".join(mail) + "\n")
+            input_file.flush()
+            output = io.StringIO()
+            stats_output = io.StringIO()
+            score_to_stream(
+                [input_file.name],
+                output,
+                dedup_similarity=0.9,
+                stats_output=stats_output,
+            )
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(
+            [(record["words"], record["sentences"]) for record in records],
+            [score_document(document) for document in mail],
+        )
+        stats = json.loads(stats_output.getvalue())
+        self.assertEqual(stats["dedup"]["documents"], len(mail))
+        self.assertGreater(stats["dedup"]["saved_documents"], 0)
+
+    def test_memory_is_bounded(self):
+        read = 0
+
+        def iter_documents():
+            nonlocal read
+            for position in range(20_000):
+                read += 1
+                yield TEMPLATE if position % 1000 else f"{position} {TEMPLATE}"
+
+        index = NearDuplicateIndex(similarity_threshold=1.0, max_representatives=4)
+        for yielded, result in enumerate(
+            iter_score_deduplicated(iter_documents(), index=index), 1
+        ):
+            # a run of duplicates is not read ahead of the output
+            self.assertLessEqual(read - yielded, 1)
+            self.assertEqual(result, score_document(TEMPLATE))
+        self.assertEqual(yielded, 20_000)
+        # 20 distinct texts, and TEMPLATE again after each restart
+        self.assertEqual(index.stats()["representatives"], 26)
+        self.assertEqual(index.restarts, 6)
+        self.assertLessEqual(len(index._exact), 4)
+        self.assertTrue(all(len(digest) == 16 for digest in index._exact))
+
+    def test_threshold_bounds(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(similarity_threshold=0.0)
+        self.assertEqual(NearDuplicateIndex(similarity_threshold=0.95).max_distance, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
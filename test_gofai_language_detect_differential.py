@@ -0,0 +1,113 @@
+import unittest
+
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_corpora import bundled_corpus_lines
+from gofai_language_detect_differential import (
+    DIFFERENTIAL_ENGINES,
+    FUZZ_ABBREVIATIONS,
+    compare_engines,
+    differential_documents,
+    format_differential_report,
+    generate_fuzz_documents,
+    per_document,
+)
+from gofai_language_detect_pipeline import (
+    SENTENCE_RULES,
+    lang_detect_word_sentence_counter_pipeline,
+)
+from gofai_language_detect_reference import reference_word_sentence_counter
+from gofai_language_detect_v52 import (
+    TOKEN_CATEGORY_WORDS,
+    lang_detect_word_sentence_counter,
+    register_category_words,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_differential.py
+"""
+
+
+def stopwords_at_least_minimum(sentence) -> bool:
+    """A changed rule: segments need no more stopwords than sentences."""
+    count = sum(1 for flags in sentence.flags if flags & lang_detect.CATEGORY_STOPWORD)
+    return count >= lang_detect.MIN_NLTK_STOPWORDS_PER_SENTENCE
+
+
+class DifferentialTestLanguageDetection(unittest.TestCase):
+    documents = (
+        differential_documents(count=1500, corpora=False)
+        + bundled_corpus_lines("sentences_list")[:1000]
+    )
+
+    def test_engines_match_reference(self):
+        report = compare_engines(self.documents)
+        self.assertEqual(set(report["engines"]), set(DIFFERENTIAL_ENGINES))
+        for name, engine_report in report["engines"].items():
+            with self.subTest(engine=name):
+                self.assertEqual(
+                    engine_report["mismatch_count"],
+                    0,
+                    format_differential_report(report, self.documents),
+                )
+                self.assertGreater(engine_report["throughput_ratio"], 0)
+
+    def test_generated_documents(self):
+        documents = generate_fuzz_documents(500, seed=3)
+        self.assertEqual(documents, generate_fuzz_documents(500, seed=3))
+        self.assertNotEqual(documents, generate_fuzz_documents(500, seed=4))
+
+        text = "\n".join(documents)
+        for edge_case in ("–", "—", "İ", "\x1c", "\xa0", "$") + FUZZ_ABBREVIATIONS:
+            self.assertIn(edge_case, text)
+        long_documents = [
+            document
+            for document in documents
+            if len(document.split()) > lang_detect.MAX_WORDS_PER_SENTENCE
+        ]
+        self.assertGreater(len(long_documents), 50)
+        # over-long sentences that are counted as several segments
+        self.assertTrue(
+            any(reference_word_sentence_counter(doc)[1] > 3 for doc in long_documents)
+        )
+
+    def test_finds_a_changed_engine(self):
+        changed_rules = SENTENCE_RULES[:2] + (stopwords_at_least_minimum,)
+        engines = {
+            "changed": per_document(
+                lambda document: lang_detect_word_sentence_counter_pipeline(
+                    document, sentence_rules=changed_rules
+                )
+            ),
+        }
+        report = compare_engines(self.documents, engines)
+        self.assertGreater(report["engines"]["changed"]["mismatch_count"], 0)
+        index, expected, result = report["engines"]["changed"]["mismatches"][0]
+        self.assertEqual(expected, reference_word_sentence_counter(self.documents[index]))
+        self.assertNotEqual(expected, result)
+        self.assertIn("changed: document", format_differential_report(report))
+
+        with self.assertRaises(ValueError):
+            compare_engines(self.documents, {"short": lambda documents: []})
+
+    def test_reference_follows_registered_words(self):
+        test_case = "Please frobnicate the widgets now."
+        self.assertEqual(reference_word_sentence_counter(test_case), (5, 0))
+        try:
+            register_category_words("verb_prepos", ["Frobnicate"])
+            self.assertEqual(reference_word_sentence_counter(test_case), (5, 1))
+            self.assertEqual(
+                reference_word_sentence_counter(test_case),
+                lang_detect_word_sentence_counter(test_case),
+            )
+        finally:
+            TOKEN_CATEGORY_WORDS["verb_prepos"].discard("frobnicate")
+            register_category_words("verb_prepos", [])
+        self.assertEqual(reference_word_sentence_counter(test_case), (5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import random
+import unittest
+
+from gofai_language_detect_corpora import bundled_corpus_lines, bundled_test_cases
+from gofai_language_detect_guards import (
+    drop_long_tokens,
+    guard_counters,
+    reset_guard_counters,
+    score_document_guarded,
+)
+from gofai_language_detect_v52 import (
+    CHARS_TO_DEDUPE,
+    lang_detect_word_sentence_counter,
+    remove_duplicate_chars,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_guards.py
+"""
+
+
+def remove_duplicate_chars_per_char(text: str, chars_to_dedupe=CHARS_TO_DEDUPE) -> str:
+    result = []
+    prev_char = None
+    for char in text:
+        if char in chars_to_dedupe and char == prev_char:
+            continue
+        result.append(char)
+        prev_char = char
+    return "".join(result)
+
+
+class GuardsTestLanguageDetection(unittest.TestCase):
+    test_cases = bundled_test_cases()
+    text = " ".join(bundled_corpus_lines("clean_sentences_list")[:3000])
+
+    def setUp(self):
+        reset_guard_counters()
+
+    def test_remove_duplicate_chars_matches_per_char(self):
+        rng = random.Random(46)
+        for _ in range(2000):
+            text = "".join(
+                rng.choice("  --–—ab\n") for _ in range(rng.randint(0, 40))
+            )
+            with self.subTest(text=text):
+                self.assertEqual(
+                    remove_duplicate_chars(text), remove_duplicate_chars_per_char(text)
+                )
+                self.assertEqual(
+                    remove_duplicate_chars(text, {"a"}),
+                    remove_duplicate_chars_per_char(text, {"a"}),
+                )
+
+    def test_ordinary_documents_unchanged(self):
+        for document in self.test_cases["valid"] + self.test_cases["invalid"]:
+            for profile in ("fast", "standard", "strict"):
+                with self.subTest(document=document, profile=profile):
+                    self.assertEqual(
+                        score_document_guarded(
+                            document, profile=profile, time_budget_seconds=60
+                        ),
+                        (*lang_detect_word_sentence_counter(document, profile), False),
+                    )
+        self.assertEqual(guard_counters()["long_tokens"], 0)
+
+    def test_long_tokens_rejected(self):
+        self.assertEqual(drop_long_tokens("a " + "x" * 9 + " b", 8), ("a   b", 1, 9))
+        self.assertEqual(
+            drop_long_tokens("x" * 9 + "\n" + "y" * 8, 8), (" \nyyyyyyyy", 1, 9)
+        )
+        sentence = "He had a great time there. "
+        for blob in ("-" * 100_000, "ab" * 100_000):
+            self.assertEqual(
+                score_document_guarded(sentence + blob + " " + sentence),
+                (10, 2, False),
+            )
+        counters = guard_counters()
+        self.assertEqual(counters["long_tokens"], 2)
+        self.assertEqual(counters["long_token_chars"], 300_000)
+
+    def test_oversize_truncate(self):
+        words, sentences, truncated = score_document_guarded(
+            self.text, max_document_chars=50_000
+        )
+        self.assertTrue(truncated)
+        prefix_end = self.text.index(" ", 50_000)
+        self.assertEqual(
+            (words, sentences),
+            lang_detect_word_sentence_counter(self.text[:prefix_end]),
+        )
+        self.assertEqual(guard_counters()["truncated"], 1)
+        self.assertEqual(guard_counters()["skipped_chars"], len(self.text) - prefix_end)
+
+    def test_oversize_without_whitespace(self):
+        # no whitespace to cut at: a hard cut, not a search to the end
+        document = "ab" * 10_000_000
+        for policy in ("truncate", "approximate"):
+            with self.subTest(policy=policy):
+                reset_guard_counters()
+                self.assertEqual(
+                    score_document_guarded(
+                        document,
+                        max_token_chars=None,
+                        max_document_chars=100_000,
+                        oversize_policy=policy,
+                    ),
+                    (0, 0, True),
+                )
+                self.assertEqual(
+                    guard_counters()["skipped_chars"], len(document) - 100_000
+                )
+
+    def test_oversize_approximate(self):
+        expected_words, expected_sentences = lang_detect_word_sentence_counter(self.text)
+        words, sentences, truncated = score_document_guarded(
+            self.text,
+            max_document_chars=len(self.text) // 4,
+            oversize_policy="approximate",
+        )
+        self.assertTrue(truncated)
+        self.assertAlmostEqual(words / expected_words, 1, delta=0.05)
+        self.assertAlmostEqual(sentences / expected_sentences, 1, delta=0.1)
+        self.assertEqual(guard_counters()["approximated"], 1)
+
+    def test_time_budget_returns_prefix_counts(self):
+        words, sentences, truncated = score_document_guarded(
+            self.text, max_document_chars=None, time_budget_seconds=0
+        )
+        # one piece, cut at whitespace, is always scored
+        self.assertTrue(truncated)
+        self.assertGreater(words, 0)
+        self.assertLess(words, lang_detect_word_sentence_counter(self.text)[0])
+        self.assertEqual(guard_counters()["time_budget_exceeded"], 1)
+        self.assertEqual(
+            score_document_guarded(self.text, time_budget_seconds=60),
+            (*lang_detect_word_sentence_counter(self.text), False),
+        )
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            score_document_guarded("text", oversize_policy="drop")
+        with self.assertRaises(ValueError):
+            score_document_guarded("text", profile="loose")
+
+
+if __name__ == "__main__":
+    unittest.main()
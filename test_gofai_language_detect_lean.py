@@ -0,0 +1,89 @@
+import unittest
+
+import gofai_language_detect_lean as lean
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_corpora import (
+    bundled_corpus_lines,
+    bundled_test_cases,
+    read_bundled_corpus,
+)
+from gofai_language_detect_lean import (
+    current_token_cache,
+    lang_detect_word_sentence_counter_lean,
+    score_batch_lean,
+)
+from gofai_language_detect_test_documents import (
+    long_sentence_documents,
+    random_documents,
+)
+from gofai_language_detect_v52 import (
+    TOKEN_CATEGORY_WORDS,
+    lang_detect_word_sentence_counter,
+    register_category_words,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_lean.py
+"""
+
+
+# Sentence endings, abbreviations and dashes, among vowels and consonants
+RANDOM_DOCUMENT_ALPHABET = "aeiouy bcdstr TheAnd.!?-–— Mr. \n#$İ"
+
+
+class LeanCounterTestLanguageDetection(unittest.TestCase):
+    test_cases = bundled_test_cases()
+    documents = (
+        test_cases["valid"]
+        + test_cases["invalid"]
+        + bundled_corpus_lines("sentences_list")[:3000]
+        + random_documents(3000, seed=49, alphabet=RANDOM_DOCUMENT_ALPHABET, max_chars=80)
+        + long_sentence_documents(100, seed=49)
+    )
+
+    def test_matches_standard_profile(self):
+        for document in self.documents:
+            with self.subTest(document=document):
+                self.assertEqual(
+                    lang_detect_word_sentence_counter_lean(document),
+                    lang_detect_word_sentence_counter(document),
+                )
+        self.assertEqual(
+            score_batch_lean([document.encode() for document in self.documents[:50]]),
+            [lang_detect_word_sentence_counter(doc) for doc in self.documents[:50]],
+        )
+
+    def test_large_document_in_pieces(self):
+        document = read_bundled_corpus("wikipedia_samples_text_doc")
+        self.assertGreater(len(document), 2 * lean.LEAN_TEXT_PIECE_CHARS)
+        self.assertEqual(
+            lang_detect_word_sentence_counter_lean(document),
+            lang_detect_word_sentence_counter(document),
+        )
+        self.assertEqual(lang_detect_word_sentence_counter_lean("x" * 200_000), (0, 0))
+
+    def test_cache_is_bounded_and_follows_table_changes(self):
+        lang_detect_word_sentence_counter_lean(" ".join(self.documents))
+        self.assertLessEqual(len(current_token_cache()), lean.LEAN_TOKEN_CACHE_SIZE)
+
+        test_case = "Please frobnicate the widgets now."
+        self.assertEqual(lang_detect_word_sentence_counter_lean(test_case)[1], 0)
+        try:
+            register_category_words("verb_prepos", ["Frobnicate"])
+            self.assertEqual(lang_detect_word_sentence_counter_lean(test_case)[1], 1)
+        finally:
+            TOKEN_CATEGORY_WORDS["verb_prepos"].discard("frobnicate")
+            register_category_words("verb_prepos", [])
+        self.assertEqual(lang_detect_word_sentence_counter_lean(test_case)[1], 0)
+        self.assertIs(
+            current_token_cache(), current_token_cache(), "no change: same cache"
+        )
+        self.assertIs(lean._token_cache_tables[1], lang_detect.TOKEN_CATEGORY_FLAGS)
+
+
+if __name__ == "__main__":
+    unittest.main()
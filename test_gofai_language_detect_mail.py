@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from email.message import EmailMessage
+
+from gofai_language_detect_cli import expand_input_paths, score_to_stream
+from gofai_language_detect_mail import (
+    html_to_text,
+    iter_mail_documents,
+    iter_mbox_messages,
+    message_text,
+    strip_quoted_reply,
+)
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_mail.py
+"""
+
+BODY = "The meeting moved to Friday. Please bring the report with you."
+REPLY = "Sounds good, I will be there on time."
+
+
+def make_message(
+    message_id: str,
+    plain: str | None = None,
+    html: str | None = None,
+    transfer_encoding: str = "quoted-printable",
+) -> bytes:
+    message = EmailMessage()
+    message["From"] = "alice@example.com"
+    message["To"] = "bob@example.com"
+    message["Subject"] = "Meeting"
+    message["Message-ID"] = message_id
+    if plain is not None:
+        message.set_content(plain, cte=transfer_encoding)
+        if html is not None:
+            message.add_alternative(html, subtype="html")
+    else:
+        message.set_content(html, subtype="html", cte=transfer_encoding)
+    message.add_attachment(
+        b"Attachments are not part of the text.",
+        maintype="text",
+        subtype="plain",
+        filename="notes.txt",
+    )
+    return message.as_bytes()
+
+
+class MailTestLanguageDetection(unittest.TestCase):
+    def test_transfer_encodings_and_attachments(self):
+        for transfer_encoding in ("quoted-printable", "base64", "8bit"):
+            with self.subTest(transfer_encoding=transfer_encoding):
+                text, message_id = message_text(
+                    make_message(
+                        "<1@example.com>",
+                        plain=BODY + " Café!",
+                        transfer_encoding=transfer_encoding,
+                    )
+                )
+                self.assertEqual(text.strip(), BODY + " Café!")
+                self.assertEqual(message_id, "<1@example.com>")
+
+    def test_html_parts(self):
+        html = (
+            "<html><head><style>p {color: red}</style></head><body>"
+            f"<p>{BODY}</p><blockquote>Old &amp; quoted.</blockquote></body></html>"
+        )
+        html_only = make_message("<2@example.com>", html=html)
+        self.assertEqual(message_text(html_only)[0], "")
+        self.assertEqual(message_text(html_only, include_html=True)[0].strip(), BODY)
+        self.assertIn(
+            "Old & quoted.", message_text(html_only, True, keep_quotes=True)[0]
+        )
+        # the text/plain alternative is preferred
+        alternative = make_message("<3@example.com>", plain=REPLY, html=html)
+        self.assertEqual(message_text(alternative, include_html=True)[0].strip(), REPLY)
+        self.assertEqual(html_to_text("<p>a</p><p>b</p>"), "\na\n\nb\n")
+
+    def test_strip_quoted_reply(self):
+        inline = (
+            f"{REPLY}\n\nOn Mon, 3 Jun 2024 at 10:00, Alice\n"
+            f"<alice@example.com> wrote:\n> {BODY}\n"
+        )
+        self.assertEqual(strip_quoted_reply(inline).strip(), REPLY)
+        iso_date = f"{REPLY}\nOn 2024-06-03, Alice wrote:\n\n> {BODY}"
+        self.assertEqual(strip_quoted_reply(iso_date).strip(), REPLY)
+        interleaved = f"> {BODY}\n{REPLY}\n> Bye.\nSee you."
+        self.assertEqual(strip_quoted_reply(interleaved), f"{REPLY}\nSee you.")
+        outlook = f"{REPLY}\n\nFrom: Alice\nSent: Monday\nSubject: Meeting\n\n{BODY}"
+        self.assertEqual(strip_quoted_reply(outlook).strip(), REPLY)
+        forwarded = f"{REPLY}\n-----Original Message-----\n{BODY}"
+        self.assertEqual(strip_quoted_reply(forwarded).strip(), REPLY)
+        self.assertEqual(strip_quoted_reply(BODY), BODY)
+
+    def test_text_like_an_attribution_is_kept(self):
+        for text in (
+            # no date, time or address
+            "On Monday we met.\nThe people there wrote:\n"
+            "many notes about the plan for the week.",
+            f"{REPLY}\n\nOn Monday, Alice wrote:\n> {BODY}",
+            # no quoted lines follow
+            f"{REPLY}\nOn 3 Jun 2024 at 10:00, Alice wrote:\n{BODY}",
+            f"On the 2024 trip, alice@example.com wrote:\n\n{BODY}\nBye.",
+        ):
+            with self.subTest(text=text):
+                expected = "\n".join(
+                    line for line in text.splitlines() if not line.startswith(">")
+                )
+                self.assertEqual(strip_quoted_reply(text), expected)
+
+    def test_mbox_stream(self):
+        messages = [
+            make_message("<4@example.com>", plain=f"{BODY}\nFrom here on, all is well."),
+            make_message("<5@example.com>", plain=f"{REPLY}\n\n> {BODY}\n"),
+        ]
+        mbox = b"".join(
+            b"From alice@example.com Mon Jun  3 10:00:00 2024\n"
+            + message.replace(b"\nFrom here", b"\n>From here")
+            + b"\n"
+            for message in messages
+        )
+        self.assertEqual(len(list(iter_mbox_messages(io.BytesIO(mbox)))), 2)
+        texts = list(iter_mail_documents(io.BytesIO(mbox), "mbox"))
+        self.assertEqual(
+            [text.strip() for text, _ in texts],
+            [f"{BODY}\nFrom here on, all is well.", REPLY],
+        )
+        self.assertEqual(
+            [message_id for _, message_id in texts],
+            ["<4@example.com>", "<5@example.com>"],
+        )
+
+    def test_command_line_mbox_and_eml_directory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mbox_path = os.path.join(temp_dir, "inbox.mbox")
+            with open(mbox_path, "wb") as mbox_file:
+                for index, body in enumerate((BODY, REPLY)):
+                    mbox_file.write(b"From alice@example.com Mon Jun  3 10:00:00 2024\n")
+                    mbox_file.write(make_message(f"<{index}@example.com>", plain=body))
+            eml_dir = os.path.join(temp_dir, "maildir", "inbox")
+            os.makedirs(eml_dir)
+            for index, body in enumerate((REPLY, BODY)):
+                with open(os.path.join(eml_dir, f"{index}.eml"), "wb") as eml_file:
+                    eml_file.write(make_message(f"<eml{index}@example.com>", plain=body))
+
+            expected = [
+                lang_detect_word_sentence_counter(body) for body in (BODY, REPLY)
+            ]
+            for paths, split, expected_results in (
+                ([mbox_path], "mbox", expected),
+                (
+                    expand_input_paths([os.path.join(temp_dir, "maildir")], ".eml"),
+                    "eml",
+                    expected[::-1],
+                ),
+            ):
+                with self.subTest(split=split):
+                    output = io.StringIO()
+                    score_to_stream(paths, output, split=split, jobs=2)
+                    records = [
+                        json.loads(line) for line in output.getvalue().splitlines()
+                    ]
+                    self.assertEqual(
+                        [(record["words"], record["sentences"]) for record in records],
+                        expected_results,
+                    )
+                    self.assertTrue(
+                        all(record["id"].startswith("<") for record in records)
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from gofai_language_detect_corpora import bundled_test_cases
+from gofai_language_detect_packs import (
+    best_rule_pack_language,
+    bundled_rule_pack_languages,
+    english_rule_pack_dict,
+    lang_detect_rule_packs,
+    load_rule_pack,
+    load_rule_packs,
+)
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_packs.py
+"""
+
+
+class RulePackTestLanguageDetection(unittest.TestCase):
+    def test_english_pack_matches_detector(self):
+        packs = load_rule_packs(["en"])
+        test_cases = bundled_test_cases()
+        for test_case in test_cases["valid"] + test_cases["invalid"]:
+            with self.subTest(test_case=test_case):
+                self.assertEqual(
+                    lang_detect_rule_packs(test_case, packs)["en"],
+                    lang_detect_word_sentence_counter(test_case),
+                )
+
+    def test_every_pack_in_one_pass(self):
+        packs = load_rule_packs()
+        self.assertEqual(
+            [pack.language for pack in packs], bundled_rule_pack_languages()
+        )
+        for language, text in (
+            ("en", "The dog is in the house with the children."),
+            ("es", "El perro está en la casa con los niños."),
+            ("fr", "Le chat est sur la table avec les enfants."),
+            ("de", "Der Hund ist mit den Kindern in dem Haus."),
+        ):
+            with self.subTest(language=language):
+                self.assertEqual(best_rule_pack_language(text, packs)[0], language)
+        self.assertEqual(best_rule_pack_language("$$$ ###", packs), (None, 0, 0))
+
+    def test_pack_validation(self):
+        pack = english_rule_pack_dict()
+        with self.assertRaises(ValueError):
+            load_rule_pack({**pack, "consonants": "bcd"})
+        del pack["vowels"]
+        with self.assertRaises(ValueError):
+            load_rule_pack(pack)
+        with self.assertRaises(FileNotFoundError):
+            load_rule_pack("xx")
+
+
+if __name__ == "__main__":
+    unittest.main()
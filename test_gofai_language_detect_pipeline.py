@@ -0,0 +1,107 @@
+import itertools
+import unittest
+
+from gofai_language_detect_corpora import bundled_corpus_lines, bundled_test_cases
+from gofai_language_detect_pipeline import (
+    SENTENCE_RULES,
+    STRICT_WORD_RULES,
+    WORD_RULES,
+    filter_sentences,
+    filter_words,
+    iter_sentences,
+    iter_tokens,
+    lang_detect_word_sentence_counter_pipeline,
+    word_digits_within_max,
+)
+from gofai_language_detect_test_documents import long_sentence_documents
+from gofai_language_detect_v52 import (
+    lang_detect_word_sentence_counter,
+    sanitize_and_split_text,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_pipeline.py
+"""
+
+
+class PipelineTestLanguageDetection(unittest.TestCase):
+    test_cases = bundled_test_cases()
+    documents = (
+        test_cases["valid"]
+        + test_cases["invalid"]
+        + bundled_corpus_lines("sentences_list")[:2000]
+        + long_sentence_documents(100, seed=47)
+    )
+
+    def test_tokens_match_sanitize_and_split_text(self):
+        for document in self.documents[:500] + ["a -- b.c\x1c--d  ...  e f"]:
+            with self.subTest(document=document):
+                self.assertEqual(
+                    list(iter_tokens(document)),
+                    sanitize_and_split_text(" ".join(document.split())),
+                )
+
+    def test_default_rules_match_profiles(self):
+        for document in self.documents:
+            with self.subTest(document=document):
+                self.assertEqual(
+                    lang_detect_word_sentence_counter_pipeline(document),
+                    lang_detect_word_sentence_counter(document),
+                )
+                self.assertEqual(
+                    lang_detect_word_sentence_counter_pipeline(
+                        document, STRICT_WORD_RULES
+                    ),
+                    lang_detect_word_sentence_counter(document, "strict"),
+                )
+
+    def test_insert_remove_reorder_rules(self):
+        text = "I flew on A380 jets."
+        self.assertEqual(lang_detect_word_sentence_counter_pipeline(text), (4, 1))
+        # inserted: "A380" has too many digits, and the sentence too few words
+        self.assertEqual(
+            lang_detect_word_sentence_counter_pipeline(
+                text, WORD_RULES + (word_digits_within_max,)
+            ),
+            (3, 0),
+        )
+        # reordered: same results
+        self.assertEqual(
+            lang_detect_word_sentence_counter_pipeline(
+                text, tuple(reversed(STRICT_WORD_RULES))
+            ),
+            lang_detect_word_sentence_counter(text, "strict"),
+        )
+        # removed: "Go to it" needs no MIN_WORDS_PER_SENTENCE
+        text = "Cats sit on mats and rugs. Go to it."
+        self.assertEqual(lang_detect_word_sentence_counter_pipeline(text), (9, 1))
+        self.assertEqual(
+            lang_detect_word_sentence_counter_pipeline(
+                text, sentence_rules=SENTENCE_RULES[1:]
+            ),
+            (9, 2),
+        )
+
+    def test_stages_are_lazy(self):
+        # an endless stream of words: the first sentences come out at once
+        sentence = "Please reply to my request about weather."
+        endless_words = itertools.cycle(sentence.split())
+        sentences = filter_sentences(iter_sentences(filter_words(endless_words)))
+        self.assertEqual(
+            [sentence.words for sentence in itertools.islice(sentences, 2)],
+            [["Please", "reply", "to", "my", "request", "about", "weather"]] * 2,
+        )
+
+        # a sentence with no end is yielded as segments as it grows
+        endless_words = itertools.cycle(sentence.rstrip(".").split())
+        segment = next(iter_sentences(endless_words))
+        self.assertTrue(segment.segment)
+        self.assertEqual(len(segment.words), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
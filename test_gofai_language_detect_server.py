@@ -0,0 +1,226 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from gofai_language_detect_corpora import valid_sample_cases
+from gofai_language_detect_server import LatencyHistogram, ScoringServer, main
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_server.py
+"""
+
+
+class LineCountingServer(ScoringServer):
+    """Counts the NDJSON request lines read, answered or not."""
+
+    lines_read = 0
+
+    async def _handle_line(self, line: bytes) -> tuple[int, dict]:
+        self.lines_read += 1
+        return await super()._handle_line(line)
+
+
+class ServerTestLanguageDetection(unittest.TestCase):
+    texts = valid_sample_cases + ["buy $$$", "", "He had a great time there."]
+
+    def expected(self):
+        return [list(lang_detect_word_sentence_counter(text)) for text in self.texts]
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "no Unix domain sockets")
+    def test_ndjson_unix_socket_pipelined(self):
+        async def scenario(socket_path):
+            server = ScoringServer(workers=0, max_batch_size=8, max_wait_ms=50)
+            await server.start(unix_path=socket_path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(socket_path)
+                lines = [
+                    json.dumps({"id": index, "text": text})
+                    for index, text in enumerate(self.texts)
+                ]
+                lines.append("not json")
+                writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+                await writer.drain()
+                responses = [
+                    json.loads(await reader.readline()) for _ in range(len(lines))
+                ]
+                # after the responses, so the requests are completed
+                writer.write(json.dumps({"op": "stats"}).encode("utf-8") + b"\n")
+                responses.append(json.loads(await reader.readline()))
+                writer.close()
+                return responses
+            finally:
+                await server.close()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            responses = asyncio.run(scenario(os.path.join(temp_dir, "lang.sock")))
+
+        score_responses = responses[: len(self.texts)]
+        self.assertEqual([response["id"] for response in score_responses], list(range(8)))
+        self.assertEqual(
+            [[response["words"], response["sentences"]] for response in score_responses],
+            self.expected(),
+        )
+        self.assertIn("error", responses[-2])
+
+        stats = responses[-1]["stats"]
+        self.assertEqual(stats["completed"], len(self.texts))
+        # pipelined requests are coalesced into fewer batches
+        self.assertLess(stats["batches"], len(self.texts))
+        self.assertEqual(stats["latency_ms"]["count"], len(self.texts))
+
+    def test_http(self):
+        async def scenario():
+            server = ScoringServer(workers=0, max_wait_ms=1)
+            await server.start(http_address=("127.0.0.1", 0))
+            host, port = server.addresses()[0][:2]
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                responses = []
+                for method, path, body in (
+                    ("POST", "/score", {"id": "a", "texts": self.texts}),
+                    ("POST", "/score", {"text": 5}),
+                    ("GET", "/stats", None),
+                ):
+                    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+                    writer.write(
+                        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                        + payload
+                    )
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    headers = {}
+                    while (header_line := await reader.readline()).strip():
+                        name, _, value = header_line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    response_body = await reader.readexactly(
+                        int(headers["content-length"])
+                    )
+                    responses.append(
+                        (int(status_line.split()[1]), json.loads(response_body))
+                    )
+                writer.close()
+                return responses
+            finally:
+                await server.close()
+
+        (score_status, score), (bad_status, _), (_, stats) = asyncio.run(scenario())
+        self.assertEqual(score_status, 200)
+        self.assertEqual(score, {"id": "a", "results": self.expected()})
+        self.assertEqual(bad_status, 400)
+        self.assertEqual(stats["stats"]["completed"], len(self.texts))
+
+    def test_scoring_errors_keep_connections_usable(self):
+        async def scenario():
+            # every batch fails: an unknown profile
+            server = ScoringServer(workers=0, max_wait_ms=1, profile="bogus")
+            await server.start(
+                tcp_address=("127.0.0.1", 0), http_address=("127.0.0.1", 0)
+            )
+            (tcp_host, tcp_port), (http_host, http_port) = [
+                address[:2] for address in server.addresses()
+            ]
+            try:
+                reader, writer = await asyncio.open_connection(tcp_host, tcp_port)
+                writer.write(
+                    b'{"id": 1, "text": "a b"}\n{"id": 2, "texts": ["c", "d"]}\n'
+                    b'{"op": "stats"}\n'
+                )
+                await writer.drain()
+                ndjson = [json.loads(await reader.readline()) for _ in range(3)]
+                writer.close()
+
+                reader, writer = await asyncio.open_connection(http_host, http_port)
+                statuses = []
+                for method, path, payload in (
+                    ("POST", "/score", b'{"text": "a b"}'),
+                    ("GET", "/stats", b""),
+                ):
+                    writer.write(
+                        f"{method} {path} HTTP/1.1\r\n"
+                        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                        + payload
+                    )
+                    await writer.drain()
+                    statuses.append(int((await reader.readline()).split()[1]))
+                    while (header_line := await reader.readline()).strip():
+                        if header_line.lower().startswith(b"content-length"):
+                            body_bytes = int(header_line.split(b":")[1])
+                    await reader.readexactly(body_bytes)
+                writer.close()
+                return ndjson, statuses
+            finally:
+                await server.close()
+
+        ndjson, statuses = asyncio.run(scenario())
+        self.assertEqual([response.get("id") for response in ndjson], [1, 2, None])
+        self.assertIn("scoring failed", ndjson[0]["error"])
+        self.assertIn("scoring failed", ndjson[1]["error"])
+        self.assertIn("stats", ndjson[2])
+        self.assertEqual(statuses, [500, 200])
+
+    def test_slow_reader_gets_backpressure(self):
+        requests = 30_000
+
+        async def scenario():
+            server = LineCountingServer(
+                workers=0, max_wait_ms=1, max_pending_per_connection=8
+            )
+            await server.start(tcp_address=("127.0.0.1", 0))
+            try:
+                client = socket.socket()
+                client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+                client.connect(server.addresses()[0][:2])
+                reader, writer = await asyncio.open_connection(sock=client)
+                # stats responses are large: the socket buffers fill quickly
+                writer.write(b'{"op": "stats"}\n' * requests)
+                sending = asyncio.ensure_future(writer.drain())
+                lines_read = -1
+                while lines_read != server.lines_read:  # until reading stalls
+                    lines_read = server.lines_read
+                    await asyncio.sleep(0.2)
+                responses = [json.loads(await reader.readline()) for _ in range(requests)]
+                await sending
+                writer.write_eof()
+                self.assertEqual(await reader.read(), b"")
+                writer.close()
+                return lines_read, responses
+            finally:
+                await server.close()
+
+        lines_read, responses = asyncio.run(scenario())
+        # the unread responses stopped the reading of further requests
+        self.assertLess(lines_read, requests)
+        self.assertEqual(len(responses), requests)
+        self.assertTrue(all("stats" in response for response in responses))
+
+    def test_command_line_profile_choices(self):
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            main(["--http", "127.0.0.1:0", "--profile", "bogus"])
+
+
+class LatencyHistogramTestLanguageDetection(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = LatencyHistogram(bucket_bounds_ms=(1, 10, 100))
+        for latency_ms in (0.5, 0.7, 5, 50, 500):
+            histogram.record(latency_ms)
+        snapshot = histogram.snapshot()
+        self.assertEqual(
+            snapshot["histogram"], {"le_1": 2, "le_10": 1, "le_100": 1, "over": 1}
+        )
+        self.assertEqual(snapshot["p50"], 10.0)
+        self.assertEqual(snapshot["p99"], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from gofai_language_detect_checkpoint import read_results
+from gofai_language_detect_corpora import valid_sample_cases
+from gofai_language_detect_shards import (
+    SQLiteWorkQueue,
+    run_sqlite_worker,
+    merge_shard_results,
+    publish_input_shards,
+    queue_status,
+    run_shard_worker,
+    score_shard,
+)
+from gofai_language_detect_v52 import lang_detect_word_sentence_counter
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_shards.py
+"""
+
+
+class ShardsTestLanguageDetection(unittest.TestCase):
+    documents = (valid_sample_cases + ["buy $$$", "", "Café is on the menu today."]) * 4
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.temp_dir.name, "jobs.sqlite")
+        self.output_dir = os.path.join(self.temp_dir.name, "shards")
+        self.results_path = os.path.join(self.temp_dir.name, "scores.bin")
+        self.queue = SQLiteWorkQueue(self.queue_path)
+
+    def tearDown(self):
+        self.queue.close()
+        self.temp_dir.cleanup()
+
+    def write_input(self, split: str, name: str = "docs") -> str:
+        path = os.path.join(self.temp_dir.name, f"{name}.{split}")
+        if split == "line":
+            data = "\n".join(self.documents) + "\n"
+        elif split == "nul":
+            data = "\0".join(self.documents)
+        else:
+            # blank lines are not documents
+            data = "".join(
+                json.dumps({"text": document}) + "\n\n" for document in self.documents
+            )
+        with open(path, "wb") as input_file:
+            input_file.write(data.encode("utf-8"))
+        return path
+
+    def expected(self, copies: int = 1):
+        return [
+            (doc_id, *lang_detect_word_sentence_counter(document))
+            for doc_id, document in enumerate(self.documents * copies)
+        ]
+
+    def test_byte_and_row_shards_merge_in_order(self):
+        for split, shard_options in (
+            ("line", {"shard_bytes": 100}),
+            ("nul", {"shard_bytes": 37}),
+            ("jsonl", {"shard_bytes": 64}),
+            ("jsonl", {"shard_rows": 5}),
+        ):
+            with self.subTest(split=split, **shard_options):
+                self.queue.connection.execute("DELETE FROM shards")
+                paths = [self.write_input(split, "a"), self.write_input(split, "b")]
+                published = publish_input_shards(
+                    self.queue, paths, split=split, **shard_options
+                )
+                self.assertGreater(published, 4)
+                self.assertEqual(run_shard_worker(self.queue, self.output_dir), published)
+                summary = merge_shard_results(
+                    self.queue, self.output_dir, self.results_path
+                )
+                self.assertEqual(summary["rows"], 2 * len(self.documents))
+                self.assertEqual(read_results(self.results_path), self.expected(2))
+
+    def test_expired_lease_is_claimed_again(self):
+        publish_input_shards(self.queue, [self.write_input("line")], shard_bytes=10**6)
+        os.makedirs(self.output_dir)
+        dead_claim = self.queue.claim("dead-worker", lease_seconds=0)
+        self.assertIsNotNone(dead_claim)
+        self.assertEqual(queue_status(self.queue)["expired"], 1)
+
+        live_claim = self.queue.claim("live-worker", lease_seconds=60)
+        self.assertEqual(live_claim["shard_id"], dead_claim["shard_id"])
+        self.assertIsNone(self.queue.claim("other-worker", lease_seconds=60))
+        # the dead worker lost its lease
+        self.assertFalse(self.queue.renew(dead_claim, 60))
+
+        self.assertTrue(score_shard(self.queue, live_claim, self.output_dir))
+        # a late second commit of the same shard changes nothing
+        self.assertFalse(self.queue.complete(dead_claim, 0))
+        merge_shard_results(self.queue, self.output_dir, self.results_path)
+        self.assertEqual(read_results(self.results_path), self.expected())
+
+    def test_merge_needs_every_shard(self):
+        publish_input_shards(self.queue, [self.write_input("line")], shard_bytes=100)
+        run_shard_worker(self.queue, self.output_dir, max_shards=1)
+        with self.assertRaises(RuntimeError):
+            merge_shard_results(self.queue, self.output_dir, self.results_path)
+
+    def test_concurrent_worker_processes(self):
+        publish_input_shards(self.queue, [self.write_input("line")], shard_bytes=50)
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            committed = sum(
+                executor.map(
+                    run_sqlite_worker,
+                    [self.queue_path] * 3,
+                    [self.output_dir] * 3,
+                    [60.0] * 3,
+                )
+            )
+        self.assertEqual(committed, queue_status(self.queue)["done"])
+        merge_shard_results(self.queue, self.output_dir, self.results_path)
+        self.assertEqual(read_results(self.results_path), self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
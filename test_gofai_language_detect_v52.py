@@ -0,0 +1,348 @@
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
+import gofai_language_detect_v52 as lang_detect
+from gofai_language_detect_corpora import (
+    edge_case_probably_invalid,
+    invalid_incomplete_test_cases_2,
+    valid_borderline_test_cases_3,
+    valid_sample_cases,
+    valid_short_test_cases_4,
+)
+from gofai_language_detect_v52 import (
+    CATEGORY_ABBREVIATION,
+    DETECTOR_PROFILES,
+    TOKEN_CATEGORY_WORDS,
+    WHITESPACE_CHARS,
+    iter_sanitized_tokens_with_offsets,
+    lang_detect_spans,
+    lang_detect_word_sentence_counter,
+    lang_detect_word_sentence_counter_bytes,
+    load_detector_config,
+    prescreen_text_for_language,
+    register_category_words,
+    sanitize_and_split_text,
+)
+
+###########
+# Unittest
+###########
+"""
+NOTE: In Python's unittest framework,
+test methods must start with the word "test_"
+to be automatically discovered and executed by the test runner
+
+use:
+    python3 -m unittest test_gofai_language_detect_v52.py
+"""
+
+
+# short_test_cases_4
+class ValidShortCasesTestLanguageDetection(unittest.TestCase):
+    def test_short_valid(self):
+        for test_case in valid_short_test_cases_4:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertGreater(result[1], 0)
+
+
+class EmptyInvalidTestLanguageDetection(unittest.TestCase):
+    def test_empty_invalid(self):
+        for test_case in invalid_incomplete_test_cases_2:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertEqual(result[1], 0)
+
+
+class EdgeCaseInvalidTestLanguageDetection(unittest.TestCase):
+    def test_edgecase_empty_invalid(self):
+        for test_case in edge_case_probably_invalid:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertEqual(result[1], 0)
+
+
+class ValidBorderlineTestLanguageDetection(unittest.TestCase):
+    def test_valid_borderline(self):
+        for test_case in valid_borderline_test_cases_3:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertGreater(result[1], 0)
+
+
+class ValidSampleTestLanguageDetection(unittest.TestCase):
+    def test_valid_samples(self):
+        for test_case in valid_sample_cases:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertGreater(result[1], 0)
+
+
+# Unittest N
+class ShortCasesTestLanguageDetection(unittest.TestCase):
+    def test_short_valid(self):
+        short_test_cases_4 = [
+            "please reply to my request about weather, tom",
+            "This is sentence one. This is sentence two. Here is!",
+        ]
+        for test_case in short_test_cases_4:
+            with self.subTest(test_case=test_case):
+                result = lang_detect_word_sentence_counter(test_case)
+                self.assertGreater(result[1], 0)
+
+
+class SpansTestLanguageDetection(unittest.TestCase):
+    def test_span_counts_match_counter(self):
+        all_test_cases = (
+            invalid_incomplete_test_cases_2
+            + valid_short_test_cases_4
+            + valid_sample_cases
+            + valid_borderline_test_cases_3
+            + edge_case_probably_invalid
+            + ["the cat is on the mat " * 40, "Safe--and   sound -- we are at Inc."]
+        )
+        for test_case in all_test_cases:
+            with self.subTest(test_case=test_case):
+                word_spans, sentence_spans = lang_detect_spans(test_case)
+                self.assertEqual(
+                    (len(word_spans), len(sentence_spans)),
+                    lang_detect_word_sentence_counter(test_case),
+                )
+
+    def test_spans_point_into_original_text(self):
+        text = "  Mr. Smith went\tto Washington.\n\nHe had a great -- time!"
+        word_spans, sentence_spans = lang_detect_spans(text)
+        self.assertEqual(
+            [text[start:end] for start, end in sentence_spans],
+            ["Smith went\tto Washington.", "He had a great -- time!"],
+        )
+        self.assertIn("Washington.", [text[start:end] for start, end in word_spans])
+
+    def test_tokens_match_sanitize_and_split_text(self):
+        text = "a--b.c  --  d—— e.. Mr.Smith"
+        tokens = [token for token, _, _ in iter_sanitized_tokens_with_offsets(text)]
+        self.assertEqual(tokens, sanitize_and_split_text(" ".join(text.split())))
+
+
+class TokenCategoryTestLanguageDetection(unittest.TestCase):
+    def test_ending_tokens_carry_word_flags(self):
+        token_category_flags = lang_detect.TOKEN_CATEGORY_FLAGS
+        self.assertEqual(token_category_flags["is."], token_category_flags["is"])
+        self.assertTrue(token_category_flags["mr."] & CATEGORY_ABBREVIATION)
+        self.assertNotIn("mr", token_category_flags)
+
+    def test_register_domain_verbs(self):
+        test_case = "Please frobnicate the widgets now."
+        self.assertEqual(lang_detect_word_sentence_counter(test_case)[1], 0)
+        try:
+            register_category_words("verb_prepos", ["Frobnicate"])
+            self.assertEqual(lang_detect_word_sentence_counter(test_case)[1], 1)
+        finally:
+            TOKEN_CATEGORY_WORDS["verb_prepos"].discard("frobnicate")
+            register_category_words("verb_prepos", [])
+        self.assertEqual(lang_detect_word_sentence_counter(test_case)[1], 0)
+
+
+class DetectorConfigTestLanguageDetection(unittest.TestCase):
+    def test_load_config_round_trip(self):
+        saved_len_to_n_vowels = dict(lang_detect.LEN_TO_N_VOWELS_BASE)
+        saved_max_words = lang_detect.MAX_WORDS_PER_SENTENCE
+        try:
+            load_detector_config(
+                {"LEN_TO_N_VOWELS": {"2": [1, 2]}, "MAX_WORDS_PER_SENTENCE": 50, "_note": 1}
+            )
+            self.assertEqual(lang_detect.LEN_TO_N_VOWELS, {2: {1, 2}})
+            self.assertEqual(lang_detect.MAX_WORDS_PER_SENTENCE, 50)
+            self.assertEqual(lang_detect.PRESCREEN_MIN_VOWELS_PER_WORD, 1)
+            load_detector_config({"LEN_TO_N_VOWELS": {"2": [2]}})
+            self.assertEqual(lang_detect.PRESCREEN_MIN_VOWELS_PER_WORD, 2)
+            self.assertFalse(prescreen_text_for_language("ab cd ef gh"))
+        finally:
+            load_detector_config(
+                {
+                    "LEN_TO_N_VOWELS": saved_len_to_n_vowels,
+                    "MAX_WORDS_PER_SENTENCE": saved_max_words,
+                }
+            )
+
+    def test_unknown_setting(self):
+        with self.assertRaises(ValueError):
+            load_detector_config({"MAX_WORDS": 3})
+
+
+class ProfilesTestLanguageDetection(unittest.TestCase):
+    def test_valid_cases_every_profile(self):
+        for profile in DETECTOR_PROFILES:
+            for test_case in valid_sample_cases + valid_short_test_cases_4:
+                with self.subTest(profile=profile, test_case=test_case):
+                    result = lang_detect_word_sentence_counter(test_case, profile=profile)
+                    self.assertGreater(result[1], 0)
+
+    def test_strict_rejects_shouting_words(self):
+        test_case = "THIS IS REALLY A SENTENCE about the weather"
+        self.assertEqual(lang_detect_word_sentence_counter(test_case)[1], 1)
+        self.assertEqual(lang_detect_word_sentence_counter(test_case, "strict")[1], 0)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            lang_detect_word_sentence_counter("text", profile="loose")
+
+
+class PrescreenTestLanguageDetection(unittest.TestCase):
+    def test_whitespace_chars_match_str_split(self):
+        self.assertEqual(
+            set(WHITESPACE_CHARS),
+            {char for char in map(chr, range(0x110000)) if char.isspace()},
+        )
+
+    def test_valid_cases_pass_prescreen(self):
+        for test_case in (
+            valid_short_test_cases_4
+            + valid_sample_cases
+            + valid_borderline_test_cases_3
+            + ["please reply to my request about weather, tom"]
+        ):
+            with self.subTest(test_case=test_case):
+                self.assertTrue(prescreen_text_for_language(test_case))
+
+    def test_prescreen_never_changes_sentence_counts(self):
+        all_test_cases = (
+            invalid_incomplete_test_cases_2
+            + valid_short_test_cases_4
+            + valid_sample_cases
+            + valid_borderline_test_cases_3
+            + edge_case_probably_invalid
+            + ["a.b.c.d", "Be be be be", "x y z w v", "The cat is on"]
+        )
+        for test_case in all_test_cases:
+            for profile in DETECTOR_PROFILES:
+                with self.subTest(test_case=test_case, profile=profile):
+                    self.assertEqual(
+                        lang_detect_word_sentence_counter(
+                            test_case, profile, prescreen=True
+                        )[1],
+                        lang_detect_word_sentence_counter(test_case, profile)[1],
+                    )
+
+    def test_rejects_blobs(self):
+        for blob in (
+            "aGVsbG8gd29ybGQgdGhpcyBpcyBhIGJhc2U2NCBibG9i",
+            '{"id":1234,"name":"abc","items":[1,2,3]}',
+            "0000 1111 2222 3333 4444",
+        ):
+            with self.subTest(blob=blob):
+                self.assertFalse(prescreen_text_for_language(blob))
+
+
+class BytesInputTestLanguageDetection(unittest.TestCase):
+    def test_bytes_match_str(self):
+        all_test_cases = (
+            invalid_incomplete_test_cases_2
+            + valid_short_test_cases_4
+            + valid_sample_cases
+            + valid_borderline_test_cases_3
+            + edge_case_probably_invalid
+            + [
+                "the cat is on the mat " * 40,
+                "Safe--and   sound -- we are at Inc.",
+                "field\x1cseparated\x1dwords are here. It is.",
+                "Caf\u00e9 au lait is on the menu \u2014\u2014 today.",
+                "",
+            ]
+        )
+        for test_case in all_test_cases:
+            expected = lang_detect_word_sentence_counter(test_case)
+            encoded = test_case.encode("utf-8")
+            for input_bytes in (encoded, bytearray(encoded), memoryview(encoded)):
+                with self.subTest(test_case=test_case, input_type=type(input_bytes)):
+                    self.assertEqual(
+                        lang_detect_word_sentence_counter_bytes(input_bytes), expected
+                    )
+
+    def test_invalid_utf8(self):
+        with self.assertRaises(UnicodeDecodeError):
+            lang_detect_word_sentence_counter_bytes(b"caf\xe9 is on the menu")
+        self.assertEqual(
+            lang_detect_word_sentence_counter_bytes(
+                b"caf\xe9 is on the menu", errors="replace"
+            ),
+            lang_detect_word_sentence_counter("caf\ufffd is on the menu"),
+        )
+
+
+class LeanImportTestLanguageDetection(unittest.TestCase):
+    def test_import_loads_only_the_detector(self):
+        # -S: no site packages, so only the detector's own imports are seen
+        loaded = subprocess.run(
+            [
+                sys.executable,
+                "-S",
+                "-c",
+                "import sys, gofai_language_detect_v52; "
+                "print(sorted({'unittest', 're', 'json', 'typing', 'collections'}"
+                " & set(sys.modules)))",
+            ],
+            capture_output=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(lang_detect.__file__)),
+            text=True,
+        ).stdout.strip()
+        self.assertEqual(loaded, "[]")
+
+
+class ThreadSafetyTestLanguageDetection(unittest.TestCase):
+    def test_concurrent_scoring_and_registration(self):
+        texts = valid_sample_cases + valid_short_test_cases_4
+        expected = [lang_detect_word_sentence_counter(text) for text in texts]
+        new_words = [f"zqxverb{index}" for index in range(16)]
+        mismatches = []
+        start = threading.Barrier(8)
+
+        def score_repeatedly():
+            start.wait()
+            for _ in range(20):
+                results = [lang_detect_word_sentence_counter(text) for text in texts]
+                results_bytes = [
+                    lang_detect_word_sentence_counter_bytes(text.encode("utf-8"))
+                    for text in texts
+                ]
+                if results != expected or results_bytes != expected:
+                    mismatches.append(results)
+
+        def register(words):
+            start.wait()
+            for word in words:
+                register_category_words("verb_prepos", [word])
+
+        threads = [threading.Thread(target=score_repeatedly) for _ in range(4)]
+        threads += [
+            threading.Thread(target=register, args=(new_words[index::4],))
+            for index in range(4)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(mismatches, [])
+            # no registration was lost to another
+            for word in new_words:
+                self.assertIn(word, lang_detect.TOKEN_CATEGORY_FLAGS)
+        finally:
+            TOKEN_CATEGORY_WORDS["verb_prepos"].difference_update(new_words)
+            register_category_words("verb_prepos", [])
+
+    def test_tables_are_immutable_or_locked(self):
+        for name in ("NLTK_STOPWORDS", "ABBREVIATIONS_SET", "SENTENCE_ENDINGS"):
+            self.assertIsInstance(getattr(lang_detect, name), (tuple, frozenset))
+        with lang_detect.DETECTOR_TABLES_LOCK:
+            # reentrant: writers can be grouped into one change
+            register_category_words("verb_prepos", [])
+
+
+if __name__ == "__main__":
+    result = unittest.main()
+    print(result)
@@ -0,0 +1,82 @@
+import unittest
+
+from gofai_language_detect_corpora import bundled_corpus_lines, bundled_test_cases
+from gofai_language_detect_test_documents import random_documents
+from gofai_language_detect_v52 import (
+    ENGLISH_VOWELS,
+    is_valid_english_word,
+    lang_detect_word_sentence_counter,
+    sanitize_and_split_text,
+)
+from gofai_language_detect_vowels import (
+    character_class_bytes,
+    lang_detect_word_sentence_counter_prefix_sums,
+    np,
+    token_vowel_counts,
+    valid_word_mask,
+)
+
+###########
+# Unittest
+###########
+"""
+use:
+    python3 -m unittest test_gofai_language_detect_vowels.py
+"""
+
+
+# Vowels and letters that change when lowercased, among other characters
+RANDOM_DOCUMENT_ALPHABET = "aeiouyAEIOUY bcdxz İıéÉ\x01#$!.?-–—\n\tß😀Σς"
+
+
+class VowelEngineTestLanguageDetection(unittest.TestCase):
+    test_cases = bundled_test_cases()
+    documents = (
+        test_cases["valid"]
+        + test_cases["invalid"]
+        + bundled_corpus_lines("sentences_list")[:500]
+        + random_documents(500, seed=45, alphabet=RANDOM_DOCUMENT_ALPHABET, max_chars=60)
+    )
+
+    def check_engine(self, use_numpy: bool):
+        for document in self.documents:
+            with self.subTest(document=document):
+                tokens = sanitize_and_split_text(" ".join(document.split()))
+                self.assertEqual(
+                    token_vowel_counts(tokens, use_numpy),
+                    [
+                        sum(1 for char in token.lower() if char in ENGLISH_VOWELS)
+                        for token in tokens
+                    ],
+                )
+                self.assertEqual(
+                    valid_word_mask(tokens, use_numpy),
+                    [is_valid_english_word(token) for token in tokens],
+                )
+                self.assertEqual(
+                    lang_detect_word_sentence_counter_prefix_sums(document, use_numpy),
+                    lang_detect_word_sentence_counter(document),
+                )
+
+    def test_stdlib_engine_matches_per_word(self):
+        self.check_engine(use_numpy=False)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_numpy_engine_matches_per_word(self):
+        self.check_engine(use_numpy=True)
+
+    @unittest.skipIf(np is not None, "numpy is installed")
+    def test_numpy_required(self):
+        with self.assertRaises(ImportError):
+            token_vowel_counts(["word"], use_numpy=True)
+
+    def test_character_classes(self):
+        self.assertEqual(
+            character_class_bytes("İa#😀"), (b"\x01\x01\x00\x00", b"\x00\x00\x01\x00")
+        )
+        self.assertEqual(token_vowel_counts([]), [])
+        self.assertEqual(lang_detect_word_sentence_counter_prefix_sums(""), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()